@@ -0,0 +1,49 @@
+"""Add partial indexes for task listing filters
+
+Revision ID: a3f1c2d4e5b6
+Revises: 6d0ed50f3d20
+Create Date: 2026-10-18 10:12:41.203518
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'a3f1c2d4e5b6'
+down_revision: Union[str, Sequence[str], None] = '6d0ed50f3d20'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+TASK_LISTING_INDEXES = {
+    'ix_tasks_project_active': ['project_id', 'created_at', 'id'],
+    'ix_tasks_project_status_active': ['project_id', 'status', 'created_at', 'id'],
+    'ix_tasks_project_priority_active': ['project_id', 'priority', 'created_at', 'id'],
+    'ix_tasks_project_assignee_active': ['project_id', 'assigned_to_user', 'created_at', 'id'],
+    'ix_tasks_project_due_date_active': ['project_id', 'due_date'],
+}
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    # CONCURRENTLY cannot run inside a transaction block
+    with op.get_context().autocommit_block():
+        for index_name, columns in TASK_LISTING_INDEXES.items():
+            op.create_index(
+                index_name,
+                'tasks',
+                columns,
+                if_not_exists=True,
+                postgresql_where=sa.text('is_deleted = false'),
+                postgresql_concurrently=True
+            )
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    with op.get_context().autocommit_block():
+        for index_name in TASK_LISTING_INDEXES:
+            op.drop_index(index_name, table_name='tasks', if_exists=True, postgresql_concurrently=True)
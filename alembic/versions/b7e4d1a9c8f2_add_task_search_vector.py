@@ -0,0 +1,56 @@
+"""Add generated search_vector column to tasks
+
+Revision ID: b7e4d1a9c8f2
+Revises: a3f1c2d4e5b6
+Create Date: 2026-10-18 11:02:17.845120
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+from sqlalchemy.dialects import postgresql
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'b7e4d1a9c8f2'
+down_revision: Union[str, Sequence[str], None] = 'a3f1c2d4e5b6'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+SEARCH_VECTOR_EXPRESSION = (
+    "setweight(to_tsvector('english', coalesce(name, '')), 'A') || "
+    "setweight(to_tsvector('english', left(coalesce(description, ''), 100000)), 'B')"
+)
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    # Adding a stored generated column rewrites the table and fills it in
+    op.add_column(
+        'tasks',
+        sa.Column(
+            'search_vector',
+            postgresql.TSVECTOR(),
+            sa.Computed(SEARCH_VECTOR_EXPRESSION, persisted=True),
+            nullable=True
+        )
+    )
+
+    with op.get_context().autocommit_block():
+        op.create_index(
+            'ix_tasks_search_vector',
+            'tasks',
+            ['search_vector'],
+            if_not_exists=True,
+            postgresql_using='gin',
+            postgresql_concurrently=True
+        )
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    with op.get_context().autocommit_block():
+        op.drop_index('ix_tasks_search_vector', table_name='tasks', if_exists=True, postgresql_concurrently=True)
+    op.drop_column('tasks', 'search_vector')
@@ -0,0 +1,66 @@
+"""Add normalized tag_list array columns to tasks and projects
+
+Revision ID: c5a8e2f7d913
+Revises: b7e4d1a9c8f2
+Create Date: 2026-10-18 11:47:52.390614
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+from sqlalchemy.dialects import postgresql
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'c5a8e2f7d913'
+down_revision: Union[str, Sequence[str], None] = 'b7e4d1a9c8f2'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+# Splits the existing comma-separated strings; Postgres fills the column for
+# every existing row when it is added and keeps it in sync afterwards
+TAG_LIST_EXPRESSION = r"array_remove(regexp_split_to_array(lower(btrim(coalesce(tags, ''))), '\s*,\s*'), '')"
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    for table_name in ('tasks', 'projects'):
+        op.add_column(
+            table_name,
+            sa.Column(
+                'tag_list',
+                postgresql.ARRAY(sa.String()),
+                sa.Computed(TAG_LIST_EXPRESSION, persisted=True),
+                nullable=True
+            )
+        )
+
+    with op.get_context().autocommit_block():
+        op.create_index(
+            'ix_tasks_tag_list_active',
+            'tasks',
+            ['tag_list'],
+            if_not_exists=True,
+            postgresql_using='gin',
+            postgresql_where=sa.text('is_deleted = false'),
+            postgresql_concurrently=True
+        )
+        op.create_index(
+            'ix_projects_tag_list',
+            'projects',
+            ['tag_list'],
+            if_not_exists=True,
+            postgresql_using='gin',
+            postgresql_concurrently=True
+        )
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    with op.get_context().autocommit_block():
+        op.drop_index('ix_projects_tag_list', table_name='projects', if_exists=True, postgresql_concurrently=True)
+        op.drop_index('ix_tasks_tag_list_active', table_name='tasks', if_exists=True, postgresql_concurrently=True)
+    op.drop_column('projects', 'tag_list')
+    op.drop_column('tasks', 'tag_list')
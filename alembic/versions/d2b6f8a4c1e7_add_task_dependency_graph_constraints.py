@@ -0,0 +1,87 @@
+"""Add task dependency graph constraints and traversal indexes
+
+Revision ID: d2b6f8a4c1e7
+Revises: c5a8e2f7d913
+Create Date: 2026-10-18 13:41:05.318274
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'd2b6f8a4c1e7'
+down_revision: Union[str, Sequence[str], None] = 'c5a8e2f7d913'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+DEPENDENCY_INDEXES = {
+    'idx_task_dependencies_task_id': ['task_id'],
+    'idx_task_dependencies_depends_on': ['depends_on_task_id'],
+}
+DEPENDENCY_FOREIGN_KEYS = {
+    'task_dependencies_task_id_fkey': 'task_id',
+    'task_dependencies_depends_on_task_id_fkey': 'depends_on_task_id',
+}
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    inspector = sa.inspect(op.get_bind())
+    unique_constraints = set()
+
+    # The table used to be created by create_all at startup only
+    if not inspector.has_table('task_dependencies'):
+        op.create_table(
+            'task_dependencies',
+            sa.Column('id', sa.Integer(), primary_key=True),
+            sa.Column('task_id', sa.Integer(), nullable=False),
+            sa.Column('depends_on_task_id', sa.Integer(), nullable=False),
+            sa.Column('dependency_type', sa.String(length=20), nullable=True),
+            sa.Column('created_at', sa.DateTime(), server_default=sa.func.now(), nullable=True),
+        )
+        op.create_index('ix_task_dependencies_id', 'task_dependencies', ['id'])
+    else:
+        unique_constraints = {c['name'] for c in inspector.get_unique_constraints('task_dependencies')}
+        for fk in inspector.get_foreign_keys('task_dependencies'):
+            op.drop_constraint(fk['name'], 'task_dependencies', type_='foreignkey')
+
+    for constraint_name, column in DEPENDENCY_FOREIGN_KEYS.items():
+        op.create_foreign_key(
+            constraint_name, 'task_dependencies', 'tasks', [column], ['id'], ondelete='CASCADE'
+        )
+
+    if 'unique_task_dependency' not in unique_constraints:
+        op.create_unique_constraint(
+            'unique_task_dependency', 'task_dependencies', ['task_id', 'depends_on_task_id']
+        )
+    op.execute(
+        "ALTER TABLE task_dependencies DROP CONSTRAINT IF EXISTS no_self_dependency, "
+        "ADD CONSTRAINT no_self_dependency CHECK (task_id != depends_on_task_id)"
+    )
+
+    # CONCURRENTLY cannot run inside a transaction block
+    with op.get_context().autocommit_block():
+        for index_name, columns in DEPENDENCY_INDEXES.items():
+            op.create_index(
+                index_name,
+                'task_dependencies',
+                columns,
+                if_not_exists=True,
+                postgresql_concurrently=True
+            )
+
+
+def downgrade() -> None:
+    """
+    Downgrade schema.
+
+    The constraints, the ON DELETE CASCADE foreign keys and both traversal
+    indexes predate this revision: migrations/add_task_dependencies_and_minutes.sql
+    creates all of them under the same names. upgrade() only brings a table
+    created by create_all up to that schema, so there is nothing of its own
+    to drop; removing them would leave the schema weaker than before.
+    """
@@ -0,0 +1,65 @@
+"""Add unresolved blocker counter and is_blocked flag to tasks
+
+Revision ID: e8c3a5f1b2d4
+Revises: d2b6f8a4c1e7
+Create Date: 2026-10-18 14:26:52.091437
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'e8c3a5f1b2d4'
+down_revision: Union[str, Sequence[str], None] = 'd2b6f8a4c1e7'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    op.add_column(
+        'tasks',
+        sa.Column('unresolved_blocker_count', sa.Integer(), server_default=sa.text('0'), nullable=False)
+    )
+    op.add_column(
+        'tasks',
+        sa.Column('is_blocked', sa.Boolean(), sa.Computed('unresolved_blocker_count > 0', persisted=True), nullable=True)
+    )
+
+    # Count the blocks edges whose blocker is neither completed nor deleted
+    op.execute("""
+        UPDATE tasks
+        SET unresolved_blocker_count = open_blockers.edges
+        FROM (
+            SELECT d.task_id, count(*) AS edges
+            FROM task_dependencies d
+            JOIN tasks blocker ON blocker.id = d.depends_on_task_id
+            WHERE d.dependency_type = 'blocks'
+              AND blocker.is_deleted = false
+              AND blocker.status IS DISTINCT FROM 'completed'
+            GROUP BY d.task_id
+        ) AS open_blockers
+        WHERE tasks.id = open_blockers.task_id
+    """)
+
+    # CONCURRENTLY cannot run inside a transaction block
+    with op.get_context().autocommit_block():
+        op.create_index(
+            'ix_tasks_project_blocked_active',
+            'tasks',
+            ['project_id', 'is_blocked', 'created_at', 'id'],
+            if_not_exists=True,
+            postgresql_where=sa.text('is_deleted = false'),
+            postgresql_concurrently=True
+        )
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    with op.get_context().autocommit_block():
+        op.drop_index('ix_tasks_project_blocked_active', table_name='tasks', if_exists=True, postgresql_concurrently=True)
+    op.drop_column('tasks', 'is_blocked')
+    op.drop_column('tasks', 'unresolved_blocker_count')
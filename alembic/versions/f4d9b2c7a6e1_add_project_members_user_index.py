@@ -0,0 +1,43 @@
+"""Add user-first index on active project memberships
+
+Revision ID: f4d9b2c7a6e1
+Revises: e8c3a5f1b2d4
+Create Date: 2026-10-18 17:41:09.552814
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'f4d9b2c7a6e1'
+down_revision: Union[str, Sequence[str], None] = 'e8c3a5f1b2d4'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    # CONCURRENTLY cannot run inside a transaction block
+    with op.get_context().autocommit_block():
+        op.create_index(
+            'ix_project_members_user_project_active',
+            'project_members',
+            ['user_id', 'project_id', 'role'],
+            if_not_exists=True,
+            postgresql_where=sa.text('is_deleted = false'),
+            postgresql_concurrently=True
+        )
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    with op.get_context().autocommit_block():
+        op.drop_index(
+            'ix_project_members_user_project_active',
+            table_name='project_members',
+            if_exists=True,
+            postgresql_concurrently=True
+        )
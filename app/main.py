@@ -4,10 +4,15 @@ from app.utils.minio_init import init_minio_buckets
 from app.utils.init_admin import create_super_admin
 from app.routes.user import router as user_router
 from app.routes.projects import router as project_router
-from app.routes.tasks import router as task_router
+from app.routes.tasks import router as task_router, search_router as task_search_router
 from app.routes.health import router as health_router
+from app.routes.metrics import router as metrics_router
 from app.middleware.transaction import TransactionMiddleware
+from app.middleware.metrics import MetricsMiddleware
+from app.middleware.query_stats import QueryStatsMiddleware
 from app.utils.audit import setup_audit_listeners
+from app.utils.password_pool import password_pool
+from app.utils.cache import invalidations
 
 app = FastAPI(
     title="TaskFlow API",
@@ -17,6 +22,9 @@ app = FastAPI(
 
 # Add transaction middleware for automatic session management
 app.add_middleware(TransactionMiddleware)
+app.add_middleware(QueryStatsMiddleware)
+# Added last so it runs outermost and times the whole request
+app.add_middleware(MetricsMiddleware)
 
 def init_db():
     """Initialize database tables"""
@@ -26,7 +34,9 @@ def init_db():
 app.include_router(user_router)
 app.include_router(project_router)
 app.include_router(task_router)
+app.include_router(task_search_router)
 app.include_router(health_router)
+app.include_router(metrics_router)
 
 @app.get("/health")
 async def get_health():
@@ -40,3 +50,10 @@ async def startup_event():
     setup_audit_listeners(Base)  # Initialize audit logging
     init_minio_buckets()
     create_super_admin()
+    invalidations.start()  # Keeps the in-process cache tier coherent
+
+@app.on_event("shutdown")
+async def shutdown_event():
+    """Release worker threads and the cache invalidation subscription"""
+    password_pool.shutdown()
+    await invalidations.stop()
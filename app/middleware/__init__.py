@@ -1,4 +1,6 @@
 """Middleware package for FastAPI application"""
 from app.middleware.transaction import TransactionMiddleware
+from app.middleware.metrics import MetricsMiddleware
+from app.middleware.query_stats import QueryStatsMiddleware
 
-__all__ = ["TransactionMiddleware"]
+__all__ = ["TransactionMiddleware", "MetricsMiddleware", "QueryStatsMiddleware"]
@@ -0,0 +1,41 @@
+import time
+from starlette.types import ASGIApp, Message, Receive, Scope, Send
+from app.utils.metrics import HTTP_REQUESTS, HTTP_REQUEST_SECONDS
+
+# Route label for requests that matched no route, so scanners probing
+# random paths cannot grow the label set
+UNMATCHED_ROUTE = "unmatched"
+
+
+class MetricsMiddleware:
+    """
+    ASGI middleware counting requests and timing them, labelled by method,
+    route template (e.g. /projects/{project_id}) and response status.
+
+    Latency runs until the app returns, so streamed bodies are included.
+    """
+
+    def __init__(self, app: ASGIApp):
+        self.app = app
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send):
+        if scope['type'] != 'http':
+            await self.app(scope, receive, send)
+            return
+
+        start = time.perf_counter()
+        status_code = 500
+
+        async def send_wrapper(message: Message):
+            nonlocal status_code
+            if message['type'] == 'http.response.start':
+                status_code = message['status']
+            await send(message)
+
+        try:
+            await self.app(scope, receive, send_wrapper)
+        finally:
+            route = scope.get('route')
+            path = route.path if route is not None else UNMATCHED_ROUTE
+            HTTP_REQUESTS.labels(scope['method'], path, status_code).inc()
+            HTTP_REQUEST_SECONDS.labels(scope['method'], path, status_code).observe(time.perf_counter() - start)
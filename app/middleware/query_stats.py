@@ -0,0 +1,39 @@
+from starlette.datastructures import MutableHeaders
+from starlette.types import ASGIApp, Message, Receive, Scope, Send
+from app.config import settings
+from app.utils.query_stats import start_query_stats, warn_repeated_queries
+
+
+class QueryStatsMiddleware:
+    """
+    ASGI middleware counting the SQL queries of each request.
+
+    - With settings.query_stats_headers, adds X-DB-Query-Count and a
+      Server-Timing "db" entry to the response
+    - Logs statements run more than settings.n_plus_one_threshold times
+      in one request (0 disables the check)
+    """
+
+    def __init__(self, app: ASGIApp):
+        self.app = app
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send):
+        if scope['type'] != 'http':
+            await self.app(scope, receive, send)
+            return
+
+        stats = start_query_stats()
+
+        async def send_wrapper(message: Message):
+            if message['type'] == 'http.response.start' and settings.query_stats_headers:
+                headers = MutableHeaders(scope=message)
+                headers.append('X-DB-Query-Count', str(stats.count))
+                headers.append('Server-Timing', f'db;dur={stats.seconds * 1000:.1f};desc="{stats.count} queries"')
+            await send(message)
+
+        try:
+            await self.app(scope, receive, send_wrapper)
+        finally:
+            threshold = settings.n_plus_one_threshold
+            if threshold and stats.count > threshold:
+                warn_repeated_queries(stats, threshold, f"{scope['method']} {scope['path']}")
@@ -1,70 +1,167 @@
 import logging
-from starlette.middleware.base import BaseHTTPMiddleware
+from fastapi.security.utils import get_authorization_scheme_param
+from starlette.datastructures import Headers
 from starlette.requests import Request
-from starlette.responses import Response
-from app.utils.database import SessionLocal
+from starlette.types import ASGIApp, Message, Receive, Scope, Send
+from sqlalchemy.ext.asyncio import AsyncSession
+from app.utils.database import AsyncSessionLocal, replica_pool
+from app.utils.replicas import has_recent_write, mark_recent_write, use_replica
 from typing import Optional
 import jwt
 from app.config import settings
 
 logger = logging.getLogger(__name__)
 
+# Requests that may read from a replica
+SAFE_METHODS = frozenset({'GET', 'HEAD'})
 
-class TransactionMiddleware(BaseHTTPMiddleware):
+
+def token_claims(scope: Scope) -> Optional[dict]:
+    """
+    Verified claims of the request's bearer token, decoded at most once per
+    request and shared through the request state.
+
+    Returns None when there is no bearer token. For an invalid or expired
+    token, raises the jwt error on every call.
+    """
+    state = scope.setdefault('state', {})
+    if 'token_claims' not in state:
+        scheme, token = get_authorization_scheme_param(Headers(scope=scope).get('Authorization'))
+        if scheme.lower() != 'bearer' or not token:
+            state['token_claims'] = None
+        else:
+            try:
+                state['token_claims'] = jwt.decode(token, settings.secret_key, algorithms=[settings.algorithm])
+            except jwt.InvalidTokenError as e:
+                state['token_claims'] = e
+
+    claims = state['token_claims']
+    if isinstance(claims, jwt.InvalidTokenError):
+        raise claims
+    return claims
+
+
+def extract_user_from_token(scope: Scope) -> tuple[Optional[int], Optional[str]]:
+    """Extract user ID and username from JWT token"""
+    try:
+        payload = token_claims(scope)
+    except jwt.InvalidTokenError:
+        return None, None
+    if not payload:
+        return None, None
+    user_id = payload.get('sub')
+    # We'll need to query username separately or add it to token
+    try:
+        return int(user_id) if user_id else None, None
+    except (TypeError, ValueError):
+        return None, None
+
+
+class RequestSession:
+    """
+    The database session of one request, opened on first use.
+
+    Requests that never ask for it (health probes, cache hits) create no
+    session, decode no token and leave nothing to commit.
+
+    When read replicas are configured, a GET or HEAD session reads from
+    the next replica unless its user wrote within the read-your-writes
+    window; RoutingSession moves it to the primary at its first write.
+    """
+
+    def __init__(self, scope: Scope):
+        self.scope = scope
+        self.session: Optional[AsyncSession] = None
+
+    async def get(self) -> AsyncSession:
+        if self.session is None:
+            db = self.session = AsyncSessionLocal()
+
+            # Set user context for audit logging
+            headers = Headers(scope=self.scope)
+            user_id, username = extract_user_from_token(self.scope)
+            client = self.scope.get('client')
+            db.info['user_id'] = user_id
+            db.info['username'] = username
+            db.info['ip_address'] = client[0] if client else None
+            db.info['user_agent'] = headers.get('user-agent')
+            db.info['endpoint'] = f"{self.scope['method']} {self.scope['path']}"
+
+            if replica_pool and self.scope['method'] in SAFE_METHODS:
+                if user_id is None or not await has_recent_write(f"user:{user_id}"):
+                    use_replica(db, replica_pool)
+        return self.session
+
+
+async def request_session(request: Request) -> AsyncSession:
+    """Return the request's session, opening it if this is the first use"""
+    return await request.state.db.get()
+
+
+class TransactionMiddleware:
     """
-    Middleware that manages database transactions for each request.
-    
-    - Creates a new session at the start of each request
+    ASGI middleware that manages database transactions for each request.
+
+    - Puts a RequestSession in the request state; the AsyncSession is only
+      created when a dependency first asks for it
     - Sets user context in session for audit logging
-    - Commits on successful response (2xx status codes)
+    - Commits when a 2xx response starts, before its headers are sent
+    - Runs the after_commit callbacks registered during the request
+    - Opens the user's read-your-writes window when replicas are configured
     - Rolls back on errors or non-2xx responses
-    - Always closes the session in finally block
+    - Always closes the session once the request is done
+
+    Requests that never used the session skip all of the above.
     """
-    
-    def extract_user_from_token(self, request: Request) -> tuple[Optional[int], Optional[str]]:
-        """Extract user ID and username from JWT token"""
-        auth_header = request.headers.get('Authorization')
-        if not auth_header or not auth_header.startswith('Bearer '):
-            return None, None
-        
-        token = auth_header.split(' ')[1]
-        try:
-            payload = jwt.decode(token, settings.secret_key, algorithms=[settings.algorithm])
-            user_id = payload.get('sub')
-            # We'll need to query username separately or add it to token
-            return int(user_id) if user_id else None, None
-        except:
-            return None, None
-    
-    async def dispatch(self, request: Request, call_next):
-        db = SessionLocal()
-        request.state.db = db
-        
-        # Set user context for audit logging
-        user_id, username = self.extract_user_from_token(request)
-        db.info['user_id'] = user_id
-        db.info['username'] = username
-        db.info['ip_address'] = request.client.host if request.client else None
-        db.info['user_agent'] = request.headers.get('user-agent')
-        db.info['endpoint'] = f"{request.method} {request.url.path}"
-        
+
+    def __init__(self, app: ASGIApp):
+        self.app = app
+
+    async def run_after_commit(self, db: AsyncSession):
+        """Await callbacks registered with after_commit; failures are logged, not raised"""
+        for callback in db.info.pop('after_commit', []):
+            try:
+                await callback()
+            except Exception as e:
+                logger.error(f"After-commit callback failed: {e}")
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send):
+        if scope['type'] != 'http':
+            await self.app(scope, receive, send)
+            return
+
+        holder = RequestSession(scope)
+        scope.setdefault('state', {})['db'] = holder
+        finished = False
+
+        async def send_wrapper(message: Message):
+            nonlocal finished
+            db = holder.session
+            if message['type'] == 'http.response.start' and db is not None:
+                # Settle the transaction before the client sees the status, so a
+                # failed commit still turns into an error response
+                finished = True
+                status_code = message['status']
+                if 200 <= status_code < 300:
+                    await db.commit()
+                    logger.debug(f"Transaction committed for {scope['method']} {scope['path']}")
+                    if replica_pool and db.info.get('wrote') and db.info.get('user_id'):
+                        await mark_recent_write(f"user:{db.info['user_id']}")
+                    await self.run_after_commit(db)
+                else:
+                    await db.rollback()
+                    logger.warning(f"Transaction rolled back for {scope['method']} {scope['path']} (status: {status_code})")
+            await send(message)
+
         try:
-            response: Response = await call_next(request)
-            
-            # Commit on successful responses (2xx status codes)
-            if 200 <= response.status_code < 300:
-                db.commit()
-                logger.debug(f"Transaction committed for {request.method} {request.url.path}")
-            else:
-                db.rollback()
-                logger.warning(f"Transaction rolled back for {request.method} {request.url.path} (status: {response.status_code})")
-            
-            return response
-            
+            await self.app(scope, receive, send_wrapper)
+
         except Exception as e:
-            db.rollback()
-            logger.error(f"Transaction rolled back due to exception: {e}")
+            if holder.session is not None and not finished:
+                await holder.session.rollback()
+                logger.error(f"Transaction rolled back due to exception: {e}")
             raise
-            
+
         finally:
-            db.close()
+            if holder.session is not None:
+                await holder.session.close()
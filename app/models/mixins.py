@@ -1,7 +1,12 @@
-from sqlalchemy import Column, Boolean, DateTime, Integer
+from sqlalchemy import Column, Boolean, DateTime, Integer, String, Computed
+from sqlalchemy.dialects.postgresql import ARRAY
 from sqlalchemy.sql import func
 
 
+# Lower-cased, trimmed tags split out of the comma-separated tags column
+TAG_LIST_EXPRESSION = r"array_remove(regexp_split_to_array(lower(btrim(coalesce(tags, ''))), '\s*,\s*'), '')"
+
+
 class SoftDeleteMixin:
     """
     Mixin to add soft delete functionality to models.
@@ -18,3 +23,12 @@ class TimestampMixin:
     """
     created_at = Column(DateTime, server_default=func.now(), nullable=False)
     updated_at = Column(DateTime, onupdate=func.now(), nullable=True)
+
+
+class TagListMixin:
+    """
+    Mixin adding tag_list, a normalized array copy of the comma-separated
+    tags column maintained by Postgres. Models index it with GIN so tag
+    filters and tag counts never scan the raw strings.
+    """
+    tag_list = Column(ARRAY(String), Computed(TAG_LIST_EXPRESSION, persisted=True))
@@ -1,12 +1,19 @@
 from app.utils.database import Base 
 from sqlalchemy.sql import func
-from sqlalchemy import Column, Integer, ForeignKey, DateTime, String
+from sqlalchemy import Column, Integer, ForeignKey, DateTime, String, Index, text
 from sqlalchemy.orm import relationship
 from app.models.mixins import SoftDeleteMixin
 
 
 class ProjectMembers(Base, SoftDeleteMixin):
     __tablename__ = "project_members"
+    __table_args__ = (
+        # Role lookups and the caller-scoped project listing go by user first
+        Index(
+            "ix_project_members_user_project_active", "user_id", "project_id", "role",
+            postgresql_where=text("is_deleted = false")
+        ),
+    )
     
     id = Column(Integer, primary_key=True, index=True)
     project_id = Column(Integer, ForeignKey("projects.id"), nullable=False)
@@ -1,12 +1,15 @@
-from sqlalchemy import Column, String, Integer, DateTime, ForeignKey
+from sqlalchemy import Column, String, Integer, DateTime, ForeignKey, Index
 from sqlalchemy.orm import relationship
 from app.utils.database import Base
 from sqlalchemy.sql import func
-from app.models.mixins import SoftDeleteMixin
+from app.models.mixins import SoftDeleteMixin, TagListMixin
 
 
-class Project(Base, SoftDeleteMixin):
+class Project(Base, SoftDeleteMixin, TagListMixin):
     __tablename__ = "projects"
+    __table_args__ = (
+        Index("ix_projects_tag_list", "tag_list", postgresql_using="gin"),
+    )
     
     id = Column(Integer, primary_key=True, index=True)
     name = Column(String, index=True)
@@ -1,15 +1,22 @@
 from app.utils.database import Base
-from sqlalchemy import Column, Integer, ForeignKey, String, DateTime
+from sqlalchemy import Column, Integer, ForeignKey, String, DateTime, Index, UniqueConstraint, CheckConstraint
 from sqlalchemy.sql import func
 from sqlalchemy.orm import relationship
 
 
 class TaskDependency(Base):
     __tablename__ = "task_dependencies"
+    __table_args__ = (
+        UniqueConstraint("task_id", "depends_on_task_id", name="unique_task_dependency"),
+        CheckConstraint("task_id != depends_on_task_id", name="no_self_dependency"),
+        # One index per traversal direction for the recursive closure queries
+        Index("idx_task_dependencies_task_id", "task_id"),
+        Index("idx_task_dependencies_depends_on", "depends_on_task_id"),
+    )
 
     id = Column(Integer, primary_key=True, index=True)
-    task_id = Column(Integer, ForeignKey('tasks.id'), nullable=False)
-    depends_on_task_id = Column(Integer, ForeignKey('tasks.id'), nullable=False)
+    task_id = Column(Integer, ForeignKey('tasks.id', ondelete="CASCADE"), nullable=False)
+    depends_on_task_id = Column(Integer, ForeignKey('tasks.id', ondelete="CASCADE"), nullable=False)
     dependency_type = Column(String(20), default="blocks")  # blocks, related_to, subtask_of
     created_at = Column(DateTime, server_default=func.now())
 
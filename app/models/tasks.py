@@ -1,12 +1,37 @@
 from app.utils.database import Base
-from sqlalchemy import Column, ForeignKey, String, Integer, DateTime, Text
+from sqlalchemy import Column, ForeignKey, String, Integer, Boolean, DateTime, Text, Index, Computed, text
+from sqlalchemy.dialects.postgresql import TSVECTOR
 from sqlalchemy.sql import func
-from sqlalchemy.orm import relationship
-from app.models.mixins import SoftDeleteMixin
+from sqlalchemy.orm import relationship, deferred
+from app.models.mixins import SoftDeleteMixin, TagListMixin
 
 
-class Task(Base, SoftDeleteMixin):
+# Partial indexes serving the list_tasks filters; rows that are soft deleted
+# are never listed, so they are left out of the indexes entirely.
+ACTIVE_TASKS = text("is_deleted = false")
+
+# Text search configuration used both by the generated column and by queries.
+# Descriptions are unbounded, so only a prefix is indexed to stay well clear
+# of the 1MB tsvector limit.
+SEARCH_CONFIG = "english"
+SEARCH_VECTOR_EXPRESSION = (
+    f"setweight(to_tsvector('{SEARCH_CONFIG}', coalesce(name, '')), 'A') || "
+    f"setweight(to_tsvector('{SEARCH_CONFIG}', left(coalesce(description, ''), 100000)), 'B')"
+)
+
+
+class Task(Base, SoftDeleteMixin, TagListMixin):
     __tablename__ = "tasks"
+    __table_args__ = (
+        Index("ix_tasks_project_active", "project_id", "created_at", "id", postgresql_where=ACTIVE_TASKS),
+        Index("ix_tasks_project_status_active", "project_id", "status", "created_at", "id", postgresql_where=ACTIVE_TASKS),
+        Index("ix_tasks_project_priority_active", "project_id", "priority", "created_at", "id", postgresql_where=ACTIVE_TASKS),
+        Index("ix_tasks_project_assignee_active", "project_id", "assigned_to_user", "created_at", "id", postgresql_where=ACTIVE_TASKS),
+        Index("ix_tasks_project_due_date_active", "project_id", "due_date", postgresql_where=ACTIVE_TASKS),
+        Index("ix_tasks_project_blocked_active", "project_id", "is_blocked", "created_at", "id", postgresql_where=ACTIVE_TASKS),
+        Index("ix_tasks_search_vector", "search_vector", postgresql_using="gin"),
+        Index("ix_tasks_tag_list_active", "tag_list", postgresql_using="gin", postgresql_where=ACTIVE_TASKS),
+    )
 
     id = Column(Integer, primary_key=True, unique=True)
     name = Column(String(255))
@@ -24,8 +49,18 @@ class Task(Base, SoftDeleteMixin):
     assigned_to_user = Column(Integer, ForeignKey('project_members.id'))
     created_at = Column(DateTime, server_default=func.now())
     updated_at = Column(DateTime, onupdate=func.now())
+    # Maintained by Postgres from name/description; deferred so plain task
+    # queries never fetch it
+    search_vector = deferred(Column(TSVECTOR, Computed(SEARCH_VECTOR_EXPRESSION, persisted=True)))
+    # Number of "blocks" dependencies on tasks that are still open, kept
+    # current by TaskGraphService; is_blocked mirrors it for indexing
+    unresolved_blocker_count = Column(Integer, nullable=False, default=0, server_default=text("0"))
+    is_blocked = Column(Boolean, Computed("unresolved_blocker_count > 0", persisted=True))
 
     project = relationship('Project', back_populates='tasks')
     assigned_to = relationship('ProjectMembers', back_populates='tasks')
-    dependencies = relationship('TaskDependency', foreign_keys='TaskDependency.task_id', back_populates='task')
-    dependents = relationship('TaskDependency', foreign_keys='TaskDependency.depends_on_task_id', back_populates='depends_on')
+    # Edges are removed by ON DELETE CASCADE in the database
+    dependencies = relationship('TaskDependency', foreign_keys='TaskDependency.task_id', back_populates='task',
+                                cascade='all, delete-orphan', passive_deletes=True)
+    dependents = relationship('TaskDependency', foreign_keys='TaskDependency.depends_on_task_id', back_populates='depends_on',
+                              cascade='all, delete-orphan', passive_deletes=True)
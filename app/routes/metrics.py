@@ -0,0 +1,11 @@
+from fastapi import APIRouter
+from fastapi.responses import PlainTextResponse
+from app.utils.metrics import CONTENT_TYPE, render
+
+router = APIRouter(tags=["Health"])
+
+
+@router.get("/metrics", response_class=PlainTextResponse)
+async def metrics():
+    """Request, connection pool, Redis and S3 metrics in Prometheus text format"""
+    return PlainTextResponse(render(), media_type=CONTENT_TYPE)
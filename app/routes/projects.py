@@ -1,33 +1,78 @@
-from fastapi import APIRouter, Depends, HTTPException, status
-from app.utils.dependencies import get_db
-from app.utils.permissions import RoleChecker
+from fastapi import APIRouter, Depends, HTTPException, Query, Request, Response, status
+from app.utils.dependencies import get_db, get_current_active_user
+from app.utils.permissions import RoleChecker, PolicyEngine
 from app.models.user import User 
 from app.models.projects import Project
-from app.schemas.project import ProjectCreate, ProjectOut, ProjectList, ProjectUpdate
-from sqlalchemy.orm import Session
+from app.models.tasks import Task
+from app.schemas.project import (
+    ProjectCreate, ProjectOut, ProjectList, ProjectStatus, ProjectUpdate, TagMatch, TagCountList, MyProjectList
+)
+from sqlalchemy import and_, func, select, true
+from sqlalchemy.orm import selectinload
+from sqlalchemy.ext.asyncio import AsyncSession
 from app.models.project_members import ProjectMembers
 from app.schemas.project_members import ProjectMemberCreate, ProjectMemberOut, ProjectMemberRole
-from typing import List
-from app.utils.redis_client import get_redis_client
-from redis import asyncio as aioredis
-import json
+from typing import List, Optional
+from app.utils.cache import cached, invalidate_after_commit, tag_version_key, tag_versions
+from app.utils.replicas import pin_if_recently_written
+from app.utils.role_cache import invalidate_role_after_commit
+from app.utils.etag import (
+    MEMBERS_COLLECTION,
+    make_etag, etag_matches, not_modified, collection_version, bump_after_commit
+)
+from app.utils.tags import normalize_tags, tag_filter
+from app.utils.fieldsets import parse_fields, pick_fields
+from app.utils.pagination import encode_cursor, decode_cursor
+from app.config import settings
+from fastapi.responses import JSONResponse
 import datetime
 
+# Cached values are refreshed by one caller after CACHE_SOFT_TTL while the
+# others keep serving them, and dropped after CACHE_TTL
 CACHE_TTL = 600
+CACHE_SOFT_TTL = 300
+
+# Cache tags: one project, every project, the projects one user belongs to
+PROJECT_TAG = "project:{project_id}"
+PROJECTS_TAG = "projects"
+USER_PROJECTS_TAG = "user:{user_id}:projects"
 
 router = APIRouter(prefix="/projects", tags=["Projects"])
 
 
+def _members_changed(db: AsyncSession, project_id: int):
+    """Invalidate the project's member list ETags once the transaction commits"""
+    bump_after_commit(db, MEMBERS_COLLECTION.format(project_id=project_id))
+
+
+def _project_changed(db: AsyncSession, project_id: int):
+    """
+    Invalidate the cached project and every cached listing of projects once
+    the transaction commits; member listings embed the project, so their
+    ETags are invalidated as well.
+    """
+    invalidate_after_commit(db, PROJECT_TAG.format(project_id=project_id), PROJECTS_TAG)
+    _members_changed(db, project_id)
+
+
+def _membership_changed(db: AsyncSession, project_id: int, user_id: int):
+    """Invalidate the member list, the user's cached role and their project listing after commit"""
+    _members_changed(db, project_id)
+    invalidate_role_after_commit(db, user_id, project_id)
+    invalidate_after_commit(db, USER_PROJECTS_TAG.format(user_id=user_id))
+
+
 @router.post("", response_model=ProjectOut, status_code=status.HTTP_201_CREATED)
 async def create_project(
     project_data: ProjectCreate, 
-    db: Session = Depends(get_db),
+    db: AsyncSession = Depends(get_db),
     current_user: User = Depends(RoleChecker("project:create"))
 ):
     """Create a new project (admin only) - POST /projects"""
-    db_project = db.query(Project).filter(
+    result = await db.execute(select(Project).where(
         Project.name == project_data.name
-    ).first()
+    ))
+    db_project = result.scalars().first()
     
     if db_project:
         raise HTTPException(
@@ -44,71 +89,209 @@ async def create_project(
         tags=project_data.tags
     )
     db.add(new_project)
-    db.flush()
-    db.refresh(new_project)
+    await db.flush()
+    await db.refresh(new_project)
+    invalidate_after_commit(db, PROJECTS_TAG)
     
     return new_project
 
 
 @router.get("", response_model=ProjectList)
 async def list_projects(
-    db: Session = Depends(get_db),
-    redis: aioredis.Redis = Depends(get_redis_client)
+    tag: Optional[List[str]] = Query(None),
+    tag_match: TagMatch = Query(TagMatch.ANY),
+    fields: Optional[str] = Query(None, description="Comma-separated ProjectOut fields to return"),
+    db: AsyncSession = Depends(get_db)
 ):
-    """Get all projects - GET /projects"""
-    ALL_PROJECTS_KEY = "projects:all"
-    cached = await redis.get(ALL_PROJECTS_KEY)
-    
-    if cached:
-        return json.loads(cached)
-    
-    projects = db.query(Project).filter(Project.is_deleted == False).all()
-    response_data_dict = {"projectlist": projects}
-    serialized_data = ProjectList.model_validate(response_data_dict).model_dump_json()
-    await redis.set(ALL_PROJECTS_KEY, serialized_data, ex=CACHE_TTL)
+    """
+    Get all projects, optionally filtered by tag - GET /projects
+
+    With fields=, tag-filtered listings select only the requested columns;
+    the unfiltered listing trims the cached full projects instead.
+    """
+    selected = parse_fields(fields, ProjectOut)
+    tags = normalize_tags(tag)
+    if tags:
+        # Tag-filtered listings are served straight from the GIN index
+        if selected is None:
+            query = select(Project)
+        else:
+            query = select(*[Project.__table__.c[field] for field in selected])
+        result = await db.execute(query.where(
+            Project.is_deleted == False,
+            tag_filter(Project.tag_list, tags, tag_match)
+        ))
+        if selected is not None:
+            return JSONResponse({"projectlist": [pick_fields(row._mapping, selected) for row in result.all()]})
+        return {"projectlist": result.scalars().all()}
+
+    await pin_if_recently_written(db, tag_version_key(PROJECTS_TAG))
+
+    async def load_projects():
+        result = await db.execute(select(Project).where(Project.is_deleted == False))
+        projects = result.scalars().all()
+        return ProjectList.model_validate({"projectlist": projects}).model_dump(mode="json")
+
+    response_data_dict = await cached("projects:all", [PROJECTS_TAG], CACHE_TTL, load_projects, CACHE_SOFT_TTL)
+
+    if selected is not None:
+        return JSONResponse({
+            "projectlist": [pick_fields(project, selected) for project in response_data_dict["projectlist"]]
+        })
     
     return response_data_dict
 
 
+@router.get("/mine", response_model=MyProjectList)
+async def list_my_projects(
+    status_filter: Optional[ProjectStatus] = Query(None, alias="status"),
+    limit: Optional[int] = Query(None, ge=1),
+    cursor: Optional[str] = Query(None),
+    current_user: User = Depends(get_current_active_user),
+    db: AsyncSession = Depends(get_db)
+):
+    """
+    Projects the caller is a member of, with their role - GET /projects/mine
+
+    One join of projects with the caller's memberships, ordered by id and
+    paginated with next_cursor. Admins see every project (role is null
+    where they are not a member). Pages are cached per user, tagged with
+    their memberships and with every project, so joining, leaving or
+    editing a project invalidates the listing.
+    """
+    page_size = min(limit or settings.project_page_size_default, settings.project_page_size_max)
+    # Validated before building the cache key, so junk query strings are
+    # rejected without creating cache entries
+    last_id = decode_cursor(cursor, (int,))[0] if cursor else None
+    status_value = status_filter.value if status_filter else None
+
+    user_tag = USER_PROJECTS_TAG.format(user_id=current_user.id)
+    await pin_if_recently_written(db, tag_version_key(user_tag), tag_version_key(PROJECTS_TAG))
+    page_key = f"user:{current_user.id}:projects:mine:{status_value or ''}:{page_size}:{last_id or ''}"
+    return await cached(
+        page_key, [user_tag, PROJECTS_TAG], CACHE_TTL,
+        lambda: _load_my_projects(db, current_user, status_value, page_size, last_id), CACHE_SOFT_TTL
+    )
+
+
+async def _load_my_projects(
+    db: AsyncSession, current_user: User, status_filter: Optional[str], page_size: int, last_id: Optional[int]
+) -> dict:
+    """One page of GET /projects/mine, ready to cache"""
+    membership = and_(
+        ProjectMembers.project_id == Project.id,
+        ProjectMembers.user_id == current_user.id,
+        ProjectMembers.is_deleted == False
+    )
+    # "leader" sorts before "member", so min() prefers the leader role
+    role = func.min(ProjectMembers.role).label("role")
+    query = select(Project, role)
+    if PolicyEngine.is_admin(current_user):
+        query = query.outerjoin(ProjectMembers, membership)
+    else:
+        query = query.join(ProjectMembers, membership)
+
+    query = query.where(Project.is_deleted == False)
+    if status_filter:
+        query = query.where(Project.status == status_filter)
+    if last_id is not None:
+        query = query.where(Project.id > last_id)
+
+    result = await db.execute(query.group_by(Project.id).order_by(Project.id).limit(page_size + 1))
+    rows = result.all()
+
+    next_cursor = None
+    if len(rows) > page_size:
+        rows = rows[:page_size]
+        next_cursor = encode_cursor(rows[-1].Project.id)
+
+    return MyProjectList.model_validate({
+        "projects": [
+            {**ProjectOut.model_validate(row.Project).model_dump(), "role": row.role}
+            for row in rows
+        ],
+        "next_cursor": next_cursor,
+    }).model_dump(mode="json")
+
+
 @router.get("/{project_id}", response_model=ProjectOut)
 async def get_project(
     project_id: int,
-    db: Session = Depends(get_db),
-    current_user: User = Depends(RoleChecker("project:view", "project_id")),
-    redis: aioredis.Redis = Depends(get_redis_client)
+    request: Request,
+    response: Response,
+    fields: Optional[str] = Query(None, description="Comma-separated ProjectOut fields to return"),
+    db: AsyncSession = Depends(get_db),
+    current_user: User = Depends(RoleChecker("project:view", "project_id"))
 ):
-    """Get single project by ID - GET /projects/{project_id}"""
-    SINGLE_PROJECT_KEY = f"project:{project_id}"
-    cached = await redis.get(SINGLE_PROJECT_KEY)
+    """
+    Get single project by ID - GET /projects/{project_id}
+
+    The ETag comes from the project's cache tag version, which moves on
+    every update or delete, so If-None-Match is answered with 304 without
+    touching the database, and a 200 is served from the cache.
+    With fields=, the cached project is trimmed to the requested fields.
+    """
+    selected = parse_fields(fields, ProjectOut)
+    project_tag = PROJECT_TAG.format(project_id=project_id)
+    version, = await tag_versions([project_tag])
+
+    etag = make_etag("project", project_id, version, selected)
+    if etag_matches(request, etag):
+        return not_modified(etag)
+    response.headers["ETag"] = etag
+    await pin_if_recently_written(db, tag_version_key(project_tag))
+
+    async def load_project():
+        db_project = await db.get(Project, project_id)
+
+        if not db_project:
+            raise HTTPException(
+                status_code=status.HTTP_404_NOT_FOUND,
+                detail=f"Project with id {project_id} not found"
+            )
+        
+        return ProjectOut.model_validate(db_project).model_dump(mode="json")
+
+    project = await cached(project_tag, [project_tag], CACHE_TTL, load_project, CACHE_SOFT_TTL)
     
-    if cached:
-        return json.loads(cached)
+    if selected is not None:
+        return JSONResponse(pick_fields(project, selected), headers={"ETag": etag})
     
-    db_project = db.query(Project).filter(Project.id == project_id).first()
+    return project
 
-    if not db_project:
-        raise HTTPException(
-            status_code=status.HTTP_404_NOT_FOUND,
-            detail=f"Project with id {project_id} not found"
-        )
+
+@router.get("/{project_id}/tags", response_model=TagCountList)
+async def list_project_tags(
+    project_id: int,
+    current_user: User = Depends(RoleChecker("project:view", "project_id")),
+    db: AsyncSession = Depends(get_db)
+):
+    """Count the project's tasks per tag - GET /projects/{project_id}/tags"""
+    tag_values = func.unnest(Task.tag_list).table_valued("tag").render_derived()
+    task_count = func.count().label("count")
     
-    project_json = ProjectOut.model_validate(db_project).model_dump_json()
-    await redis.set(SINGLE_PROJECT_KEY, project_json, ex=CACHE_TTL)
+    result = await db.execute(
+        select(tag_values.c.tag, task_count).select_from(Task).join(tag_values, true()).where(
+            Task.project_id == project_id,
+            Task.is_deleted == False
+        ).group_by(tag_values.c.tag).order_by(task_count.desc(), tag_values.c.tag)
+    )
     
-    return db_project
+    return {"tags": result.all()}
 
 
 @router.put("/{project_id}", response_model=ProjectOut)
 async def update_project(
     project_id: int,
     project_data: ProjectUpdate,
-    db: Session = Depends(get_db),
+    db: AsyncSession = Depends(get_db),
     current_user: User = Depends(RoleChecker("project:update", "project_id"))
 ):
     """Update project (admin or leader) - PUT /projects/{project_id}"""
-    db_project = db.query(Project).filter(
+    result = await db.execute(select(Project).where(
         Project.id == project_id
-    ).first()
+    ))
+    db_project = result.scalars().first()
     
     if not db_project:
         raise HTTPException(
@@ -127,8 +310,9 @@ async def update_project(
     if project_data.tags is not None:
         db_project.tags = project_data.tags
 
-    db.flush()
-    db.refresh(db_project)
+    await db.flush()
+    await db.refresh(db_project)
+    _project_changed(db, project_id)
     
     return db_project
 
@@ -137,13 +321,14 @@ async def update_project(
 async def delete_project(
     project_id: int,
     current_user: User = Depends(RoleChecker("project:delete", "project_id")),
-    db: Session = Depends(get_db)
+    db: AsyncSession = Depends(get_db)
 ):
     """Soft delete project (admin only) - DELETE /projects/{project_id}"""
-    db_project = db.query(Project).filter(
+    result = await db.execute(select(Project).where(
         Project.id == project_id,
         Project.is_deleted == False
-    ).first()
+    ))
+    db_project = result.scalars().first()
     
     if not db_project:
         raise HTTPException(
@@ -154,7 +339,8 @@ async def delete_project(
     db_project.is_deleted = True
     db_project.deleted_at = datetime.datetime.utcnow()
     db_project.deleted_by = current_user.id
-    db.flush()
+    await db.flush()
+    _project_changed(db, project_id)
     
     return None
 
@@ -164,12 +350,13 @@ async def add_project_member(
     project_id: int,
     member_data: ProjectMemberCreate,
     current_user: User = Depends(RoleChecker("project:manage_members", "project_id")),
-    db: Session = Depends(get_db)
+    db: AsyncSession = Depends(get_db)
 ):
     """Add member to project (admin or leader) - POST /projects/{project_id}/members"""
-    existing_project = db.query(Project).filter(
+    result = await db.execute(select(Project).where(
         Project.id == project_id
-    ).first()
+    ))
+    existing_project = result.scalars().first()
     
     if not existing_project:
         raise HTTPException(
@@ -177,10 +364,11 @@ async def add_project_member(
             detail=f"Project with id {project_id} does not exist"
         )
     
-    user_membership = db.query(ProjectMembers).filter(
+    result = await db.execute(select(ProjectMembers).where(
         ProjectMembers.project_id == project_id,
         ProjectMembers.user_id == member_data.user_id
-    ).first()
+    ))
+    user_membership = result.scalars().first()
     
     if user_membership:
         raise HTTPException(
@@ -191,11 +379,13 @@ async def add_project_member(
     new_user_membership = ProjectMembers(
         project_id=project_id,
         user_id=member_data.user_id,
-        role=member_data.role.value
+        role=member_data.role.value,
+        project=existing_project
     )
     db.add(new_user_membership)
-    db.flush()
-    db.refresh(new_user_membership)
+    await db.flush()
+    await db.refresh(new_user_membership)
+    _membership_changed(db, project_id, member_data.user_id)
     
     return new_user_membership
 
@@ -203,13 +393,27 @@ async def add_project_member(
 @router.get("/{project_id}/members", response_model=List[ProjectMemberOut])
 async def list_project_members(
     project_id: int,
+    request: Request,
+    response: Response,
     current_user: User = Depends(RoleChecker("project:view", "project_id")),
-    db: Session = Depends(get_db)
+    db: AsyncSession = Depends(get_db)
 ):
     """List all members of a project - GET /projects/{project_id}/members"""
-    members = db.query(ProjectMembers).filter(
-        ProjectMembers.project_id == project_id
-    ).all()
+    members_key = MEMBERS_COLLECTION.format(project_id=project_id)
+    await pin_if_recently_written(db, members_key)
+    version = await collection_version(members_key)
+    etag = make_etag("members", project_id, version)
+    if etag_matches(request, etag):
+        return not_modified(etag)
+    response.headers["ETag"] = etag
+
+    # ProjectMemberOut embeds the project, which cannot be lazy loaded under asyncio
+    result = await db.execute(
+        select(ProjectMembers)
+        .where(ProjectMembers.project_id == project_id)
+        .options(selectinload(ProjectMembers.project))
+    )
+    members = result.scalars().all()
     return members
 
 
@@ -218,13 +422,14 @@ async def remove_project_member(
     project_id: int,
     user_id: int,
     current_user: User = Depends(RoleChecker("project:manage_members", "project_id")),
-    db: Session = Depends(get_db)
+    db: AsyncSession = Depends(get_db)
 ):
     """Remove member from project (admin or leader) - DELETE /projects/{project_id}/members/{user_id}"""
-    existing_user = db.query(ProjectMembers).filter(
+    result = await db.execute(select(ProjectMembers).where(
         ProjectMembers.project_id == project_id,
         ProjectMembers.user_id == user_id
-    ).first()
+    ))
+    existing_user = result.scalars().first()
 
     if not existing_user:
         raise HTTPException(
@@ -232,7 +437,8 @@ async def remove_project_member(
             detail=f"User with id {user_id} does not exist in the project"
         )
     
-    db.delete(existing_user)
+    await db.delete(existing_user)
+    _membership_changed(db, project_id, user_id)
     return None
 
 
@@ -240,13 +446,14 @@ async def remove_project_member(
 async def assign_project_leader(
     project_id: int,
     member_data: ProjectMemberCreate,
-    db: Session = Depends(get_db),
+    db: AsyncSession = Depends(get_db),
     current_user: User = Depends(RoleChecker("project:manage_members", "project_id"))
 ):
     """Assign leader to project (admin only) - POST /projects/{project_id}/leader"""
-    db_project = db.query(Project).filter(
+    result = await db.execute(select(Project).where(
         Project.id == project_id
-    ).first()
+    ))
+    db_project = result.scalars().first()
     
     if not db_project:
         raise HTTPException(
@@ -257,11 +464,13 @@ async def assign_project_leader(
     new_project_assignment = ProjectMembers(
         project_id=project_id,
         user_id=member_data.user_id,
-        role=ProjectMemberRole.LEADER.value
+        role=ProjectMemberRole.LEADER.value,
+        project=db_project
     )
 
     db.add(new_project_assignment)
-    db.flush()
-    db.refresh(new_project_assignment)
+    await db.flush()
+    await db.refresh(new_project_assignment)
+    _membership_changed(db, project_id, member_data.user_id)
     
     return new_project_assignment
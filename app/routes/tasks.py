@@ -1,16 +1,48 @@
-from sqlalchemy.orm import Session
+from sqlalchemy import Integer, cast, column, func, insert, or_, select, true, tuple_, update, values
+from sqlalchemy.dialects.postgresql import REGCONFIG
+from sqlalchemy.ext.asyncio import AsyncSession
+from app.utils.database import AsyncSessionLocal
 from app.utils.dependencies import get_db, get_current_active_user
-from app.utils.permissions import RoleChecker
-from app.models.tasks import Task
+from app.utils.permissions import RoleChecker, PolicyEngine
+from app.utils.pagination import encode_cursor, decode_cursor
+from app.utils.audit import AuditService
+from app.utils.tags import normalize_tags, tag_filter
+from app.utils.task_graph import TaskGraphService
+from app.utils.fieldsets import parse_fields, pick_fields
+from app.utils.replicas import pin_if_recently_written
+from app.utils.cache import cached
+from app.utils.etag import (
+    TASKS_COLLECTION, make_etag, etag_matches, not_modified, collection_version, bump_after_commit
+)
+from app.config import settings
+from app.models.tasks import Task, SEARCH_CONFIG
+from app.models.task_dependencies import TaskDependency
 from app.models.user import User
 from app.models.project_members import ProjectMembers
-from app.schemas.project_members import ProjectMemberRole
-from app.schemas.tasks import TaskCreate, TaskOut, TaskList, TaskUpdate, TaskStatus, TaskStatusUpdate, TaskPriority
-from fastapi import APIRouter, Depends, HTTPException, Query, status
+from app.schemas.project import TagMatch
+from app.schemas.task_dependencies import (
+    TaskDependencyCreate, TaskDependencyOut, TaskDependencyClosure, DependencyDirection, DependencyType
+)
+from app.schemas.tasks import (
+    TaskCreate, TaskOut, TaskList, TaskUpdate, TaskStatus, TaskStatusUpdate, TaskPriority, TaskExportFormat,
+    TaskBatchCreate, TaskBatchUpdate, TaskBatchError, TaskBatchResult, TaskSearchList, TaskStats
+)
+from fastapi import APIRouter, Depends, HTTPException, Query, Request, Response, status
+from fastapi.responses import JSONResponse, StreamingResponse
 from typing import List, Optional
+import csv
 import datetime
+import enum
+import io
+import json
 
 router = APIRouter(prefix="/projects/{project_id}/tasks", tags=["Tasks"])
+search_router = APIRouter(prefix="/tasks", tags=["Tasks"])
+
+
+def _tasks_changed(db: AsyncSession, project_id: int):
+    """Invalidate the project's task list ETags once the transaction commits"""
+    bump_after_commit(db, TASKS_COLLECTION.format(project_id=project_id))
 
 
 @router.post("", response_model=TaskOut, status_code=status.HTTP_201_CREATED)
@@ -18,19 +50,21 @@ async def create_task(
     project_id: int,
     task_data: TaskCreate,
     current_user: User = Depends(RoleChecker("task:create", "project_id")),
-    db: Session = Depends(get_db)
+    db: AsyncSession = Depends(get_db)
 ):
     """Create a new task in project (admin or leader) - POST /projects/{project_id}/tasks"""
-    membership = db.query(ProjectMembers).filter(
+    result = await db.execute(select(ProjectMembers).where(
         ProjectMembers.project_id == project_id,
         ProjectMembers.id == task_data.assigned_to_user
-    ).first()
+    ))
+    membership = result.scalars().first()
 
     if not membership:
-        membership = db.query(ProjectMembers).filter(
+        result = await db.execute(select(ProjectMembers).where(
             ProjectMembers.project_id == project_id,
             ProjectMembers.user_id == task_data.assigned_to_user
-        ).first()
+        ))
+        membership = result.scalars().first()
 
     if not membership:
         raise HTTPException(
@@ -52,86 +86,594 @@ async def create_task(
         attachments=task_data.attachments
     )
     db.add(new_task)
-    db.flush()
-    db.refresh(new_task)
+    await db.flush()
+    await db.refresh(new_task)
+    _tasks_changed(db, project_id)
     
     return new_task
 
 
+TASK_OUT_COLUMNS = [Task.__table__.c[field] for field in TaskOut.model_fields]
+BATCH_UPDATE_FIELDS = [field for field in TaskUpdate.model_fields]
+BATCH_STATEMENT_SIZE = 1000
+
+
+def _chunks(items: list, size: int):
+    """Split a list into consecutive slices of at most size items"""
+    for start in range(0, len(items), size):
+        yield items[start:start + size]
+
+
+def _check_batch_size(items: list):
+    """Reject batches larger than the configured maximum"""
+    if len(items) > settings.task_batch_max_items:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail=f"A batch may contain at most {settings.task_batch_max_items} tasks"
+        )
+
+
+def _column_value(value):
+    """Store enum members by their value"""
+    return value.value if isinstance(value, enum.Enum) else value
+
+
+@router.post(":batch", response_model=TaskBatchResult, status_code=status.HTTP_201_CREATED)
+async def create_tasks_batch(
+    project_id: int,
+    batch: TaskBatchCreate,
+    current_user: User = Depends(RoleChecker("task:create", "project_id")),
+    db: AsyncSession = Depends(get_db)
+):
+    """
+    Create many tasks in project (admin or leader) - POST /projects/{project_id}/tasks:batch
+
+    Assignees are resolved with one query and valid tasks are inserted with
+    multi-row INSERT ... RETURNING statements. Tasks whose assignee cannot
+    be resolved are reported in errors by their position in the batch.
+    """
+    _check_batch_size(batch.tasks)
+
+    assignee_ids = {item.assigned_to_user for item in batch.tasks}
+    result = await db.execute(select(ProjectMembers.id, ProjectMembers.user_id).where(
+        ProjectMembers.project_id == project_id,
+        or_(ProjectMembers.id.in_(assignee_ids), ProjectMembers.user_id.in_(assignee_ids))
+    ).order_by(ProjectMembers.id))
+    memberships = result.all()
+
+    # Same precedence as create_task: membership id first, then user id
+    membership_ids = {membership.id for membership in memberships}
+    membership_by_user = {}
+    for membership in memberships:
+        membership_by_user.setdefault(membership.user_id, membership.id)
+
+    rows = []
+    errors = []
+    for index, item in enumerate(batch.tasks):
+        if item.assigned_to_user in membership_ids:
+            membership_id = item.assigned_to_user
+        else:
+            membership_id = membership_by_user.get(item.assigned_to_user)
+
+        if membership_id is None:
+            errors.append(TaskBatchError(
+                index=index,
+                detail="Project membership not found for the provided assignee"
+            ))
+            continue
+
+        rows.append({
+            "project_id": project_id,
+            "name": item.name,
+            "description": item.description,
+            "status": TaskStatus.PENDING.value,
+            "priority": _column_value(item.priority),
+            "due_date": item.due_date,
+            "assigned_to_user": membership_id,
+            "estimated_hours": item.estimated_hours,
+            "actual_hours": item.actual_hours,
+            "tags": item.tags,
+            "attachments": item.attachments,
+        })
+
+    created = []
+    for chunk in _chunks(rows, BATCH_STATEMENT_SIZE):
+        result = await db.execute(insert(Task.__table__).values(chunk).returning(*TASK_OUT_COLUMNS))
+        created.extend(result.all())
+
+    await AuditService.create_audit_logs_bulk(
+        db, Task.__tablename__, [{"record_id": row.id, "action": "INSERT"} for row in created]
+    )
+
+    _tasks_changed(db, project_id)
+
+    return {"tasks": created, "errors": errors}
+
+
+@router.patch(":batch", response_model=TaskBatchResult)
+async def update_tasks_batch(
+    project_id: int,
+    batch: TaskBatchUpdate,
+    current_user: User = Depends(RoleChecker("task:update", "project_id")),
+    db: AsyncSession = Depends(get_db)
+):
+    """
+    Update many tasks in project - PATCH /projects/{project_id}/tasks:batch
+
+    Current rows are read with one query, then changed rows are written with
+    UPDATE ... FROM (VALUES ...) RETURNING statements. Fields left out of an
+    item keep their current value, as with PUT /tasks/{task_id}.
+    """
+    _check_batch_size(batch.tasks)
+
+    task_ids = {item.id for item in batch.tasks}
+    result = await db.execute(
+        select(*TASK_OUT_COLUMNS, Task.is_deleted).where(Task.id.in_(task_ids), Task.project_id == project_id)
+    )
+    existing = {row.id: row for row in result.all()}
+
+    changed_rows = []
+    audit_entries = []
+    unchanged = []
+    resolved_blockers = []
+    reopened_blockers = []
+    seen = set()
+    errors = []
+    for index, item in enumerate(batch.tasks):
+        if item.id not in existing:
+            errors.append(TaskBatchError(index=index, detail="Task not found"))
+            continue
+        if item.id in seen:
+            errors.append(TaskBatchError(index=index, detail="Task appears more than once in the batch"))
+            continue
+        seen.add(item.id)
+
+        current = existing[item.id]
+        changes = {}
+        for field in BATCH_UPDATE_FIELDS:
+            value = _column_value(getattr(item, field))
+            if value is not None and value != getattr(current, field):
+                changes[field] = value
+
+        if not changes:
+            unchanged.append(current)
+            continue
+
+        changed_rows.append({"id": item.id, **{field: changes.get(field) for field in BATCH_UPDATE_FIELDS}})
+        if "status" in changes:
+            was_open = TaskGraphService.is_open_blocker(current.status, current.is_deleted)
+            if was_open != TaskGraphService.is_open_blocker(changes["status"], current.is_deleted):
+                (reopened_blockers if not was_open else resolved_blockers).append(item.id)
+        audit_entries.extend(
+            {
+                "record_id": item.id,
+                "action": "UPDATE",
+                "field_name": field,
+                "old_value": AuditService.serialize_value(getattr(current, field)),
+                "new_value": AuditService.serialize_value(value),
+            }
+            for field, value in changes.items()
+        )
+
+    tasks_table = Task.__table__
+    updated = []
+    for chunk in _chunks(changed_rows, BATCH_STATEMENT_SIZE):
+        batch_values = values(
+            column("id", Integer),
+            *[column(field, tasks_table.c[field].type) for field in BATCH_UPDATE_FIELDS],
+            name="batch_values"
+        ).data([tuple(row[key] for key in ["id", *BATCH_UPDATE_FIELDS]) for row in chunk])
+
+        stmt = (
+            update(tasks_table)
+            .where(tasks_table.c.id == batch_values.c.id, tasks_table.c.project_id == project_id)
+            .values({
+                field: func.coalesce(cast(batch_values.c[field], tasks_table.c[field].type), tasks_table.c[field])
+                for field in BATCH_UPDATE_FIELDS
+            })
+            .returning(*TASK_OUT_COLUMNS)
+        )
+        result = await db.execute(stmt)
+        updated.extend(result.all())
+
+    await TaskGraphService.shift_blocker_counts(db, resolved_blockers, -1)
+    await TaskGraphService.shift_blocker_counts(db, reopened_blockers, 1)
+
+    await AuditService.create_audit_logs_bulk(db, Task.__tablename__, audit_entries)
+    if changed_rows:
+        _tasks_changed(db, project_id)
+
+    return {"tasks": updated + unchanged, "errors": errors}
+
+
+def _parse_due_date(value: Optional[str], param_name: str) -> Optional[datetime.datetime]:
+    """Parse an ISO date query parameter, raising 400 on bad input"""
+    if value is None:
+        return None
+    try:
+        return datetime.datetime.fromisoformat(value)
+    except ValueError:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail=f"Invalid date format for {param_name}. Use YYYY-MM-DD"
+        )
+
+
+def _filter_tasks(
+    query,
+    project_id: int,
+    status_filter: Optional[TaskStatus] = None,
+    priority: Optional[TaskPriority] = None,
+    assigned_to: Optional[int] = None,
+    due_before: Optional[str] = None,
+    due_after: Optional[str] = None,
+    tags: Optional[List[str]] = None,
+    tag_match: TagMatch = TagMatch.ANY,
+    blocked: Optional[bool] = None
+):
+    """Apply the list_tasks filters to a select over Task"""
+    due_before_dt = _parse_due_date(due_before, "due_before")
+    due_after_dt = _parse_due_date(due_after, "due_after")
+
+    query = query.filter(
+        Task.project_id == project_id,
+        Task.is_deleted == False
+    )
+
+    if status_filter is not None:
+        query = query.filter(Task.status == status_filter.value)
+    if priority is not None:
+        query = query.filter(Task.priority == priority.value)
+    if assigned_to is not None:
+        query = query.filter(Task.assigned_to_user == assigned_to)
+    if due_before_dt is not None:
+        query = query.filter(Task.due_date < due_before_dt)
+    if due_after_dt is not None:
+        query = query.filter(Task.due_date > due_after_dt)
+    if blocked is not None:
+        query = query.filter(Task.is_blocked == blocked)
+
+    tags = normalize_tags(tags)
+    if tags:
+        query = query.filter(tag_filter(Task.tag_list, tags, tag_match))
+
+    return query
+
+
 @router.get("", response_model=TaskList)
 async def list_tasks(
     project_id: int,
+    request: Request,
+    response: Response,
     status_filter: Optional[TaskStatus] = Query(None, alias="status"),
     priority: Optional[TaskPriority] = Query(None),
     assigned_to: Optional[int] = Query(None),
     due_before: Optional[str] = Query(None),
     due_after: Optional[str] = Query(None),
-    limit: Optional[int] = Query(None),
-    offset: Optional[int] = Query(None),
+    tag: Optional[List[str]] = Query(None),
+    tag_match: TagMatch = Query(TagMatch.ANY),
+    blocked: Optional[bool] = Query(None),
+    limit: Optional[int] = Query(None, ge=1),
+    cursor: Optional[str] = Query(None),
+    offset: Optional[int] = Query(None, ge=0, deprecated=True),
+    fields: Optional[str] = Query(None, description="Comma-separated TaskOut fields to return"),
     current_user: User = Depends(RoleChecker("task:view", "project_id")),
-    db: Session = Depends(get_db)
+    db: AsyncSession = Depends(get_db)
+):
+    """
+    List tasks in project with filters - GET /projects/{project_id}/tasks
+
+    Results are ordered by (created_at, id) and paginated with an opaque
+    cursor: pass the returned next_cursor to fetch the following page.
+    The ETag combines the project's task collection version with the query
+    string, so If-None-Match is answered without touching the tasks table.
+    With fields=, only the requested columns are selected and returned.
+    """
+    if cursor is not None and offset is not None:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail="Use either cursor or offset, not both"
+        )
+    selected = parse_fields(fields, TaskOut)
+
+    tasks_key = TASKS_COLLECTION.format(project_id=project_id)
+    await pin_if_recently_written(db, tasks_key)
+    version = await collection_version(tasks_key)
+    etag = make_etag("tasks", project_id, version, request.url.query)
+    if etag_matches(request, etag):
+        return not_modified(etag)
+    response.headers["ETag"] = etag
+
+    page_size = min(limit or settings.task_page_size_default, settings.task_page_size_max)
+
+    if selected is None:
+        query = select(Task)
+    else:
+        # created_at is the cursor key, so it is selected even if not returned
+        query = select(Task.created_at, *[Task.__table__.c[field] for field in selected])
+    query = _filter_tasks(
+        query, project_id, status_filter, priority, assigned_to, due_before, due_after, tag, tag_match, blocked
+    )
+
+    if cursor is not None:
+        last_created_at, last_id = decode_cursor(cursor, (datetime.datetime, int))
+        query = query.filter(tuple_(Task.created_at, Task.id) > tuple_(last_created_at, last_id))
+
+    query = query.order_by(Task.created_at, Task.id)
+    if offset is not None:
+        query = query.offset(offset)
+
+    # Fetch one extra row to learn whether another page exists
+    result = await db.execute(query.limit(page_size + 1))
+    tasks = result.scalars().all() if selected is None else result.all()
+    next_cursor = None
+    if len(tasks) > page_size:
+        tasks = tasks[:page_size]
+        next_cursor = encode_cursor(tasks[-1].created_at, tasks[-1].id)
+
+    if selected is not None:
+        return JSONResponse(
+            {"tasks": [pick_fields(row._mapping, selected) for row in tasks], "next_cursor": next_cursor},
+            headers={"ETag": etag}
+        )
+
+    return {"tasks": tasks, "next_cursor": next_cursor}
+
+
+EXPORT_BATCH_SIZE = 1000
+EXPORT_MEDIA_TYPES = {
+    TaskExportFormat.NDJSON: "application/x-ndjson",
+    TaskExportFormat.CSV: "text/csv",
+}
+
+
+def _export_value(value):
+    """Convert a column value to its JSON/CSV representation"""
+    if isinstance(value, datetime.datetime):
+        return value.isoformat()
+    return value
+
+
+async def _stream_task_export(query, export_format: TaskExportFormat, replica=None):
+    """
+    Yield the export body in batches of EXPORT_BATCH_SIZE rows.
+
+    TransactionMiddleware settles the request's transaction as soon as the
+    response starts, so the rows are streamed through a dedicated session
+    using a server-side cursor, on the replica the request was routed to.
+    """
+    columns = list(TaskOut.model_fields)
+    async with AsyncSessionLocal(info={'replica': replica}) as db:
+        rows = await db.stream(query.execution_options(yield_per=EXPORT_BATCH_SIZE))
+        buffer = io.StringIO()
+        writer = csv.writer(buffer)
+
+        if export_format == TaskExportFormat.CSV:
+            writer.writerow(columns)
+
+        async for partition in rows.partitions():
+            for row in partition:
+                values = [_export_value(value) for value in row]
+                if export_format == TaskExportFormat.CSV:
+                    writer.writerow(values)
+                else:
+                    buffer.write(json.dumps(dict(zip(columns, values))))
+                    buffer.write("\n")
+
+            yield buffer.getvalue()
+            buffer.seek(0)
+            buffer.truncate()
+
+        yield buffer.getvalue()
+
+
+@router.get("/export")
+async def export_tasks(
+    project_id: int,
+    export_format: TaskExportFormat = Query(TaskExportFormat.NDJSON, alias="format"),
+    status_filter: Optional[TaskStatus] = Query(None, alias="status"),
+    priority: Optional[TaskPriority] = Query(None),
+    assigned_to: Optional[int] = Query(None),
+    due_before: Optional[str] = Query(None),
+    due_after: Optional[str] = Query(None),
+    tag: Optional[List[str]] = Query(None),
+    tag_match: TagMatch = Query(TagMatch.ANY),
+    blocked: Optional[bool] = Query(None),
+    db: AsyncSession = Depends(get_db),
+    current_user: User = Depends(RoleChecker("task:view", "project_id"))
 ):
-    """List all tasks in project with filters - GET /projects/{project_id}/tasks"""
-    query = db.query(Task).filter(
+    """Stream all matching tasks as NDJSON or CSV - GET /projects/{project_id}/tasks/export"""
+    query = _filter_tasks(
+        select(*TASK_OUT_COLUMNS), project_id, status_filter, priority, assigned_to, due_before, due_after,
+        tag, tag_match, blocked
+    ).order_by(Task.created_at, Task.id)
+
+    filename = f"project-{project_id}-tasks.{export_format.value}"
+    return StreamingResponse(
+        _stream_task_export(query, export_format, db.info.get('replica')),
+        media_type=EXPORT_MEDIA_TYPES[export_format],
+        headers={"Content-Disposition": f'attachment; filename="{filename}"'}
+    )
+
+
+# Overdue counts move with the clock, so cached stats are refreshed after a
+# minute even though any task mutation already moves them to a new key; a
+# stale copy is served for at most another minute while one caller refreshes
+TASK_STATS_TTL = 60
+TASK_STATS_HARD_TTL = 120
+# Cache tag of values computed from a project's tasks; its version is TASKS_COLLECTION
+TASKS_TAG = "project:{project_id}:tasks"
+
+
+async def _task_stats(db: AsyncSession, project_id: int) -> dict:
+    """Compute the project's task statistics with one FILTER aggregate"""
+    def count_where(*conditions):
+        return func.count().filter(*conditions)
+
+    aggregates = {
+        "total": func.count(),
+        **{f"status:{s.value}": count_where(Task.status == s.value) for s in TaskStatus},
+        **{f"priority:{p.value}": count_where(Task.priority == p.value) for p in TaskPriority},
+        "overdue": count_where(
+            Task.due_date < datetime.datetime.utcnow(),
+            Task.status != TaskStatus.COMPLETED.value
+        ),
+        "blocked": count_where(Task.is_blocked == True),
+        "estimated_hours": func.coalesce(func.sum(Task.estimated_hours), 0),
+        "actual_hours": func.coalesce(func.sum(Task.actual_hours), 0),
+    }
+    result = await db.execute(select(*[value.label(key) for key, value in aggregates.items()]).where(
         Task.project_id == project_id,
         Task.is_deleted == False
+    ))
+    row = result.one()._mapping
+
+    return {
+        "total": row["total"],
+        "by_status": {s.value: row[f"status:{s.value}"] for s in TaskStatus},
+        "by_priority": {p.value: row[f"priority:{p.value}"] for p in TaskPriority},
+        "overdue": row["overdue"],
+        "blocked": row["blocked"],
+        "estimated_hours": row["estimated_hours"],
+        "actual_hours": row["actual_hours"],
+    }
+
+
+@router.get("/stats", response_model=TaskStats)
+async def get_task_stats(
+    project_id: int,
+    current_user: User = Depends(RoleChecker("task:view", "project_id")),
+    db: AsyncSession = Depends(get_db)
+):
+    """
+    Task counts by status and priority, overdue and blocked counts and hour
+    totals for a project - GET /projects/{project_id}/tasks/stats
+
+    Results are cached tagged with the project's tasks, whose version every
+    task mutation bumps after commit, so a change is never served stale.
+    """
+    await pin_if_recently_written(db, TASKS_COLLECTION.format(project_id=project_id))
+    return await cached(
+        f"project:{project_id}:tasks:stats", [TASKS_TAG.format(project_id=project_id)], TASK_STATS_HARD_TTL,
+        lambda: _task_stats(db, project_id), TASK_STATS_TTL
     )
 
-    if status_filter is not None:
-        query = query.filter(Task.status == status_filter.value)
-    if priority is not None:
-        query = query.filter(Task.priority == priority.value)
-    if assigned_to is not None:
-        query = query.filter(Task.assigned_to_user == assigned_to)
 
-    if due_before is not None:
-        try:
-            due_before_dt = datetime.datetime.fromisoformat(due_before)
-            query = query.filter(Task.due_date < due_before_dt)
-        except ValueError:
-            raise HTTPException(
-                status_code=status.HTTP_400_BAD_REQUEST,
-                detail="Invalid date format for due_before. Use YYYY-MM-DD"
-            )
+async def _search_tasks(db: AsyncSession, q: str, scope, limit: Optional[int], cursor: Optional[str]) -> dict:
+    """
+    Run a ranked full-text search over task names and descriptions.
+
+    Matches come from the GIN index on Task.search_vector and are ordered by
+    (rank, id) descending; the cursor carries the last pair so later pages
+    are found with a row comparison instead of an OFFSET.
+    """
+    page_size = min(limit or settings.task_page_size_default, settings.task_page_size_max)
+    tsquery = func.websearch_to_tsquery(cast(SEARCH_CONFIG, REGCONFIG), q)
+    rank = func.ts_rank(Task.search_vector, tsquery)
+
+    query = select(*TASK_OUT_COLUMNS, rank.label("rank")).where(
+        scope,
+        Task.is_deleted == False,
+        Task.search_vector.op("@@")(tsquery)
+    )
+
+    if cursor is not None:
+        last_rank, last_id = decode_cursor(cursor, (float, int))
+        query = query.where(tuple_(rank, Task.id) < tuple_(last_rank, last_id))
+
+    result = await db.execute(query.order_by(rank.desc(), Task.id.desc()).limit(page_size + 1))
+    hits = result.all()
+    next_cursor = None
+    if len(hits) > page_size:
+        hits = hits[:page_size]
+        next_cursor = encode_cursor(hits[-1].rank, hits[-1].id)
 
-    if due_after is not None:
-        try:
-            due_after_dt = datetime.datetime.fromisoformat(due_after)
-            query = query.filter(Task.due_date > due_after_dt)
-        except ValueError:
-            raise HTTPException(
-                status_code=status.HTTP_400_BAD_REQUEST,
-                detail="Invalid date format for due_after. Use YYYY-MM-DD"
+    return {"tasks": hits, "next_cursor": next_cursor}
+
+
+@router.get("/search", response_model=TaskSearchList)
+async def search_project_tasks(
+    project_id: int,
+    q: str = Query(..., min_length=1, max_length=200),
+    limit: Optional[int] = Query(None, ge=1),
+    cursor: Optional[str] = Query(None),
+    current_user: User = Depends(RoleChecker("task:view", "project_id")),
+    db: AsyncSession = Depends(get_db)
+):
+    """Full-text search over a project's tasks - GET /projects/{project_id}/tasks/search"""
+    return await _search_tasks(db, q, Task.project_id == project_id, limit, cursor)
+
+
+@search_router.get("/search", response_model=TaskSearchList)
+async def search_tasks(
+    q: str = Query(..., min_length=1, max_length=200),
+    limit: Optional[int] = Query(None, ge=1),
+    cursor: Optional[str] = Query(None),
+    current_user: User = Depends(get_current_active_user),
+    db: AsyncSession = Depends(get_db)
+):
+    """Full-text search across every project the caller belongs to - GET /tasks/search"""
+    if PolicyEngine.is_admin(current_user):
+        scope = true()
+    else:
+        scope = Task.project_id.in_(
+            select(ProjectMembers.project_id).where(
+                ProjectMembers.user_id == current_user.id,
+                ProjectMembers.is_deleted == False
             )
+        )
+    return await _search_tasks(db, q, scope, limit, cursor)
 
-    if limit is not None:
-        query = query.limit(limit)
-    if offset is not None:
-        query = query.offset(offset)
 
-    tasks = query.all()
-    return {"tasks": tasks}
+async def _sync_blocked_dependents(db: AsyncSession, db_task: Task, was_open_blocker: bool):
+    """Update the blocker counts of tasks blocked by db_task if it opened or resolved"""
+    is_open_blocker = TaskGraphService.is_open_blocker(db_task.status, db_task.is_deleted)
+    if is_open_blocker != was_open_blocker:
+        await TaskGraphService.shift_blocker_counts(db, [db_task.id], 1 if is_open_blocker else -1)
 
 
 @router.get("/{task_id}", response_model=TaskOut)
 async def get_task(
     project_id: int,
     task_id: int,
+    request: Request,
+    response: Response,
+    fields: Optional[str] = Query(None, description="Comma-separated TaskOut fields to return"),
     current_user: User = Depends(RoleChecker("task:view", "project_id")),
-    db: Session = Depends(get_db)
+    db: AsyncSession = Depends(get_db)
 ):
-    """Get single task by ID - GET /projects/{project_id}/tasks/{task_id}"""
-    db_task = db.query(Task).filter(
+    """
+    Get single task by ID - GET /projects/{project_id}/tasks/{task_id}
+
+    The ETag comes from the row timestamps, which are read on their own so
+    an unchanged task is answered with 304 without loading the row.
+    With fields=, only the requested columns are selected and returned.
+    """
+    selected = parse_fields(fields, TaskOut)
+    result = await db.execute(select(Task.created_at, Task.updated_at).where(
         Task.id == task_id,
         Task.project_id == project_id
-    ).first()
+    ))
+    version = result.first()
     
-    if not db_task:
+    if not version:
         raise HTTPException(
             status_code=status.HTTP_404_NOT_FOUND,
             detail="Task not found"
         )
     
+    etag = make_etag("task", task_id, version.created_at, version.updated_at, selected)
+    if etag_matches(request, etag):
+        return not_modified(etag)
+    
+    if selected is not None:
+        result = await db.execute(select(*[Task.__table__.c[field] for field in selected]).where(Task.id == task_id))
+        row = result.first()
+        return JSONResponse(pick_fields(row._mapping, selected), headers={"ETag": etag})
+    
+    db_task = await db.get(Task, task_id)
+    response.headers["ETag"] = etag
+    
     return db_task
 
 
@@ -141,13 +683,14 @@ async def update_task(
     task_id: int,
     new_task_data: TaskUpdate,
     current_user: User = Depends(RoleChecker("task:update", "project_id")),
-    db: Session = Depends(get_db)
+    db: AsyncSession = Depends(get_db)
 ):
     """Update task - PUT /projects/{project_id}/tasks/{task_id}"""
-    db_task = db.query(Task).filter(
+    result = await db.execute(select(Task).where(
         Task.id == task_id,
         Task.project_id == project_id
-    ).first()
+    ))
+    db_task = result.scalars().first()
     
     if not db_task:
         raise HTTPException(
@@ -155,12 +698,14 @@ async def update_task(
             detail="Task does not exist"
         )
     
+    was_open_blocker = TaskGraphService.is_open_blocker(db_task.status, db_task.is_deleted)
+    
     if new_task_data.name is not None:
         db_task.name = new_task_data.name
     if new_task_data.description is not None:
         db_task.description = new_task_data.description
     if new_task_data.status is not None:
-        db_task.status = new_task_data.status
+        db_task.status = new_task_data.status.value
     if new_task_data.priority is not None:
         db_task.priority = new_task_data.priority
     if new_task_data.due_date is not None:
@@ -174,8 +719,10 @@ async def update_task(
     if new_task_data.attachments is not None:
         db_task.attachments = new_task_data.attachments
     
-    db.flush()
-    db.refresh(db_task)
+    await db.flush()
+    await _sync_blocked_dependents(db, db_task, was_open_blocker)
+    await db.refresh(db_task)
+    _tasks_changed(db, project_id)
     
     return db_task
 
@@ -186,13 +733,14 @@ async def update_task_status(
     task_id: int,
     task_status: TaskStatusUpdate,
     current_user: User = Depends(get_current_active_user),
-    db: Session = Depends(get_db)
+    db: AsyncSession = Depends(get_db)
 ):
     """Update task status - PATCH /projects/{project_id}/tasks/{task_id}/status"""
-    db_task = db.query(Task).filter(
+    result = await db.execute(select(Task).where(
         Task.id == task_id,
         Task.project_id == project_id
-    ).first()
+    ))
+    db_task = result.scalars().first()
     
     if not db_task:
         raise HTTPException(
@@ -201,9 +749,7 @@ async def update_task_status(
         )
     
     # Verify user is assigned to this task
-    membership = db.query(ProjectMembers).filter(
-        ProjectMembers.id == db_task.assigned_to_user
-    ).first()
+    membership = await db.get(ProjectMembers, db_task.assigned_to_user) if db_task.assigned_to_user else None
     
     if not membership or membership.user_id != current_user.id:
         raise HTTPException(
@@ -211,9 +757,12 @@ async def update_task_status(
             detail="You are not permitted to modify this task's status"
         )
     
+    was_open_blocker = TaskGraphService.is_open_blocker(db_task.status, db_task.is_deleted)
     db_task.status = task_status.status.value
-    db.flush()
-    db.refresh(db_task)
+    await db.flush()
+    await _sync_blocked_dependents(db, db_task, was_open_blocker)
+    await db.refresh(db_task)
+    _tasks_changed(db, project_id)
     
     return db_task
 
@@ -223,14 +772,15 @@ async def delete_task(
     project_id: int,
     task_id: int,
     current_user: User = Depends(RoleChecker("task:delete", "project_id")),
-    db: Session = Depends(get_db)
+    db: AsyncSession = Depends(get_db)
 ):
     """Soft delete task (admin or leader) - DELETE /projects/{project_id}/tasks/{task_id}"""
-    db_task = db.query(Task).filter(
+    result = await db.execute(select(Task).where(
         Task.project_id == project_id,
         Task.id == task_id,
         Task.is_deleted == False
-    ).first()
+    ))
+    db_task = result.scalars().first()
     
     if not db_task:
         raise HTTPException(
@@ -238,9 +788,160 @@ async def delete_task(
             detail="Task not found"
         )
     
+    was_open_blocker = TaskGraphService.is_open_blocker(db_task.status, db_task.is_deleted)
     db_task.is_deleted = True
     db_task.deleted_at = datetime.datetime.utcnow()
     db_task.deleted_by = current_user.id
-    db.flush()
+    await db.flush()
+    await _sync_blocked_dependents(db, db_task, was_open_blocker)
+    _tasks_changed(db, project_id)
     
     return None
+
+
+async def _get_project_task(db: AsyncSession, project_id: int, task_id: int, lock: bool = False) -> Task:
+    """Load a non-deleted task of the project or raise 404, optionally locking its row"""
+    query = select(Task).where(
+        Task.id == task_id,
+        Task.project_id == project_id,
+        Task.is_deleted == False
+    )
+    if lock:
+        query = query.with_for_update().execution_options(populate_existing=True)
+    result = await db.execute(query)
+    db_task = result.scalars().first()
+
+    if not db_task:
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail=f"Task {task_id} not found"
+        )
+
+    return db_task
+
+
+@router.post("/{task_id}/dependencies", response_model=TaskDependencyOut, status_code=status.HTTP_201_CREATED)
+async def add_task_dependency(
+    project_id: int,
+    task_id: int,
+    dependency_data: TaskDependencyCreate,
+    current_user: User = Depends(RoleChecker("task:update", "project_id")),
+    db: AsyncSession = Depends(get_db)
+):
+    """Make task depend on another task - POST /projects/{project_id}/tasks/{task_id}/dependencies"""
+    if dependency_data.depends_on_task_id == task_id:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail="A task cannot depend on itself"
+        )
+
+    await _get_project_task(db, project_id, task_id)
+    await TaskGraphService.lock_project_graph(db, project_id)
+    # The row lock holds off status changes of the blocker until commit
+    blocker = await _get_project_task(db, project_id, dependency_data.depends_on_task_id, lock=True)
+
+    result = await db.execute(select(TaskDependency.id).where(
+        TaskDependency.task_id == task_id,
+        TaskDependency.depends_on_task_id == dependency_data.depends_on_task_id
+    ))
+    existing = result.first()
+
+    if existing:
+        raise HTTPException(
+            status_code=status.HTTP_409_CONFLICT,
+            detail="Dependency already exists"
+        )
+
+    if await TaskGraphService.would_create_cycle(db, task_id, dependency_data.depends_on_task_id):
+        raise HTTPException(
+            status_code=status.HTTP_409_CONFLICT,
+            detail="Dependency would create a cycle"
+        )
+
+    new_dependency = TaskDependency(
+        task_id=task_id,
+        depends_on_task_id=dependency_data.depends_on_task_id,
+        dependency_type=dependency_data.dependency_type.value
+    )
+    db.add(new_dependency)
+    await db.flush()
+    if (
+        dependency_data.dependency_type == DependencyType.BLOCKS
+        and TaskGraphService.is_open_blocker(blocker.status, blocker.is_deleted)
+    ):
+        await TaskGraphService.adjust_blocker_count(db, task_id, 1)
+        _tasks_changed(db, project_id)
+    await db.refresh(new_dependency)
+
+    return new_dependency
+
+
+@router.delete("/{task_id}/dependencies/{depends_on_task_id}", status_code=status.HTTP_204_NO_CONTENT)
+async def remove_task_dependency(
+    project_id: int,
+    task_id: int,
+    depends_on_task_id: int,
+    current_user: User = Depends(RoleChecker("task:update", "project_id")),
+    db: AsyncSession = Depends(get_db)
+):
+    """Remove a dependency - DELETE /projects/{project_id}/tasks/{task_id}/dependencies/{depends_on_task_id}"""
+    await _get_project_task(db, project_id, task_id)
+
+    await TaskGraphService.lock_project_graph(db, project_id)
+
+    result = await db.execute(select(TaskDependency).where(
+        TaskDependency.task_id == task_id,
+        TaskDependency.depends_on_task_id == depends_on_task_id
+    ))
+    dependency = result.scalars().first()
+
+    if not dependency:
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail="Dependency not found"
+        )
+
+    result = await db.execute(
+        select(Task).where(Task.id == depends_on_task_id)
+        .with_for_update()
+        .execution_options(populate_existing=True)
+    )
+    blocker = result.scalars().first()
+
+    await db.delete(dependency)
+    await db.flush()
+    if (
+        dependency.dependency_type == DependencyType.BLOCKS.value
+        and TaskGraphService.is_open_blocker(blocker.status, blocker.is_deleted)
+    ):
+        await TaskGraphService.adjust_blocker_count(db, task_id, -1)
+        _tasks_changed(db, project_id)
+
+    return None
+
+
+@router.get("/{task_id}/dependencies", response_model=TaskDependencyClosure)
+async def get_task_dependency_closure(
+    project_id: int,
+    task_id: int,
+    direction: DependencyDirection = Query(DependencyDirection.UPSTREAM),
+    dependency_type: Optional[DependencyType] = Query(None),
+    current_user: User = Depends(RoleChecker("task:view", "project_id")),
+    db: AsyncSession = Depends(get_db)
+):
+    """
+    Get every task the task transitively depends on (upstream) or that
+    transitively depends on it (downstream) - GET /projects/{project_id}/tasks/{task_id}/dependencies
+    """
+    await _get_project_task(db, project_id, task_id)
+
+    reachable = TaskGraphService.closure(
+        task_id, direction, dependency_type.value if dependency_type is not None else None
+    )
+    result = await db.execute(select(Task).where(
+        Task.id.in_(select(reachable.c.task_id)),
+        Task.is_deleted == False
+    ).order_by(Task.id))
+    tasks = result.scalars().all()
+
+    return {"task_id": task_id, "direction": direction, "tasks": tasks}
@@ -1,20 +1,35 @@
-from fastapi import APIRouter, HTTPException, Depends, status, File, UploadFile
+from fastapi import APIRouter, HTTPException, Depends, Request, status, File, UploadFile
 from fastapi.security import OAuth2PasswordRequestForm
 from app.models.user import User 
-from app.schemas.user import UserCreate, UserOut, UserUpdate, Token
+from app.models.project_members import ProjectMembers
+from app.schemas.user import UserCreate, UserOut, UserUpdate, Token, TokenRefresh, RefreshedToken
 from app.utils.auth import (
-    hash_password, 
+    hash_password_async,
     create_access_token, 
     create_refresh_token,
-    authenticate_user
+    authenticate_user,
+    decode_token,
+    get_current_user_record,
+    load_auth_user
 )
-from app.utils.dependencies import get_db, get_current_active_user
+from app.utils.dependencies import get_db
 from app.utils.permissions import RoleChecker
-from sqlalchemy.orm import Session
+from app.utils.role_cache import invalidate_role_after_commit
+from app.utils.user_cache import invalidate_user_after_commit
+from app.utils.refresh_tokens import (
+    consume_refresh_token,
+    refresh_family_revoked,
+    register_refresh_family,
+    revoke_user_refresh_families_after_commit
+)
+from app.utils.rate_limit import check_login_rate
+from sqlalchemy import select
+from sqlalchemy.ext.asyncio import AsyncSession
 from typing import List
 from app.utils.storage import StorageService
 from app.config import settings
 import datetime as dt
+import uuid
 
 router = APIRouter(prefix="/users", tags=["Users"])
 
@@ -24,11 +39,13 @@ storage = StorageService()
 
 @router.post("/login", response_model=Token)
 async def login(
+    request: Request,
     form_data: OAuth2PasswordRequestForm = Depends(),
-    db: Session = Depends(get_db)
+    db: AsyncSession = Depends(get_db)
 ):
     """OAuth2 compatible token login"""
-    user = authenticate_user(db, form_data.username, form_data.password)
+    await check_login_rate(request, form_data.username)
+    user = await authenticate_user(db, form_data.username, form_data.password)
     
     if not user:
         raise HTTPException(
@@ -40,7 +57,9 @@ async def login(
     user.last_login = dt.datetime.utcnow()
     
     access_token = create_access_token(data={"sub": str(user.id)})
-    refresh_token = create_refresh_token(data={"sub": str(user.id)})
+    family = uuid.uuid4().hex
+    refresh_token = create_refresh_token(data={"sub": str(user.id)}, family=family)
+    await register_refresh_family(user.id, family)
     
     return {
         "access_token": access_token,
@@ -55,14 +74,66 @@ async def login(
     }
 
 
+@router.post("/token/refresh", response_model=RefreshedToken)
+async def refresh_access_token(body: TokenRefresh, request: Request):
+    """
+    Exchange a refresh token for a new access token - POST /users/token/refresh
+
+    Lets clients renew expired access tokens without another password
+    login. With rotation enabled, the response carries a new refresh token
+    and the old one is spent: presenting it again revokes every token of
+    that login.
+    """
+    invalid_token = HTTPException(
+        status_code=status.HTTP_401_UNAUTHORIZED,
+        detail="Invalid refresh token",
+        headers={"WWW-Authenticate": "Bearer"}
+    )
+
+    claims = decode_token(body.refresh_token)
+    if claims.get("type") != "refresh" or not claims.get("jti") or not claims.get("fam"):
+        raise invalid_token
+    try:
+        user_id = int(claims["sub"])
+    except (TypeError, KeyError, ValueError):
+        raise invalid_token
+
+    user = await load_auth_user(request, user_id)
+    if user is None:
+        raise invalid_token
+
+    refresh_token = body.refresh_token
+    if settings.refresh_token_rotation:
+        if not await consume_refresh_token(claims):
+            raise HTTPException(
+                status_code=status.HTTP_401_UNAUTHORIZED,
+                detail="Refresh token has been revoked",
+                headers={"WWW-Authenticate": "Bearer"}
+            )
+        refresh_token = create_refresh_token(data={"sub": str(user_id)}, family=claims["fam"])
+    elif await refresh_family_revoked(claims["fam"]):
+        raise HTTPException(
+            status_code=status.HTTP_401_UNAUTHORIZED,
+            detail="Refresh token has been revoked",
+            headers={"WWW-Authenticate": "Bearer"}
+        )
+
+    return {
+        "access_token": create_access_token(data={"sub": str(user_id)}),
+        "refresh_token": refresh_token,
+        "token_type": "bearer"
+    }
+
+
 @router.post("", response_model=UserOut, status_code=status.HTTP_201_CREATED)
 async def create_user(
     user_data: UserCreate, 
     current_user: User = Depends(RoleChecker("user:create")),
-    db: Session = Depends(get_db)
+    db: AsyncSession = Depends(get_db)
 ):
     """Create a new user (admin only) - POST /users"""
-    db_user = db.query(User).filter(User.email == user_data.email).first()
+    result = await db.execute(select(User).where(User.email == user_data.email))
+    db_user = result.scalars().first()
     
     if db_user:
         raise HTTPException(
@@ -70,7 +141,7 @@ async def create_user(
             detail="Email already registered"
         )
     
-    hashed_password = hash_password(user_data.password)
+    hashed_password = await hash_password_async(user_data.password)
     profile_picture = user_data.profile_picture or settings.default_avatar_url
     
     new_user = User(
@@ -82,14 +153,14 @@ async def create_user(
         timezone=user_data.timezone or "UTC"
     )
     db.add(new_user)
-    db.flush()
-    db.refresh(new_user)
+    await db.flush()
+    await db.refresh(new_user)
     return new_user
 
 
 @router.get("/me", response_model=UserOut)
 async def get_current_user_profile(
-    current_user: User = Depends(get_current_active_user)
+    current_user: User = Depends(get_current_user_record)
 ):
     """Get current user profile - GET /users/me"""
     return current_user
@@ -98,10 +169,11 @@ async def get_current_user_profile(
 @router.get("", response_model=List[UserOut])
 async def list_users(
     current_user: User = Depends(RoleChecker("user:list")),
-    db: Session = Depends(get_db)
+    db: AsyncSession = Depends(get_db)
 ):
     """Get all users (admin only) - GET /users"""
-    all_users = db.query(User).filter(User.is_deleted == False).all()
+    result = await db.execute(select(User).where(User.is_deleted == False))
+    all_users = result.scalars().all()
     return all_users
 
 
@@ -109,10 +181,10 @@ async def list_users(
 async def get_user(
     user_id: int,
     current_user: User = Depends(RoleChecker("user:list")),
-    db: Session = Depends(get_db)
+    db: AsyncSession = Depends(get_db)
 ):
     """Get specific user by ID (admin only) - GET /users/{user_id}"""
-    db_user = db.query(User).filter(User.id == user_id).first()
+    db_user = await db.get(User, user_id)
     
     if not db_user:
         raise HTTPException(
@@ -127,11 +199,15 @@ async def get_user(
 async def update_user(
     user_id: int, 
     user_data: UserUpdate,
-    db: Session = Depends(get_db),
+    db: AsyncSession = Depends(get_db),
     current_user: User = Depends(RoleChecker("user:update"))
 ):
-    """Update user (admin only) - PUT /users/{user_id}"""
-    db_user = db.query(User).filter(User.id == user_id).first()
+    """
+    Update user (admin only) - PUT /users/{user_id}
+
+    A new password revokes the refresh tokens of every earlier login.
+    """
+    db_user = await db.get(User, user_id)
     
     if not db_user:
         raise HTTPException(
@@ -144,7 +220,8 @@ async def update_user(
     if user_data.email:
         db_user.email = user_data.email
     if user_data.password:
-        db_user.hashed_password = hash_password(user_data.password)
+        db_user.hashed_password = await hash_password_async(user_data.password)
+        revoke_user_refresh_families_after_commit(db, user_id)
     if user_data.profile_picture is not None:
         db_user.profile_picture = user_data.profile_picture
     if user_data.bio is not None:
@@ -152,8 +229,9 @@ async def update_user(
     if user_data.timezone is not None:
         db_user.timezone = user_data.timezone
 
-    db.flush()
-    db.refresh(db_user)
+    await db.flush()
+    await db.refresh(db_user)
+    invalidate_user_after_commit(db, user_id)
     return db_user
 
 
@@ -161,10 +239,11 @@ async def update_user(
 async def delete_user(
     user_id: int, 
     current_user: User = Depends(RoleChecker("user:delete")),
-    db: Session = Depends(get_db)
+    db: AsyncSession = Depends(get_db)
 ):
     """Soft delete user (admin only) - DELETE /users/{user_id}"""
-    db_user = db.query(User).filter(User.id == user_id, User.is_deleted == False).first()
+    result = await db.execute(select(User).where(User.id == user_id, User.is_deleted == False))
+    db_user = result.scalars().first()
     
     if not db_user:
         raise HTTPException(
@@ -175,7 +254,13 @@ async def delete_user(
     db_user.is_deleted = True
     db_user.deleted_at = dt.datetime.utcnow()
     db_user.deleted_by = current_user.id
-    db.flush()
+    await db.flush()
+    invalidate_user_after_commit(db, user_id)
+    
+    # A deleted user keeps no cached project roles
+    result = await db.execute(select(ProjectMembers.project_id).where(ProjectMembers.user_id == user_id).distinct())
+    for project_id in result.scalars():
+        invalidate_role_after_commit(db, user_id, project_id)
     
     return None
 
@@ -183,8 +268,8 @@ async def delete_user(
 @router.patch("/me/profile-picture", response_model=UserOut)
 async def update_current_user_profile_picture(
     file: UploadFile = File(...),
-    db: Session = Depends(get_db), 
-    current_user: User = Depends(get_current_active_user)
+    db: AsyncSession = Depends(get_db), 
+    current_user: User = Depends(get_current_user_record)
 ):
     """Update current user's profile picture - PATCH /users/me/profile-picture"""
     try:
@@ -200,8 +285,8 @@ async def update_current_user_profile_picture(
         )
         
         current_user.profile_picture = upload_result["url"]
-        db.flush()
-        db.refresh(current_user)
+        await db.flush()
+        await db.refresh(current_user)
         
         return current_user
     
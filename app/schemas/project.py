@@ -2,6 +2,17 @@ from app.models.projects import Project
 from pydantic import BaseModel 
 from datetime import datetime
 from typing import List, Optional
+import enum
+
+class TagMatch(str, enum.Enum):
+    ANY = "any"
+    ALL = "all"
+
+class ProjectStatus(str, enum.Enum):
+    ACTIVE = "active"
+    ON_HOLD = "on_hold"
+    COMPLETED = "completed"
+    ARCHIVED = "archived"
 
 class ProjectBase(BaseModel):
     name: str 
@@ -38,3 +49,22 @@ class ProjectList(BaseModel):
     
     class Config: 
         from_attributes=True
+
+
+class MyProjectOut(ProjectOut):
+    # The caller's role; None for an admin who is not a member
+    role: Optional[str] = None
+
+
+class MyProjectList(BaseModel):
+    projects: List[MyProjectOut]
+    next_cursor: Optional[str] = None
+
+
+class TagCount(BaseModel):
+    tag: str
+    count: int
+
+
+class TagCountList(BaseModel):
+    tags: List[TagCount]
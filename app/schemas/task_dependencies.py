@@ -0,0 +1,33 @@
+from pydantic import BaseModel, Field
+from typing import List, Optional
+from datetime import datetime
+from app.schemas.tasks import TaskOut
+import enum
+
+class DependencyType(str, enum.Enum):
+    BLOCKS = "blocks"
+    RELATED_TO = "related_to"
+    SUBTASK_OF = "subtask_of"
+
+class DependencyDirection(str, enum.Enum):
+    UPSTREAM = "upstream"
+    DOWNSTREAM = "downstream"
+
+class TaskDependencyCreate(BaseModel):
+    depends_on_task_id: int
+    dependency_type: DependencyType = Field(default=DependencyType.BLOCKS)
+
+class TaskDependencyOut(BaseModel):
+    id: int
+    task_id: int
+    depends_on_task_id: int
+    dependency_type: DependencyType
+    created_at: Optional[datetime] = None
+    
+    class Config:
+        from_attributes = True
+
+class TaskDependencyClosure(BaseModel):
+    task_id: int
+    direction: DependencyDirection
+    tasks: List[TaskOut]
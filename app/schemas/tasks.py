@@ -1,6 +1,6 @@
 from pydantic import BaseModel, Field
 import enum 
-from typing import Optional, List
+from typing import Optional, List, Dict
 from datetime import datetime
 
 class TaskPriority(str, enum.Enum):
@@ -13,6 +13,10 @@ class TaskStatus(str, enum.Enum):
     IN_PROGRESS = "in-progress"
     COMPLETED = "completed"
     
+class TaskExportFormat(str, enum.Enum):
+    NDJSON = "ndjson"
+    CSV = "csv"
+    
 class TaskCreate(BaseModel):
     name: str 
     description: str 
@@ -39,6 +43,7 @@ class TaskOut(BaseModel):
     actual_hours: Optional[int] = None
     tags: Optional[str] = None
     attachments: Optional[str] = None
+    is_blocked: bool = False
     
 class TaskUpdate(BaseModel):
     name: Optional[str] = None 
@@ -53,6 +58,40 @@ class TaskUpdate(BaseModel):
     
 class TaskList(BaseModel):
     tasks: List[TaskOut]
+    next_cursor: Optional[str] = None
+    
+class TaskSearchHit(TaskOut):
+    rank: float
+    
+class TaskSearchList(BaseModel):
+    tasks: List[TaskSearchHit]
+    next_cursor: Optional[str] = None
+    
+class TaskBatchCreate(BaseModel):
+    tasks: List[TaskCreate] = Field(..., min_length=1)
+    
+class TaskBatchUpdateItem(TaskUpdate):
+    id: int
+    
+class TaskBatchUpdate(BaseModel):
+    tasks: List[TaskBatchUpdateItem] = Field(..., min_length=1)
+    
+class TaskBatchError(BaseModel):
+    index: int
+    detail: str
+    
+class TaskBatchResult(BaseModel):
+    tasks: List[TaskOut]
+    errors: List[TaskBatchError]
     
 class TaskStatusUpdate(BaseModel):
-    status: TaskStatus
\ No newline at end of file
+    status: TaskStatus
+    
+class TaskStats(BaseModel):
+    total: int
+    by_status: Dict[TaskStatus, int]
+    by_priority: Dict[TaskPriority, int]
+    overdue: int
+    blocked: int
+    estimated_hours: int
+    actual_hours: int
@@ -71,6 +71,18 @@ class Token(BaseModel):
     user: Dict[str, Any]
 
 
+class TokenRefresh(BaseModel):
+    """Refresh token exchange request"""
+    refresh_token: str
+
+
+class RefreshedToken(BaseModel):
+    """Refresh token exchange response"""
+    access_token: str
+    refresh_token: str
+    token_type: str
+
+
 class TokenData(BaseModel):
     """Token payload data"""
     user_id: Optional[int] = None
@@ -1,7 +1,8 @@
-from sqlalchemy import event, inspect
+from sqlalchemy import event, inspect, insert
 from sqlalchemy.orm import Session
+from sqlalchemy.ext.asyncio import AsyncSession
 from app.models.audit_log import AuditLog
-from typing import Optional
+from typing import Optional, List
 import json
 
 
@@ -60,6 +61,36 @@ class AuditService:
         
         session.add(audit_log)
     
+    @staticmethod
+    async def create_audit_logs_bulk(session: AsyncSession, table_name: str, entries: List[dict]):
+        """
+        Insert many audit log entries with a single executemany.
+        
+        Used by set-based writes that bypass the ORM flush listeners. Each
+        entry holds record_id and action, plus optional field_name,
+        old_value and new_value.
+        """
+        if not entries:
+            return
+        
+        user_id, username = AuditService.get_current_user_info(session)
+        context = AuditService.get_request_context(session)
+        
+        rows = [
+            {
+                'user_id': user_id,
+                'username': username,
+                'table_name': table_name,
+                'field_name': None,
+                'old_value': None,
+                'new_value': None,
+                **context,
+                **entry
+            }
+            for entry in entries
+        ]
+        await session.execute(insert(AuditLog), rows)
+    
     @staticmethod
     def serialize_value(value) -> Optional[str]:
         """Serialize a value to string for audit log"""
@@ -77,6 +108,9 @@ def setup_audit_listeners(Base):
     """
     Setup SQLAlchemy event listeners for automatic audit logging.
     Call this once during application startup.
+    
+    The listeners are attached to the Session class, so they also run for
+    the sync Session that every AsyncSession drives internally.
     """
     
     @event.listens_for(Session, 'before_flush')
@@ -1,13 +1,20 @@
 import jwt
+import uuid
 from datetime import datetime, timedelta, timezone
 from typing import Optional
 from fastapi import Depends, HTTPException, status, Request
 from fastapi.security import OAuth2PasswordBearer
-from sqlalchemy.orm import Session
+from sqlalchemy import select
+from sqlalchemy.ext.asyncio import AsyncSession
 from pwdlib import PasswordHash
 from pwdlib.hashers.argon2 import Argon2Hasher
 from app.models.user import User
 from app.config import settings
+from app.middleware.transaction import request_session, token_claims
+from app.utils.password_pool import password_pool
+from app.utils.replicas import pin_if_recently_written
+from app.utils.role_cache import scope_version
+from app.utils.user_cache import auth_user, cached_user, store_user, user_scope
 
 # Initialize password hasher with Argon2id (modern, secure)
 pwd_hash = PasswordHash((Argon2Hasher(),))
@@ -32,6 +39,16 @@ def verify_password(plain_password: str, hashed_password: str) -> bool:
         return False
 
 
+async def hash_password_async(plain_password: str) -> str:
+    """hash_password on the password pool, keeping the event loop free"""
+    return await password_pool.run("hash", hash_password, plain_password)
+
+
+async def verify_password_async(plain_password: str, hashed_password: str) -> bool:
+    """verify_password on the password pool, keeping the event loop free"""
+    return await password_pool.run("verify", verify_password, plain_password, hashed_password)
+
+
 def create_access_token(data: dict, expires_delta: Optional[timedelta] = None) -> str:
     """
     Create a JWT access token
@@ -65,23 +82,29 @@ def create_access_token(data: dict, expires_delta: Optional[timedelta] = None) -
     return encoded_jwt
 
 
-def create_refresh_token(data: dict) -> str:
+def create_refresh_token(data: dict, family: Optional[str] = None) -> str:
     """
     Create a JWT refresh token with longer expiration
 
+    Every token gets its own jti, used to detect replays. Tokens rotated
+    from the same login share a family id, revoked as a whole on replay.
+
     Args:
         data: Dictionary containing claims to encode in the token
+        family: Family of the token being rotated; a new one for a login
 
     Returns:
         Encoded JWT refresh token string
     """
     to_encode = data.copy()
-    expire = datetime.now(timezone.utc) + timedelta(days=7)  # 7 days for refresh token
+    expire = datetime.now(timezone.utc) + timedelta(days=settings.refresh_token_expire_days)
 
     to_encode.update({
         "exp": expire,
         "iat": datetime.now(timezone.utc),
-        "type": "refresh"
+        "type": "refresh",
+        "jti": uuid.uuid4().hex,
+        "fam": family or uuid.uuid4().hex
     })
 
     encoded_jwt = jwt.encode(
@@ -93,6 +116,15 @@ def create_refresh_token(data: dict) -> str:
     return encoded_jwt
 
 
+def token_error(error: jwt.InvalidTokenError) -> HTTPException:
+    """The 401 reported for an invalid or expired token"""
+    return HTTPException(
+        status_code=status.HTTP_401_UNAUTHORIZED,
+        detail="Token has expired" if isinstance(error, jwt.ExpiredSignatureError) else "Invalid token",
+        headers={"WWW-Authenticate": "Bearer"}
+    )
+
+
 def decode_token(token: str) -> dict:
     """
     Decode and verify a JWT token
@@ -114,19 +146,33 @@ def decode_token(token: str) -> dict:
         )
         return payload
 
-    except jwt.ExpiredSignatureError:
-        raise HTTPException(
-            status_code=status.HTTP_401_UNAUTHORIZED,
-            detail="Token has expired",
-            headers={"WWW-Authenticate": "Bearer"}
-        )
+    except jwt.InvalidTokenError as e:
+        raise token_error(e)
 
-    except jwt.InvalidTokenError:
-        raise HTTPException(
-            status_code=status.HTTP_401_UNAUTHORIZED,
-            detail="Invalid token",
-            headers={"WWW-Authenticate": "Bearer"}
-        )
+
+async def load_auth_user(request: Request, user_id: int) -> Optional[User]:
+    """
+    The user's auth fields from the user cache, falling back to the
+    request session; None for unknown or deleted users.
+    """
+    fields = await cached_user(user_id)
+    if fields is not None:
+        user = auth_user(fields)
+    else:
+        # Get db session from request state (opened lazily by TransactionMiddleware)
+        db: AsyncSession = await request_session(request)
+        scope = user_scope(user_id)
+        # Read before the query, so a change committed meanwhile (such as
+        # a deletion) keeps this row out of the cache
+        version = await scope_version(scope)
+        await pin_if_recently_written(db, scope)
+        user = await db.get(User, user_id)
+        if user is not None:
+            await store_user(user, version)
+
+    if user is None or user.is_deleted:
+        return None
+    return user
 
 
 async def get_current_user(
@@ -136,6 +182,12 @@ async def get_current_user(
     """
     Get the current authenticated user from JWT token
 
+    The token is decoded once per request (see token_claims) and the user's
+    auth fields come from the user cache, so the common path makes no
+    database round-trip. On a cache hit the user is a transient User with
+    only id, username, is_admin and is_deleted set; routes that need the
+    full row depend on get_current_user_record instead.
+
     Args:
         token: JWT token from Authorization header
         request: FastAPI request object (contains db session from middleware)
@@ -153,37 +205,51 @@ async def get_current_user(
     )
 
     try:
-        payload = decode_token(token)
-        user_id: str = payload.get("sub")
-        token_type: str = payload.get("type")
-
-        if user_id is None:
-            raise credentials_exception
+        payload = token_claims(request.scope)
+    except jwt.InvalidTokenError as e:
+        raise token_error(e)
 
-        if token_type != "access":
-            raise HTTPException(
-                status_code=status.HTTP_401_UNAUTHORIZED,
-                detail="Invalid token type",
-                headers={"WWW-Authenticate": "Bearer"}
-            )
-
-    except HTTPException:
-        raise
-
-    except Exception:
+    try:
+        user_id = int(payload["sub"])
+    except (TypeError, KeyError, ValueError):
         raise credentials_exception
 
-    # Get db session from request state (set by TransactionMiddleware)
-    db: Session = request.state.db
-    user = db.query(User).filter(User.id == int(user_id)).first()
+    if payload.get("type") != "access":
+        raise HTTPException(
+            status_code=status.HTTP_401_UNAUTHORIZED,
+            detail="Invalid token type",
+            headers={"WWW-Authenticate": "Bearer"}
+        )
 
+    user = await load_auth_user(request, user_id)
     if user is None:
         raise credentials_exception
 
     return user
 
 
-def authenticate_user(db: Session, username: str, password: str) -> Optional[User]:
+async def get_current_user_record(
+    current_user: User = Depends(get_current_user),
+    request: Request = None
+) -> User:
+    """
+    The current user's full row, attached to the request session.
+
+    Use it in routes that return or modify the user itself; when the user
+    was just loaded by get_current_user, this is an identity map hit.
+    """
+    db: AsyncSession = await request_session(request)
+    user = await db.get(User, current_user.id)
+    if user is None or user.is_deleted:
+        raise HTTPException(
+            status_code=status.HTTP_401_UNAUTHORIZED,
+            detail="Could not validate credentials",
+            headers={"WWW-Authenticate": "Bearer"}
+        )
+    return user
+
+
+async def authenticate_user(db: AsyncSession, username: str, password: str) -> Optional[User]:
     """
     Authenticate a user by username and password
 
@@ -195,12 +261,13 @@ def authenticate_user(db: Session, username: str, password: str) -> Optional[Use
     Returns:
         User object if authentication successful, None otherwise
     """
-    user = db.query(User).filter(User.username == username).first()
+    result = await db.execute(select(User).where(User.username == username))
+    user = result.scalars().first()
 
     if not user:
         return None
 
-    if not verify_password(password, user.hashed_password):
+    if not await verify_password_async(password, user.hashed_password):
         return None
 
     return user
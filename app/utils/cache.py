@@ -0,0 +1,289 @@
+import asyncio
+import json
+import logging
+import time
+import uuid
+from typing import Any, Awaitable, Callable, List, Optional, Sequence, Tuple
+from sqlalchemy.ext.asyncio import AsyncSession
+from app.config import settings
+from app.utils.etag import VERSION_CHANNEL, bump_after_commit
+from app.utils.metrics import CACHE_LOOKUPS
+from app.utils.redis_client import get_redis
+from app.utils.lru import LRUCache, MISSING
+
+logger = logging.getLogger(__name__)
+
+# Tags group cached values by what they were computed from, such as
+# "project:{id}" or "projects". Each tag has a version key; a value is stored
+# under a key embedding the versions of all its tags, so bumping one tag
+# orphans every value carrying it in O(1). Orphans simply expire.
+#
+# Tag version keys are the collection versions of app.utils.etag
+# ("projects" -> "projects:version"), so one bump moves both the ETags
+# and the cached values of a collection.
+TAG_VERSION_KEY = "{tag}:version"
+CACHE_KEY = "cache:{key}@{versions}"
+# Held while one caller recomputes a cached value
+LOCK_KEY = "lock:{key}"
+
+# Deletes the lock only if this caller still holds it; an expired lock may
+# already belong to the next caller
+RELEASE_LOCK_SCRIPT = """
+if redis.call('GET', KEYS[1]) == ARGV[1] then
+    return redis.call('DEL', KEYS[1])
+end
+return 0
+"""
+
+
+def tag_version_key(tag: str) -> str:
+    return TAG_VERSION_KEY.format(tag=tag)
+
+
+class InvalidationListener:
+    """
+    Per-process subscriber to VERSION_CHANNEL that drops the local copy of
+    every bumped version key, and of every invalidated scope in the tiers
+    registered with track.
+
+    The local tier is only used while it is subscribed: on any disconnect it
+    is cleared, as messages may have been missed. generation counts the
+    messages seen, so a version fetched from Redis while one arrives is
+    not stored locally.
+    """
+
+    def __init__(self):
+        self.listening = False
+        self.generation = 0
+        self._tracked: List[LRUCache] = []
+        self._task: Optional[asyncio.Task] = None
+
+    def track(self, tier: LRUCache):
+        """Also drop published keys from tier, which is keyed by Redis key"""
+        self._tracked.append(tier)
+
+    def start(self):
+        if settings.cache_local_enabled and self._task is None:
+            self._task = asyncio.create_task(self._run())
+
+    async def stop(self):
+        if self._task is not None:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+            self._task = None
+
+    def _reset(self):
+        self.listening = False
+        self.generation += 1
+        local_versions.clear()
+        local_values.clear()
+        for tier in self._tracked:
+            tier.clear()
+
+    async def _run(self):
+        while True:
+            pubsub = get_redis().pubsub()
+            try:
+                await pubsub.subscribe(VERSION_CHANNEL)
+                self.listening = True
+                async for message in pubsub.listen():
+                    if message["type"] == "message":
+                        self.generation += 1
+                        local_versions.delete(message["data"])
+                        for tier in self._tracked:
+                            tier.delete(message["data"])
+            except asyncio.CancelledError:
+                raise
+            except Exception as e:
+                logger.error(f"Cache invalidation listener failed: {e}")
+            finally:
+                self._reset()
+                await pubsub.aclose()
+            await asyncio.sleep(1)
+
+
+# The local tier: tag versions (dropped on invalidation messages) and values
+# under versioned keys (orphaned, like in Redis, when a version moves)
+local_versions = LRUCache(settings.cache_local_size, settings.cache_local_ttl)
+local_values = LRUCache(settings.cache_local_size, settings.cache_local_ttl)
+invalidations = InvalidationListener()
+
+
+async def tag_versions(tags: Sequence[str]) -> List[str]:
+    """
+    Current versions of tags, from the local tier or in one round trip.
+
+    Like collection_version, a missing version starts from the clock, so
+    a version lost with a Redis restart is never reused.
+    """
+    keys = [tag_version_key(tag) for tag in tags]
+    listening = invalidations.listening
+    if listening:
+        versions = [local_versions.get(key) for key in keys]
+        if MISSING not in versions:
+            return versions
+
+    generation = invalidations.generation
+    async with get_redis().pipeline(transaction=False) as pipe:
+        for key in keys:
+            pipe.set(key, time.time_ns(), nx=True)
+        pipe.mget(keys)
+        results = await pipe.execute()
+    versions = results[-1]
+
+    if listening and invalidations.generation == generation:
+        for key, version in zip(keys, versions):
+            local_versions.set(key, version)
+    return versions
+
+
+def _is_fresh(entry: dict) -> bool:
+    return entry["fresh_until"] is None or entry["fresh_until"] > time.time()
+
+
+def _store_local(full_key: str, entry: dict):
+    if invalidations.listening:
+        local_values.set(full_key, entry)
+
+
+async def versioned_key(key: str, tags: Sequence[str]) -> str:
+    """Redis key of a cached value under the current versions of its tags"""
+    versions = await tag_versions(tags)
+    return CACHE_KEY.format(key=key, versions=".".join(str(version) for version in versions))
+
+
+async def _try_lock(full_key: str) -> Optional[str]:
+    """
+    Take the short recompute lock of a cached value; None if another
+    caller holds it. On Redis errors the caller proceeds as if it held it.
+    """
+    token = uuid.uuid4().hex
+    try:
+        taken = await get_redis().set(
+            LOCK_KEY.format(key=full_key), token, nx=True, px=int(settings.cache_lock_seconds * 1000)
+        )
+    except Exception as e:
+        logger.error(f"Cache lock failed for {full_key}: {e}")
+        return token
+    return token if taken else None
+
+
+async def _wait_for(full_key: str) -> Tuple[Optional[dict], bool]:
+    """
+    Poll for the value another caller is computing, for at most the lock
+    lifetime. Returns the entry once stored, and whether the lock was
+    released without one (as when load() raised).
+    """
+    redis = get_redis()
+    lock_key = LOCK_KEY.format(key=full_key)
+    deadline = time.monotonic() + settings.cache_lock_seconds
+    while time.monotonic() < deadline:
+        await asyncio.sleep(settings.cache_poll_interval)
+        try:
+            hit, locked = await redis.mget(full_key, lock_key)
+        except Exception as e:
+            logger.error(f"Cache read failed for {full_key}: {e}")
+            return None, False
+        if hit is not None:
+            entry = json.loads(hit)
+            _store_local(full_key, entry)
+            return entry, False
+        if locked is None:
+            return None, True
+    return None, False
+
+
+async def _recompute(full_key: str, token: str, ttl: int, soft_ttl: Optional[int],
+                     load: Callable[[], Awaitable[Any]]) -> Any:
+    """Load, store and unlock a cached value; the lock is released even if load fails"""
+    redis = get_redis()
+    try:
+        value = await load()
+        entry = {"value": value, "fresh_until": time.time() + soft_ttl if soft_ttl else None}
+        _store_local(full_key, entry)
+        try:
+            await redis.set(full_key, json.dumps(entry), ex=ttl)
+        except Exception as e:
+            logger.error(f"Cache write failed for {full_key}: {e}")
+        return value
+    finally:
+        try:
+            await redis.register_script(RELEASE_LOCK_SCRIPT)(keys=[LOCK_KEY.format(key=full_key)], args=[token])
+        except Exception as e:
+            logger.error(f"Cache unlock failed for {full_key}: {e}")
+
+
+async def cached(key: str, tags: Sequence[str], ttl: int, load: Callable[[], Awaitable[Any]],
+                 soft_ttl: Optional[int] = None) -> Any:
+    """
+    The cached value of key, or the result of load(), kept for ttl seconds.
+
+    Misses are single-flight: one caller takes a short Redis lock and runs
+    load() while concurrent callers poll for its result, so an expiry or
+    an invalidation costs one database query, not one per request.
+
+    A per-process tier answers hot keys with dict lookups: tag versions and
+    values are kept locally while the InvalidationListener is subscribed.
+    Returned values may be shared between requests, so treat them as
+    read-only.
+
+    With soft_ttl (below ttl), a value older than soft_ttl is stale: one
+    caller recomputes it under the lock while the others keep serving the
+    stale value, so requests never queue behind the refresh. A tag bump
+    changes the key, so invalidated values are never served stale.
+
+    load must return something JSON serializable. Cache errors are logged
+    and fall through to load(), so Redis trouble costs latency, not errors.
+    Callers reading from a replica should pin_if_recently_written the tag
+    version keys first, so a lagging replica is never cached.
+    """
+    try:
+        full_key = await versioned_key(key, tags)
+    except Exception as e:
+        logger.error(f"Cache read failed for {key}: {e}")
+        return await load()
+
+    if invalidations.listening:
+        entry = local_values.get(full_key)
+        if entry is not MISSING and _is_fresh(entry):
+            CACHE_LOOKUPS.labels("local", "hit").inc()
+            return entry["value"]
+        CACHE_LOOKUPS.labels("local", "miss").inc()
+
+    try:
+        hit = await get_redis().get(full_key)
+    except Exception as e:
+        logger.error(f"Cache read failed for {key}: {e}")
+        return await load()
+
+    CACHE_LOOKUPS.labels("redis", "miss" if hit is None else "hit").inc()
+    if hit is not None:
+        entry = json.loads(hit)
+        if _is_fresh(entry):
+            _store_local(full_key, entry)
+            return entry["value"]
+        token = await _try_lock(full_key)
+        if token is None:
+            return entry["value"]
+        return await _recompute(full_key, token, ttl, soft_ttl, load)
+
+    while True:
+        token = await _try_lock(full_key)
+        if token is not None:
+            return await _recompute(full_key, token, ttl, soft_ttl, load)
+        entry, released = await _wait_for(full_key)
+        if entry is not None:
+            return entry["value"]
+        if not released:
+            # The lock holder is too slow (or Redis failed); stop waiting
+            return await load()
+        # The lock holder failed: the next caller to take the lock retries
+
+
+def invalidate_after_commit(db: AsyncSession, *tags: str):
+    """Bump the versions of tags once the request's transaction commits"""
+    for tag in tags:
+        bump_after_commit(db, tag_version_key(tag))
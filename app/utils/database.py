@@ -1,15 +1,45 @@
 import logging
-from sqlalchemy import create_engine, text
+import time
+from sqlalchemy import create_engine, exc, make_url, text
+from sqlalchemy.ext.asyncio import AsyncEngine, AsyncSession, async_sessionmaker, create_async_engine
 from sqlalchemy.orm import sessionmaker
 from sqlalchemy.ext.declarative import declarative_base
-from sqlalchemy.pool import QueuePool
+from sqlalchemy.pool import AsyncAdaptedQueuePool, QueuePool
 from app.config import settings
+from app.utils.metrics import DB_POOL_TIMEOUTS, DB_POOL_WAIT_SECONDS, track_pool
+from app.utils.replicas import ReplicaPool, RoutingSession
 
 logger = logging.getLogger(__name__)
 
+
+class _WaitTimedPool:
+    """Records how long checkouts wait for a connection, per pool_logging_name"""
+
+    def _do_get(self):
+        name = self._orig_logging_name or "default"
+        start = time.perf_counter()
+        try:
+            return super()._do_get()
+        except exc.TimeoutError:
+            DB_POOL_TIMEOUTS.labels(name).inc()
+            raise
+        finally:
+            DB_POOL_WAIT_SECONDS.labels(name).observe(time.perf_counter() - start)
+
+
+class TimedQueuePool(_WaitTimedPool, QueuePool):
+    pass
+
+
+class TimedAsyncQueuePool(_WaitTimedPool, AsyncAdaptedQueuePool):
+    pass
+
+# Synchronous engine, used by startup tasks, Celery workers and the storage
+# service; request handlers use async_engine below
 engine = create_engine(
     settings.database_url,
-    poolclass=QueuePool,
+    poolclass=TimedQueuePool,
+    pool_logging_name="sync",
     pool_size=5,
     max_overflow=10,
     pool_pre_ping=True,
@@ -20,17 +50,76 @@ engine = create_engine(
     }
 )
 
+track_pool("sync", engine)
+
 SessionLocal = sessionmaker(bind=engine, autoflush=False, autocommit=False)
 
+
+def async_database_url(url: str) -> str:
+    """Rewrite a postgresql:// URL to use the asyncpg driver; other URLs are kept"""
+    parsed = make_url(url)
+    if parsed.get_backend_name() == "postgresql":
+        parsed = parsed.set(drivername="postgresql+asyncpg")
+    return parsed.render_as_string(hide_password=False)
+
+
+def create_app_engine(url: str, name: str) -> AsyncEngine:
+    """Async engine with the application's pool settings, reported in /metrics as name"""
+    url = async_database_url(url)
+    if make_url(url).get_backend_name() != "postgresql":
+        return create_async_engine(url)
+    app_engine = create_async_engine(
+        url,
+        poolclass=TimedAsyncQueuePool,
+        pool_logging_name=name,
+        pool_size=5,
+        max_overflow=10,
+        pool_pre_ping=True,
+        pool_recycle=300,
+        connect_args={
+            "timeout": 10,
+            "server_settings": {"timezone": "utc"}
+        }
+    )
+    track_pool(name, app_engine)
+    return app_engine
+
+
+async_engine = create_app_engine(settings.database_url, "primary")
+
+# Read replicas for safe GET requests (see TransactionMiddleware)
+replica_pool = ReplicaPool([
+    create_app_engine(url, f"replica{index}") for index, url in enumerate(settings.replica_urls)
+])
+
+# expire_on_commit=False keeps loaded objects usable after commit; under
+# asyncio an expired attribute cannot be lazily reloaded on access.
+# RoutingSession sends reads to info['replica'] when a request sets one.
+AsyncSessionLocal = async_sessionmaker(
+    bind=async_engine,
+    class_=AsyncSession,
+    sync_session_class=RoutingSession,
+    autoflush=False,
+    expire_on_commit=False
+)
+
 Base = declarative_base()
 
 
+def after_commit(db, callback):
+    """
+    Register an async callback that TransactionMiddleware awaits once the
+    request's transaction has committed. Nothing runs on rollback, so side
+    effects outside the database never describe writes that did not happen.
+    """
+    db.info.setdefault('after_commit', []).append(callback)
+
+
 async def check_db_health() -> bool:
     """Health check for database connectivity"""
     try:
-        db = SessionLocal()
-        db.execute(text("SELECT 1"))
-        db.close()
+        async with AsyncSessionLocal() as db:
+            await db.execute(text("SELECT 1"))
         return True
     except Exception as e:
         logger.error(f"Database health check failed: {e}")
@@ -1,14 +1,16 @@
 from fastapi import Depends, HTTPException, status, Request
-from sqlalchemy.orm import Session
+from sqlalchemy.ext.asyncio import AsyncSession
 from app.models.user import User
 from app.utils.auth import get_current_user
+from app.middleware.transaction import request_session
 
 
-def get_db(request: Request) -> Session:
+async def get_db(request: Request) -> AsyncSession:
     """
     Get database session from request state (managed by TransactionMiddleware).
+    The session is opened here on first use.
     """
-    return request.state.db
+    return await request_session(request)
 
 
 def get_current_active_user(
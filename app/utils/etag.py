@@ -0,0 +1,78 @@
+import hashlib
+import time
+from fastapi import Request, Response, status
+from sqlalchemy.ext.asyncio import AsyncSession
+from app.utils.database import after_commit, replica_pool
+from app.utils.redis_client import get_redis
+from app.utils.replicas import mark_recent_write
+
+# Redis keys holding the version of a project's collections; every mutation
+# of a collection bumps its version once the transaction has committed
+TASKS_COLLECTION = "project:{project_id}:tasks:version"
+MEMBERS_COLLECTION = "project:{project_id}:members:version"
+# Every bumped version key is published here, so workers can drop their
+# in-process copy of it (see app.utils.cache)
+VERSION_CHANNEL = "cache:versions"
+
+
+def make_etag(*parts) -> str:
+    """Build a strong ETag from the values that identify a representation"""
+    digest = hashlib.sha1(":".join(str(part) for part in parts).encode()).hexdigest()
+    return f'"{digest}"'
+
+
+def etag_matches(request: Request, etag: str) -> bool:
+    """Check If-None-Match against etag (weak comparison, as RFC 9110 requires)"""
+    header = request.headers.get("if-none-match")
+    if not header:
+        return False
+    if header.strip() == "*":
+        return True
+
+    candidates = {candidate.strip().removeprefix("W/") for candidate in header.split(",")}
+    return etag in candidates
+
+
+def not_modified(etag: str) -> Response:
+    """Empty 304 response carrying the current ETag"""
+    return Response(status_code=status.HTTP_304_NOT_MODIFIED, headers={"ETag": etag})
+
+
+async def collection_version(key: str) -> str:
+    """
+    Current version of a collection.
+
+    Versions start from the clock rather than from zero, so a version lost
+    with a Redis restart is never handed out again for different contents.
+    """
+    redis = get_redis()
+    await redis.set(key, time.time_ns(), nx=True)
+    return await redis.get(key)
+
+
+async def bump_collection_version(key: str):
+    """Move a collection to a new version"""
+    redis = get_redis()
+    async with redis.pipeline(transaction=True) as pipe:
+        pipe.set(key, time.time_ns(), nx=True)
+        pipe.incr(key)
+        pipe.publish(VERSION_CHANNEL, key)
+        await pipe.execute()
+    # Until replicas have caught up, readers of the new version use the primary
+    if replica_pool:
+        await mark_recent_write(key)
+
+
+def bump_after_commit(db: AsyncSession, key: str):
+    """
+    Bump a collection version once the request's transaction commits.
+
+    List endpoints read the version before their rows, so a reader racing a
+    write can only pair new rows with the old version (one extra 200 later),
+    never old rows with the new version.
+    """
+    pending = db.info.setdefault('pending_version_bumps', set())
+    if key in pending:
+        return
+    pending.add(key)
+    after_commit(db, lambda: bump_collection_version(key))
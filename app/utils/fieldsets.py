@@ -0,0 +1,34 @@
+from typing import Any, List, Mapping, Optional, Type
+from fastapi import HTTPException, status
+from fastapi.encoders import jsonable_encoder
+from pydantic import BaseModel
+
+
+def parse_fields(fields: Optional[str], model: Type[BaseModel]) -> Optional[List[str]]:
+    """
+    Parse a comma-separated fields= parameter against a response model.
+
+    Returns None when every field was requested. Otherwise returns the
+    requested fields in model order, always including id.
+
+    Raises:
+        HTTPException: If a requested field is not part of the model
+    """
+    if fields is None:
+        return None
+
+    requested = {field.strip() for field in fields.split(",") if field.strip()}
+    unknown = requested - set(model.model_fields)
+    if unknown:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail=f"Unknown fields: {', '.join(sorted(unknown))}"
+        )
+
+    requested.add("id")
+    return [field for field in model.model_fields if field in requested]
+
+
+def pick_fields(row: Mapping[str, Any], fields: List[str]) -> dict:
+    """Keep only the requested fields of a row mapping, JSON-encoded"""
+    return jsonable_encoder({field: row[field] for field in fields})
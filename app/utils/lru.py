@@ -0,0 +1,42 @@
+import time
+from collections import OrderedDict
+from typing import Hashable
+
+# Returned by LRUCache.get for absent or expired keys, as None is a value
+MISSING = object()
+
+
+class LRUCache:
+    """
+    Bounded in-process cache whose entries expire ttl seconds after being set.
+
+    Only the event loop thread touches it, so it takes no locks.
+    """
+
+    def __init__(self, maxsize: int, ttl: float):
+        self.maxsize = maxsize
+        self.ttl = ttl
+        self._entries: OrderedDict = OrderedDict()
+
+    def get(self, key: Hashable, default=MISSING):
+        entry = self._entries.get(key)
+        if entry is None:
+            return default
+        value, expires_at = entry
+        if expires_at <= time.monotonic():
+            del self._entries[key]
+            return default
+        self._entries.move_to_end(key)
+        return value
+
+    def set(self, key: Hashable, value):
+        self._entries[key] = (value, time.monotonic() + self.ttl)
+        self._entries.move_to_end(key)
+        while len(self._entries) > self.maxsize:
+            self._entries.popitem(last=False)
+
+    def delete(self, key: Hashable):
+        self._entries.pop(key, None)
+
+    def clear(self):
+        self._entries.clear()
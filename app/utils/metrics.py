@@ -0,0 +1,254 @@
+import math
+from abc import ABC, abstractmethod
+from bisect import bisect_left
+from typing import Callable, Dict, Iterable, List, Tuple
+
+# Latency buckets in seconds, from cache hits to slow exports
+DEFAULT_BUCKETS = (0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+
+CONTENT_TYPE = "text/plain; version=0.0.4; charset=utf-8"
+
+
+def _escape(value) -> str:
+    return str(value).replace("\\", "\\\\").replace("\n", "\\n").replace('"', '\\"')
+
+
+def _label_text(names: Tuple[str, ...], values: Tuple, extra: str = "") -> str:
+    pairs = [f'{name}="{_escape(value)}"' for name, value in zip(names, values)]
+    if extra:
+        pairs.append(extra)
+    return "{" + ",".join(pairs) + "}" if pairs else ""
+
+
+def _number(value: float) -> str:
+    if value == math.inf:
+        return "+Inf"
+    return repr(float(value)) if isinstance(value, float) else str(value)
+
+
+class _CounterChild:
+    __slots__ = ("value",)
+
+    def __init__(self):
+        self.value = 0
+
+    def inc(self, amount: float = 1):
+        self.value += amount
+
+
+class _HistogramChild:
+    __slots__ = ("buckets", "counts", "sum")
+
+    def __init__(self, buckets: Tuple[float, ...]):
+        self.buckets = buckets
+        # One slot per bucket plus +Inf; made cumulative only when rendered
+        self.counts = [0] * (len(buckets) + 1)
+        self.sum = 0.0
+
+    def observe(self, value: float):
+        self.counts[bisect_left(self.buckets, value)] += 1
+        self.sum += value
+
+
+class _Metric(ABC):
+    """
+    A metric family whose children are keyed by their tuple of label values.
+
+    Recording takes one dict lookup and a few integer additions: no label
+    dicts are built and no locks are taken. The event loop runs handlers one
+    at a time, and in worker threads the GIL makes a lost increment rare
+    enough not to matter for monitoring.
+    """
+
+    kind = ""
+
+    def __init__(self, name: str, documentation: str, labelnames: Iterable[str] = ()):
+        self.name = name
+        self.documentation = documentation
+        self.labelnames = tuple(labelnames)
+        self._children: Dict[Tuple, object] = {}
+        REGISTRY.append(self)
+
+    @abstractmethod
+    def _new_child(self):
+        """A child holding one label combination's state"""
+
+    def labels(self, *values):
+        """Child for these label values, in labelnames order"""
+        child = self._children.get(values)
+        if child is None:
+            child = self._children.setdefault(values, self._new_child())
+        return child
+
+    def header(self) -> List[str]:
+        return [f"# HELP {self.name} {self.documentation}", f"# TYPE {self.name} {self.kind}"]
+
+    @abstractmethod
+    def samples(self) -> List[str]:
+        """Exposition lines of every child"""
+
+
+class Counter(_Metric):
+    kind = "counter"
+
+    def _new_child(self):
+        return _CounterChild()
+
+    def inc(self, amount: float = 1):
+        self.labels().inc(amount)
+
+    def samples(self) -> List[str]:
+        return [
+            f"{self.name}{_label_text(self.labelnames, values)} {_number(child.value)}"
+            for values, child in list(self._children.items())
+        ]
+
+
+class Histogram(_Metric):
+    kind = "histogram"
+
+    def __init__(self, name: str, documentation: str, labelnames: Iterable[str] = (),
+                 buckets: Tuple[float, ...] = DEFAULT_BUCKETS):
+        super().__init__(name, documentation, labelnames)
+        self.buckets = tuple(sorted(buckets))
+
+    def _new_child(self):
+        return _HistogramChild(self.buckets)
+
+    def observe(self, value: float):
+        self.labels().observe(value)
+
+    def samples(self) -> List[str]:
+        lines = []
+        for values, child in list(self._children.items()):
+            cumulative = 0
+            for bound, count in zip(self.buckets + (math.inf,), list(child.counts)):
+                cumulative += count
+                le = f'le="{_number(bound)}"'
+                lines.append(f"{self.name}_bucket{_label_text(self.labelnames, values, le)} {cumulative}")
+            labels = _label_text(self.labelnames, values)
+            lines.append(f"{self.name}_sum{labels} {_number(child.sum)}")
+            lines.append(f"{self.name}_count{labels} {cumulative}")
+        return lines
+
+
+class GaugeCollector:
+    """
+    Gauges read at scrape time from a callback returning
+    {label values tuple: value}, for state that is cheaper to sample than
+    to track (connection pool usage).
+    """
+
+    kind = "gauge"
+
+    def __init__(self, name: str, documentation: str, labelnames: Iterable[str],
+                 read: Callable[[], Dict[Tuple, float]]):
+        self.name = name
+        self.documentation = documentation
+        self.labelnames = tuple(labelnames)
+        self.read = read
+        REGISTRY.append(self)
+
+    header = _Metric.header
+
+    def samples(self) -> List[str]:
+        return [
+            f"{self.name}{_label_text(self.labelnames, values)} {_number(value)}"
+            for values, value in self.read().items()
+        ]
+
+
+REGISTRY: List = []
+
+
+def render() -> str:
+    """Every registered metric in the Prometheus text exposition format"""
+    lines = []
+    for metric in REGISTRY:
+        samples = metric.samples()
+        if samples:
+            lines.extend(metric.header())
+            lines.extend(samples)
+    return "\n".join(lines) + "\n"
+
+
+HTTP_REQUESTS = Counter(
+    "http_requests_total", "HTTP requests by method, route template and status",
+    ("method", "route", "status")
+)
+HTTP_REQUEST_SECONDS = Histogram(
+    "http_request_duration_seconds", "HTTP request latency by method, route template and status",
+    ("method", "route", "status")
+)
+DB_POOL_WAIT_SECONDS = Histogram(
+    "db_pool_wait_seconds", "Time spent getting a connection from the pool, including new connections",
+    ("pool",)
+)
+DB_POOL_TIMEOUTS = Counter(
+    "db_pool_timeouts_total", "Connection requests that timed out waiting for the pool", ("pool",)
+)
+REDIS_COMMAND_SECONDS = Histogram(
+    "redis_command_duration_seconds", "Redis command latency; pipelines are timed as a whole", ("command",)
+)
+S3_REQUEST_SECONDS = Histogram(
+    "s3_request_duration_seconds", "S3 API call latency by operation", ("operation",)
+)
+# Argon2 takes tens of milliseconds by design
+PASSWORD_HASH_SECONDS = Histogram(
+    "password_hash_duration_seconds", "Argon2 hash and verify time on the password pool", ("operation",),
+    buckets=(0.01, 0.025, 0.05, 0.075, 0.1, 0.15, 0.25, 0.5, 1.0, 2.5)
+)
+PASSWORD_HASH_WAIT_SECONDS = Histogram(
+    "password_hash_queue_wait_seconds", "Time a password operation waited for a pool worker", ("operation",)
+)
+PASSWORD_HASH_REJECTED = Counter(
+    "password_hash_rejected_total", "Password operations refused because the pool queue was full", ("operation",)
+)
+LOGIN_THROTTLED = Counter(
+    "login_throttled_total", "Login attempts refused by the rate limit, by the limit that refused them", ("limit",)
+)
+CACHE_LOOKUPS = Counter(
+    "cache_lookups_total", "Response cache lookups by tier (local, redis) and result (hit, miss)",
+    ("tier", "result")
+)
+
+
+def _cache_hit_ratios() -> Dict[Tuple, float]:
+    ratios = {}
+    for tier in ("local", "redis"):
+        hits = CACHE_LOOKUPS.labels(tier, "hit").value
+        total = hits + CACHE_LOOKUPS.labels(tier, "miss").value
+        if total:
+            ratios[(tier,)] = hits / total
+    return ratios
+
+
+GaugeCollector("cache_hit_ratio", "Share of response cache lookups answered by each tier", ("tier",), _cache_hit_ratios)
+
+# Pools sampled at scrape time, by name
+POOLS: Dict[str, Callable[[], object]] = {}
+
+
+def track_pool(name: str, engine):
+    """Report the engine's pool usage; engine.pool is looked up per scrape, as dispose() replaces it"""
+    POOLS[name] = lambda: engine.pool
+
+
+def _pool_stats(stat: str) -> Callable[[], Dict[Tuple, float]]:
+    def read():
+        values = {}
+        for name, get_pool in POOLS.items():
+            pool = get_pool()
+            if hasattr(pool, stat):
+                values[(name,)] = getattr(pool, stat)()
+        return values
+    return read
+
+
+GaugeCollector("db_pool_size", "Configured pool size", ("pool",), _pool_stats("size"))
+GaugeCollector("db_pool_checked_out", "Connections currently checked out", ("pool",), _pool_stats("checkedout"))
+GaugeCollector("db_pool_checked_in", "Idle connections in the pool", ("pool",), _pool_stats("checkedin"))
+GaugeCollector(
+    "db_pool_overflow", "Overflow connections beyond pool_size (negative while the pool is filling)",
+    ("pool",), _pool_stats("overflow")
+)
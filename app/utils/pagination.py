@@ -0,0 +1,64 @@
+import base64
+import json
+import datetime
+from typing import Any, List, Tuple
+from fastapi import HTTPException, status
+
+
+def encode_cursor(*values: Any) -> str:
+    """
+    Encode the sort key of the last row on a page into an opaque cursor.
+
+    Datetimes are stored as ISO strings and restored by decode_cursor.
+    """
+    payload = [
+        {"dt": value.isoformat()} if isinstance(value, datetime.datetime) else value
+        for value in values
+    ]
+    raw = json.dumps(payload, separators=(",", ":")).encode()
+    return base64.urlsafe_b64encode(raw).decode().rstrip("=")
+
+
+# Cursor keys are bound straight into the page query, so integers must fit
+# the BIGINT columns they are compared with
+MAX_INT_KEY = 2 ** 63 - 1
+
+
+def _is_key_of_type(value: Any, key_type: type) -> bool:
+    if isinstance(value, bool):
+        return False
+    if key_type is int:
+        return isinstance(value, int) and -MAX_INT_KEY <= value <= MAX_INT_KEY
+    if key_type is float:
+        return isinstance(value, (int, float))
+    if key_type is datetime.datetime:
+        # Timestamp columns are naive UTC; an aware key cannot be compared with them
+        return isinstance(value, datetime.datetime) and value.tzinfo is None
+    return isinstance(value, key_type)
+
+
+def decode_cursor(cursor: str, types: Tuple[type, ...]) -> List[Any]:
+    """
+    Decode a cursor produced by encode_cursor whose keys have the given
+    types, such as (datetime.datetime, int).
+
+    Raises:
+        HTTPException: If the cursor is malformed or its keys do not match types
+    """
+    try:
+        padded = cursor + "=" * (-len(cursor) % 4)
+        payload = json.loads(base64.urlsafe_b64decode(padded.encode()))
+        if not isinstance(payload, list) or len(payload) != len(types):
+            raise ValueError("unexpected cursor shape")
+        values = [
+            datetime.datetime.fromisoformat(value["dt"]) if isinstance(value, dict) else value
+            for value in payload
+        ]
+        if not all(_is_key_of_type(value, key_type) for value, key_type in zip(values, types)):
+            raise ValueError("unexpected cursor key types")
+        return values
+    except (ValueError, TypeError, KeyError):
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail="Invalid pagination cursor"
+        )
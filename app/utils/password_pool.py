@@ -0,0 +1,86 @@
+import asyncio
+import time
+from concurrent.futures import ThreadPoolExecutor
+from typing import Callable, Optional
+from fastapi import HTTPException, status
+from app.config import settings
+from app.utils.metrics import (
+    GaugeCollector,
+    PASSWORD_HASH_REJECTED,
+    PASSWORD_HASH_SECONDS,
+    PASSWORD_HASH_WAIT_SECONDS,
+)
+
+
+class PasswordHashPool:
+    """
+    Bounded thread pool for Argon2 hashing and verification.
+
+    Argon2 spends tens of milliseconds per call in C code that releases the
+    GIL, so a few threads keep the event loop free during a login burst.
+    At most workers calls run at once; up to queue_limit more wait, and
+    callers beyond that get a 503 rather than an ever longer queue.
+
+    in_flight is only changed on the event loop thread, so it needs no lock.
+    """
+
+    def __init__(self, workers: int, queue_limit: int):
+        self.workers = workers
+        self.queue_limit = queue_limit
+        self.in_flight = 0
+        self._executor: Optional[ThreadPoolExecutor] = None
+
+    @property
+    def queued(self) -> int:
+        """Calls waiting for a worker"""
+        return max(0, self.in_flight - self.workers)
+
+    @property
+    def executor(self) -> ThreadPoolExecutor:
+        if self._executor is None:
+            self._executor = ThreadPoolExecutor(max_workers=self.workers, thread_name_prefix="password-hash")
+        return self._executor
+
+    async def run(self, operation: str, func: Callable, *args):
+        """Run func(*args) on the pool, recording queue wait and run time under operation"""
+        if self.in_flight >= self.workers + self.queue_limit:
+            PASSWORD_HASH_REJECTED.labels(operation).inc()
+            raise HTTPException(
+                status_code=status.HTTP_503_SERVICE_UNAVAILABLE,
+                detail="Too many password operations in progress, retry shortly",
+                headers={"Retry-After": "1"}
+            )
+
+        submitted = time.perf_counter()
+
+        def timed():
+            started = time.perf_counter()
+            result = func(*args)
+            return started, time.perf_counter(), result
+
+        self.in_flight += 1
+        try:
+            started, finished, result = await asyncio.get_running_loop().run_in_executor(self.executor, timed)
+        finally:
+            self.in_flight -= 1
+
+        PASSWORD_HASH_WAIT_SECONDS.labels(operation).observe(started - submitted)
+        PASSWORD_HASH_SECONDS.labels(operation).observe(finished - started)
+        return result
+
+    def shutdown(self):
+        if self._executor is not None:
+            self._executor.shutdown(wait=False)
+            self._executor = None
+
+
+password_pool = PasswordHashPool(settings.password_hash_workers, settings.password_hash_queue_limit)
+
+GaugeCollector(
+    "password_hash_in_flight", "Password operations running or waiting on the pool", (),
+    lambda: {(): password_pool.in_flight}
+)
+GaugeCollector(
+    "password_hash_queue_depth", "Password operations waiting for a pool worker", (),
+    lambda: {(): password_pool.queued}
+)
@@ -1,11 +1,16 @@
+import inspect
 from typing import Optional, Callable
 from fastapi import Depends, HTTPException, status, Request
-from sqlalchemy.orm import Session
+from sqlalchemy import select
+from sqlalchemy.ext.asyncio import AsyncSession
 from app.models.user import User
 from app.models.project_members import ProjectMembers
 from app.schemas.project_members import ProjectMemberRole
 from app.utils.dependencies import get_db
 from app.utils.auth import get_current_user
+from app.utils.replicas import pin_if_recently_written
+from app.utils.lru import MISSING
+from app.utils.role_cache import cached_role, role_scope, scope_version, store_role
 
 
 class PermissionDenied(HTTPException):
@@ -21,6 +26,7 @@ class PolicyEngine:
     """
     Central policy engine for permission checks.
     Defines all permission rules in one place for easy auditing and AI safety.
+    Checks that need the database are coroutines.
     """
     
     @staticmethod
@@ -29,25 +35,51 @@ class PolicyEngine:
         return bool(user.is_admin)
     
     @staticmethod
-    def is_project_leader(user: User, project_id: int, db: Session) -> bool:
+    async def project_role(user: User, project_id: int, db: AsyncSession) -> Optional[str]:
+        """
+        The user's role in a project, leader taking precedence, or None.
+
+        Looked up once per request (memoized on the session), then from the
+        role cache, and only then from project_members.
+        """
+        memo = db.info.setdefault('project_roles', {})
+        key = (user.id, project_id)
+        if key in memo:
+            return memo[key]
+
+        role = await cached_role(user.id, project_id)
+        if role is MISSING:
+            scope = role_scope(user.id, project_id)
+            # Read before the query, so a revocation committed meanwhile
+            # keeps this lookup out of the cache
+            version = await scope_version(scope)
+            await pin_if_recently_written(db, scope)
+            result = await db.execute(select(ProjectMembers.role).where(
+                ProjectMembers.user_id == user.id,
+                ProjectMembers.project_id == project_id,
+                ProjectMembers.is_deleted == False
+            ).distinct())
+            roles = set(result.scalars())
+            if ProjectMemberRole.LEADER.value in roles:
+                role = ProjectMemberRole.LEADER.value
+            elif roles:
+                role = ProjectMemberRole.MEMBER.value
+            else:
+                role = None
+            await store_role(user.id, project_id, role, version)
+
+        memo[key] = role
+        return role
+
+    @staticmethod
+    async def is_project_leader(user: User, project_id: int, db: AsyncSession) -> bool:
         """Check if user is leader of specific project"""
-        membership = db.query(ProjectMembers).filter(
-            ProjectMembers.user_id == user.id,
-            ProjectMembers.project_id == project_id,
-            ProjectMembers.role == ProjectMemberRole.LEADER.value,
-            ProjectMembers.is_deleted == False
-        ).first()
-        return membership is not None
+        return await PolicyEngine.project_role(user, project_id, db) == ProjectMemberRole.LEADER.value
     
     @staticmethod
-    def is_project_member(user: User, project_id: int, db: Session) -> bool:
+    async def is_project_member(user: User, project_id: int, db: AsyncSession) -> bool:
         """Check if user is member of specific project"""
-        membership = db.query(ProjectMembers).filter(
-            ProjectMembers.user_id == user.id,
-            ProjectMembers.project_id == project_id,
-            ProjectMembers.is_deleted == False
-        ).first()
-        return membership is not None
+        return await PolicyEngine.project_role(user, project_id, db) is not None
     
     @staticmethod
     def can_manage_users(user: User) -> bool:
@@ -60,52 +92,52 @@ class PolicyEngine:
         return PolicyEngine.is_admin(user)
     
     @staticmethod
-    def can_update_project(user: User, project_id: int, db: Session) -> bool:
+    async def can_update_project(user: User, project_id: int, db: AsyncSession) -> bool:
         """Check if user can update project"""
         return (PolicyEngine.is_admin(user) or 
-                PolicyEngine.is_project_leader(user, project_id, db))
+                await PolicyEngine.is_project_leader(user, project_id, db))
     
     @staticmethod
-    def can_delete_project(user: User, project_id: int, db: Session) -> bool:
+    async def can_delete_project(user: User, project_id: int, db: AsyncSession) -> bool:
         """Check if user can delete project"""
         return PolicyEngine.is_admin(user)
     
     @staticmethod
-    def can_view_project(user: User, project_id: int, db: Session) -> bool:
+    async def can_view_project(user: User, project_id: int, db: AsyncSession) -> bool:
         """Check if user can view project"""
         return (PolicyEngine.is_admin(user) or 
-                PolicyEngine.is_project_member(user, project_id, db))
+                await PolicyEngine.is_project_member(user, project_id, db))
     
     @staticmethod
-    def can_manage_project_members(user: User, project_id: int, db: Session) -> bool:
+    async def can_manage_project_members(user: User, project_id: int, db: AsyncSession) -> bool:
         """Check if user can add/remove project members"""
         return (PolicyEngine.is_admin(user) or 
-                PolicyEngine.is_project_leader(user, project_id, db))
+                await PolicyEngine.is_project_leader(user, project_id, db))
     
     @staticmethod
-    def can_create_task(user: User, project_id: int, db: Session) -> bool:
+    async def can_create_task(user: User, project_id: int, db: AsyncSession) -> bool:
         """Check if user can create tasks in project"""
         return (PolicyEngine.is_admin(user) or 
-                PolicyEngine.is_project_leader(user, project_id, db))
+                await PolicyEngine.is_project_leader(user, project_id, db))
     
     @staticmethod
-    def can_update_task(user: User, project_id: int, db: Session) -> bool:
+    async def can_update_task(user: User, project_id: int, db: AsyncSession) -> bool:
         """Check if user can update tasks in project"""
         return (PolicyEngine.is_admin(user) or 
-                PolicyEngine.is_project_leader(user, project_id, db) or
-                PolicyEngine.is_project_member(user, project_id, db))
+                await PolicyEngine.is_project_leader(user, project_id, db) or
+                await PolicyEngine.is_project_member(user, project_id, db))
     
     @staticmethod
-    def can_delete_task(user: User, project_id: int, db: Session) -> bool:
+    async def can_delete_task(user: User, project_id: int, db: AsyncSession) -> bool:
         """Check if user can delete tasks"""
         return (PolicyEngine.is_admin(user) or 
-                PolicyEngine.is_project_leader(user, project_id, db))
+                await PolicyEngine.is_project_leader(user, project_id, db))
     
     @staticmethod
-    def can_view_task(user: User, project_id: int, db: Session) -> bool:
+    async def can_view_task(user: User, project_id: int, db: AsyncSession) -> bool:
         """Check if user can view tasks in project"""
         return (PolicyEngine.is_admin(user) or 
-                PolicyEngine.is_project_member(user, project_id, db))
+                await PolicyEngine.is_project_member(user, project_id, db))
 
 
 class RoleChecker:
@@ -129,7 +161,7 @@ class RoleChecker:
         self,
         request: Request,
         current_user: User = Depends(get_current_user),
-        db: Session = Depends(get_db)
+        db: AsyncSession = Depends(get_db)
     ) -> User:
         """Check if user has permission for action"""
         
@@ -169,7 +201,12 @@ class RoleChecker:
         if not permission_check:
             raise PermissionDenied(f"Unknown action: {self.action}")
         
-        if not permission_check():
+        # Checks that query memberships are coroutines
+        allowed = permission_check()
+        if inspect.isawaitable(allowed):
+            allowed = await allowed
+        
+        if not allowed:
             raise PermissionDenied(
                 f"User {current_user.username} does not have permission for action: {self.action}"
             )
@@ -185,25 +222,25 @@ def require_admin(current_user: User = Depends(get_current_user)) -> User:
     return current_user
 
 
-def require_project_leader(
+async def require_project_leader(
     project_id: int,
     current_user: User = Depends(get_current_user),
-    db: Session = Depends(get_db)
+    db: AsyncSession = Depends(get_db)
 ) -> User:
     """Require project leader or admin role"""
     if not (PolicyEngine.is_admin(current_user) or 
-            PolicyEngine.is_project_leader(current_user, project_id, db)):
+            await PolicyEngine.is_project_leader(current_user, project_id, db)):
         raise PermissionDenied("Project leader or admin privileges required")
     return current_user
 
 
-def require_project_member(
+async def require_project_member(
     project_id: int,
     current_user: User = Depends(get_current_user),
-    db: Session = Depends(get_db)
+    db: AsyncSession = Depends(get_db)
 ) -> User:
     """Require project membership"""
     if not (PolicyEngine.is_admin(current_user) or 
-            PolicyEngine.is_project_member(current_user, project_id, db)):
+            await PolicyEngine.is_project_member(current_user, project_id, db)):
         raise PermissionDenied("Project membership required")
     return current_user
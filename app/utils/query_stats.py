@@ -0,0 +1,63 @@
+import contextvars
+import logging
+import time
+from typing import Dict, Optional
+from sqlalchemy import event
+from sqlalchemy.engine import Engine
+
+logger = logging.getLogger(__name__)
+
+
+class QueryStats:
+    """Queries run and time spent in the database during one request"""
+
+    __slots__ = ("count", "seconds", "shapes")
+
+    def __init__(self):
+        self.count = 0
+        self.seconds = 0.0
+        # Executions per SQL string; bound values are parameters, so a query
+        # repeated with different ids keeps the same string
+        self.shapes: Dict[str, int] = {}
+
+    def repeated(self, threshold: int) -> Dict[str, int]:
+        """Statements executed more than threshold times"""
+        return {statement: count for statement, count in self.shapes.items() if count > threshold}
+
+
+_current: contextvars.ContextVar[Optional[QueryStats]] = contextvars.ContextVar("query_stats", default=None)
+
+
+def start_query_stats() -> QueryStats:
+    """Start counting the queries of the current request (or task)"""
+    stats = QueryStats()
+    _current.set(stats)
+    return stats
+
+
+def current_query_stats() -> Optional[QueryStats]:
+    return _current.get()
+
+
+@event.listens_for(Engine, "before_cursor_execute")
+def _before_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+    if _current.get() is not None:
+        conn.info.setdefault('query_start_time', []).append(time.perf_counter())
+
+
+@event.listens_for(Engine, "after_cursor_execute")
+def _after_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+    stats = _current.get()
+    if stats is None:
+        return
+    starts = conn.info.get('query_start_time')
+    if starts:
+        stats.seconds += time.perf_counter() - starts.pop()
+    stats.count += 1
+    stats.shapes[statement] = stats.shapes.get(statement, 0) + 1
+
+
+def warn_repeated_queries(stats: QueryStats, threshold: int, endpoint: str):
+    """Log each statement a request ran more than threshold times, a likely N+1"""
+    for statement, count in stats.repeated(threshold).items():
+        logger.warning(f"Possible N+1: {endpoint} ran the same query {count} times: {statement[:200]}")
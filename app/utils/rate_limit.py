@@ -0,0 +1,99 @@
+import logging
+import math
+from typing import List, Optional, Tuple
+from fastapi import HTTPException, Request, status
+from app.config import settings
+from app.utils.metrics import LOGIN_THROTTLED
+from app.utils.redis_client import get_redis
+
+logger = logging.getLogger(__name__)
+
+# Token buckets guarding password logins
+LOGIN_IP_BUCKET_KEY = "login_bucket:ip:{ip}"
+LOGIN_USERNAME_BUCKET_KEY = "login_bucket:user:{username}"
+
+# Checks every bucket in KEYS against its (capacity, tokens per second) pair
+# in ARGV and takes one token from each only if all of them have one, so a
+# refused attempt drains nothing. Buckets are hashes of tokens and last refill
+# time (Redis server time, in milliseconds) that expire once full again.
+# Returns {0, 0} when allowed, otherwise {1-based index of the first empty
+# bucket, milliseconds until it holds a token}.
+TOKEN_BUCKET_SCRIPT = """
+local now_parts = redis.call('TIME')
+local now = tonumber(now_parts[1]) * 1000 + math.floor(tonumber(now_parts[2]) / 1000)
+local tokens = {}
+for i, key in ipairs(KEYS) do
+    local capacity = tonumber(ARGV[2 * i - 1])
+    local rate = tonumber(ARGV[2 * i]) / 1000
+    local state = redis.call('HMGET', key, 'tokens', 'ts')
+    local available = tonumber(state[1]) or capacity
+    local last = tonumber(state[2]) or now
+    available = math.min(capacity, available + math.max(0, now - last) * rate)
+    if available < 1 then
+        return {i, math.ceil((1 - available) / rate)}
+    end
+    tokens[i] = available
+end
+for i, key in ipairs(KEYS) do
+    local capacity = tonumber(ARGV[2 * i - 1])
+    local rate = tonumber(ARGV[2 * i]) / 1000
+    local left = tokens[i] - 1
+    redis.call('HSET', key, 'tokens', tostring(left), 'ts', now)
+    redis.call('PEXPIRE', key, math.ceil((capacity - left) / rate) + 1000)
+end
+return {0, 0}
+"""
+
+
+async def take_tokens(buckets: List[Tuple[str, int, float]]) -> Tuple[Optional[int], float]:
+    """
+    Take one token from each (key, capacity, tokens per second) bucket in a
+    single atomic round trip.
+
+    Returns (None, 0) when allowed, otherwise the index of the first empty
+    bucket and the seconds until it refills a token.
+    """
+    keys = [key for key, _, _ in buckets]
+    args = [value for _, capacity, rate in buckets for value in (capacity, rate)]
+    script = get_redis().register_script(TOKEN_BUCKET_SCRIPT)
+    empty, wait_ms = await script(keys=keys, args=args)
+    if not empty:
+        return None, 0
+    return int(empty) - 1, int(wait_ms) / 1000
+
+
+async def check_login_rate(request: Request, username: str):
+    """
+    Throttle password logins per client IP and per username, before any
+    password hashing.
+
+    Fails open when Redis is unreachable: the password pool still bounds
+    the hashing load.
+
+    Raises:
+        HTTPException: 429 with Retry-After when a bucket is empty
+    """
+    if not settings.login_rate_limit_enabled:
+        return
+
+    ip = request.client.host if request.client else "unknown"
+    limits = [
+        ("ip", LOGIN_IP_BUCKET_KEY.format(ip=ip),
+         settings.login_ip_burst, settings.login_ip_per_minute / 60),
+        ("username", LOGIN_USERNAME_BUCKET_KEY.format(username=username.strip().lower()),
+         settings.login_username_burst, settings.login_username_per_minute / 60),
+    ]
+
+    try:
+        empty, retry_after = await take_tokens([(key, burst, rate) for _, key, burst, rate in limits])
+    except Exception as e:
+        logger.error(f"Login rate limit check failed: {e}")
+        return
+
+    if empty is not None:
+        LOGIN_THROTTLED.labels(limits[empty][0]).inc()
+        raise HTTPException(
+            status_code=status.HTTP_429_TOO_MANY_REQUESTS,
+            detail="Too many login attempts, retry later",
+            headers={"Retry-After": str(max(1, math.ceil(retry_after)))}
+        )
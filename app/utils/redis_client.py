@@ -1,15 +1,48 @@
+import time
 from redis import asyncio as aioredis
+from redis.asyncio.client import Pipeline
 from typing import AsyncGenerator
 from app.config import settings
+from app.utils.metrics import REDIS_COMMAND_SECONDS
+
+
+class InstrumentedPipeline(Pipeline):
+    """Pipeline timed as a single PIPELINE command when executed"""
+
+    async def execute(self, raise_on_error: bool = True):
+        start = time.perf_counter()
+        try:
+            return await super().execute(raise_on_error)
+        finally:
+            REDIS_COMMAND_SECONDS.labels("PIPELINE").observe(time.perf_counter() - start)
+
+
+class InstrumentedRedis(aioredis.Redis):
+    """Redis client recording the latency of every command"""
+
+    async def execute_command(self, *args, **options):
+        start = time.perf_counter()
+        try:
+            return await super().execute_command(*args, **options)
+        finally:
+            REDIS_COMMAND_SECONDS.labels(args[0]).observe(time.perf_counter() - start)
+
+    def pipeline(self, transaction: bool = True, shard_hint=None) -> InstrumentedPipeline:
+        return InstrumentedPipeline(self.connection_pool, self.response_callbacks, transaction, shard_hint)
+
 
 redis_client: aioredis.Redis = None  
 
-async def get_redis_client() -> AsyncGenerator[aioredis.Redis, None]:
+def get_redis() -> aioredis.Redis:
+    """Return the shared Redis client, creating it on first use"""
     global redis_client
     if redis_client is None:
-        redis_client = aioredis.from_url(settings.redis_url, decode_responses=True)
+        redis_client = InstrumentedRedis.from_url(settings.redis_url, decode_responses=True)
+    return redis_client
+
+async def get_redis_client() -> AsyncGenerator[aioredis.Redis, None]:
     try:
-        yield redis_client
+        yield get_redis()
     finally:
         pass
 
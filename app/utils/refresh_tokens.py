@@ -0,0 +1,109 @@
+import logging
+import time
+from fastapi import HTTPException, status
+from sqlalchemy.ext.asyncio import AsyncSession
+from app.config import settings
+from app.utils.database import after_commit
+from app.utils.redis_client import get_redis
+
+logger = logging.getLogger(__name__)
+
+# Set once a refresh token (by jti) has been exchanged; lives until the token expires
+REFRESH_USED_KEY = "refresh_used:{jti}"
+# Set when a used token is replayed; every token of the login (family) is refused
+REFRESH_REVOKED_KEY = "refresh_revoked:{family}"
+# Families of a user's logins, revoked together when the password changes
+REFRESH_FAMILIES_KEY = "refresh_families:{user_id}"
+
+
+async def consume_refresh_token(claims: dict) -> bool:
+    """
+    Mark a refresh token as exchanged; False when it is a replay.
+
+    A token is a replay when it was already exchanged or its family was
+    revoked. Both are answered in one round trip: SET NX on the token's
+    key and EXISTS on its family's. A replay revokes the family, so a
+    stolen token and the legitimate client's copy both stop working.
+
+    Raises:
+        HTTPException: 503 when Redis cannot be reached
+    """
+    jti, family = claims["jti"], claims["fam"]
+    ttl = max(1, int(claims["exp"] - time.time()))
+
+    try:
+        async with get_redis().pipeline(transaction=False) as pipe:
+            pipe.set(REFRESH_USED_KEY.format(jti=jti), 1, nx=True, ex=ttl)
+            pipe.exists(REFRESH_REVOKED_KEY.format(family=family))
+            first_use, revoked = await pipe.execute()
+    except Exception as e:
+        # Without Redis a replay cannot be told apart from a first use
+        logger.error(f"Refresh token tracking failed: {e}")
+        raise HTTPException(
+            status_code=status.HTTP_503_SERVICE_UNAVAILABLE,
+            detail="Token refresh temporarily unavailable"
+        )
+
+    if not first_use:
+        logger.warning(f"Refresh token replayed; revoking token family {family}")
+        await revoke_refresh_family(family)
+        return False
+    return not revoked
+
+
+async def revoke_refresh_family(family: str):
+    """Refuse every refresh token issued for one login"""
+    await get_redis().set(
+        REFRESH_REVOKED_KEY.format(family=family), 1, ex=settings.refresh_token_expire_days * 86400
+    )
+
+
+async def refresh_family_revoked(family: str) -> bool:
+    """
+    Whether a login's refresh tokens were revoked, for exchanges that do
+    not go through consume_refresh_token.
+
+    Raises:
+        HTTPException: 503 when Redis cannot be reached
+    """
+    try:
+        return bool(await get_redis().exists(REFRESH_REVOKED_KEY.format(family=family)))
+    except Exception as e:
+        logger.error(f"Refresh token tracking failed: {e}")
+        raise HTTPException(
+            status_code=status.HTTP_503_SERVICE_UNAVAILABLE,
+            detail="Token refresh temporarily unavailable"
+        )
+
+
+async def register_refresh_family(user_id: int, family: str):
+    """
+    Record a new login's family under its user, so a password change can
+    revoke it. The set lives as long as the newest login's tokens.
+    """
+    key = REFRESH_FAMILIES_KEY.format(user_id=user_id)
+    try:
+        async with get_redis().pipeline(transaction=True) as pipe:
+            pipe.sadd(key, family)
+            pipe.expire(key, settings.refresh_token_expire_days * 86400)
+            await pipe.execute()
+    except Exception as e:
+        # The login still succeeds; its tokens expire on their own
+        logger.error(f"Refresh token family tracking failed for user {user_id}: {e}")
+
+
+async def revoke_user_refresh_families(user_id: int):
+    """Refuse every refresh token issued for any of a user's logins"""
+    key = REFRESH_FAMILIES_KEY.format(user_id=user_id)
+    # Read and cleared at once, so a login landing meanwhile stays tracked
+    async with get_redis().pipeline(transaction=True) as pipe:
+        pipe.smembers(key)
+        pipe.delete(key)
+        families, _ = await pipe.execute()
+    for family in families:
+        await revoke_refresh_family(family)
+
+
+def revoke_user_refresh_families_after_commit(db: AsyncSession, user_id: int):
+    """Revoke a user's refresh tokens once the credential change has committed"""
+    after_commit(db, lambda: revoke_user_refresh_families(user_id))
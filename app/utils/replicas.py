@@ -0,0 +1,97 @@
+import itertools
+import logging
+from typing import List, Optional
+from sqlalchemy import Select
+from sqlalchemy.orm import Session
+from sqlalchemy.ext.asyncio import AsyncEngine, AsyncSession
+from app.config import settings
+from app.utils.redis_client import get_redis
+
+logger = logging.getLogger(__name__)
+
+# Redis key marking a user or a cached resource as recently written; while
+# it exists, reads concerning it are served by the primary
+RECENT_WRITE_KEY = "recent_write:{scope}"
+
+
+class ReplicaPool:
+    """Read replica engines handed out round-robin"""
+
+    def __init__(self, engines: List[AsyncEngine]):
+        self.engines = engines
+        self._cycle = itertools.cycle(engines) if engines else None
+
+    def __bool__(self) -> bool:
+        return bool(self.engines)
+
+    def next(self) -> Optional[AsyncEngine]:
+        """Next replica in turn, or None when no replicas are configured"""
+        return next(self._cycle) if self._cycle else None
+
+
+class RoutingSession(Session):
+    """
+    Session sending reads to the replica in info['replica'], if any.
+
+    Flushes, DML, SELECT ... FOR UPDATE and any statement that is not a
+    plain SELECT go to the primary (the session's bind). The first of them
+    pins the session to the primary, so a read that follows a write in the
+    same request sees it. info['wrote'] records that the session wrote.
+    """
+
+    def get_bind(self, mapper=None, clause=None, **kw):
+        is_read = isinstance(clause, Select) and clause._for_update_arg is None
+        if self._flushing or not is_read:
+            self.info['wrote'] = True
+            self.info['replica'] = None
+
+        replica = self.info.get('replica')
+        if replica is not None:
+            return replica.sync_engine
+        return super().get_bind(mapper=mapper, clause=clause, **kw)
+
+
+def use_replica(db: AsyncSession, replicas: ReplicaPool):
+    """Route the session's reads to the next replica, if any are configured"""
+    db.info['replica'] = replicas.next()
+
+
+def use_primary(db: AsyncSession):
+    """Serve every further statement of the session from the primary"""
+    db.info['replica'] = None
+
+
+async def mark_recent_write(*scopes: str):
+    """
+    Open the read-your-writes window for each scope (a user or a cached
+    resource), for settings.read_your_writes_seconds.
+    """
+    if not scopes:
+        return
+    try:
+        async with get_redis().pipeline(transaction=False) as pipe:
+            for scope in scopes:
+                pipe.set(RECENT_WRITE_KEY.format(scope=scope), 1, ex=settings.read_your_writes_seconds)
+            await pipe.execute()
+    except Exception as e:
+        logger.error(f"Could not record recent write: {e}")
+
+
+async def has_recent_write(*scopes: str) -> bool:
+    """Whether any scope is inside its read-your-writes window; on Redis errors, assume it is"""
+    try:
+        keys = [RECENT_WRITE_KEY.format(scope=scope) for scope in scopes]
+        return await get_redis().exists(*keys) > 0
+    except Exception as e:
+        logger.error(f"Could not check recent writes: {e}")
+        return True
+
+
+async def pin_if_recently_written(db: AsyncSession, *scopes: str):
+    """
+    Move a replica-routed session to the primary while any scope is inside
+    its read-your-writes window. Call it before reads whose result is cached
+    or versioned beyond this request, so replica lag is never stored.
+    """
+    if db.info.get('replica') is not None and await has_recent_write(*scopes):
+        use_primary(db)
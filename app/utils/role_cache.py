@@ -0,0 +1,138 @@
+import logging
+import time
+from typing import Optional
+from sqlalchemy.ext.asyncio import AsyncSession
+from app.config import settings
+from app.utils.cache import invalidations
+from app.utils.database import after_commit, replica_pool
+from app.utils.etag import VERSION_CHANNEL
+from app.utils.lru import LRUCache, MISSING
+from app.utils.redis_client import get_redis
+from app.utils.replicas import mark_recent_write
+
+logger = logging.getLogger(__name__)
+
+# Redis key caching a user's role in a project; "" caches "not a member"
+PROJECT_ROLE_KEY = "project_role:{user_id}:{project_id}"
+NO_ROLE = ""
+
+# Every invalidation of a cached scope moves its version. A value read from
+# the database is stored only if the version it was read under is still
+# current, so an invalidation landing between the read and the store wins
+# instead of being overwritten by the stale value.
+SCOPE_VERSION_KEY = "{scope}:version"
+
+# Sets KEYS[1] to ARGV[2] for ARGV[3] seconds if the version in KEYS[2] is
+# still ARGV[1] ("" when unset); returns 1 if stored
+GUARDED_SET_SCRIPT = """
+if (redis.call('GET', KEYS[2]) or '') ~= ARGV[1] then
+    return 0
+end
+redis.call('SET', KEYS[1], ARGV[2], 'EX', ARGV[3])
+return 1
+"""
+
+
+async def scope_version(scope: str) -> Optional[str]:
+    """
+    The invalidation version of a cached scope ("" if never invalidated),
+    read before loading it from the database; None if Redis failed.
+    """
+    try:
+        return await get_redis().get(SCOPE_VERSION_KEY.format(scope=scope)) or ""
+    except Exception as e:
+        logger.error(f"Cache version read failed for {scope}: {e}")
+        return None
+
+
+async def store_if_current(scope: str, version: Optional[str], value: str, ttl: int) -> bool:
+    """
+    Cache value under scope unless the scope was invalidated since version
+    was read. Returns whether it was stored; without a version (Redis
+    failed) nothing is.
+    """
+    if version is None:
+        return False
+    try:
+        script = get_redis().register_script(GUARDED_SET_SCRIPT)
+        stored = await script(keys=[scope, SCOPE_VERSION_KEY.format(scope=scope)], args=[version, value, ttl])
+    except Exception as e:
+        logger.error(f"Cache write failed for {scope}: {e}")
+        return False
+    return bool(stored)
+
+
+async def invalidate_scope(scope: str, ttl: int):
+    """
+    Delete a cached scope and move its version, so loads already in flight
+    do not store what they read. Like collection versions, the version
+    comes from the clock and is never reused; it outlives any load by
+    lasting as long as the cached value would. The scope is published on
+    VERSION_CHANNEL, so every worker drops its local copy.
+    """
+    async with get_redis().pipeline(transaction=True) as pipe:
+        pipe.set(SCOPE_VERSION_KEY.format(scope=scope), time.time_ns(), ex=ttl)
+        pipe.delete(scope)
+        pipe.publish(VERSION_CHANNEL, scope)
+        await pipe.execute()
+
+
+# The local tier only absorbs bursts. It is keyed by scope, so the
+# invalidation listener drops revoked roles on every worker; its TTL bounds
+# how long one survives elsewhere should the listener miss the message.
+local_roles = LRUCache(settings.role_cache_size, settings.role_cache_local_ttl)
+invalidations.track(local_roles)
+
+
+def role_scope(user_id: int, project_id: int) -> str:
+    return PROJECT_ROLE_KEY.format(user_id=user_id, project_id=project_id)
+
+
+async def cached_role(user_id: int, project_id: int):
+    """The cached role (None for "not a member"), or MISSING"""
+    scope = role_scope(user_id, project_id)
+    role = local_roles.get(scope)
+    if role is not MISSING:
+        return role
+
+    # An invalidation arriving during the read may concern this role
+    generation = invalidations.generation
+    try:
+        cached = await get_redis().get(scope)
+    except Exception as e:
+        logger.error(f"Role cache read failed: {e}")
+        return MISSING
+    if cached is None:
+        return MISSING
+
+    role = cached or None
+    if invalidations.generation == generation:
+        local_roles.set(scope, role)
+    return role
+
+
+async def store_role(user_id: int, project_id: int, role: Optional[str], version: Optional[str]):
+    """
+    Cache a role looked up from the database in both tiers, unless the
+    membership changed since version (see scope_version) was read.
+    """
+    scope = role_scope(user_id, project_id)
+    generation = invalidations.generation
+    stored = await store_if_current(scope, version, role or NO_ROLE, settings.role_cache_ttl)
+    if stored and invalidations.generation == generation:
+        local_roles.set(scope, role)
+
+
+async def invalidate_role(user_id: int, project_id: int):
+    """Forget a user's cached role in a project"""
+    scope = role_scope(user_id, project_id)
+    local_roles.delete(scope)
+    await invalidate_scope(scope, settings.role_cache_ttl)
+    # The next lookup must not refill the cache from a lagging replica
+    if replica_pool:
+        await mark_recent_write(scope)
+
+
+def invalidate_role_after_commit(db: AsyncSession, user_id: int, project_id: int):
+    """Forget a user's cached role once the membership change has committed"""
+    after_commit(db, lambda: invalidate_role(user_id, project_id))
@@ -1,4 +1,5 @@
 import logging
+import time
 import uuid
 from typing import Optional
 import boto3
@@ -6,6 +7,7 @@ from botocore.exceptions import ClientError, EndpointConnectionError
 from app.utils.database import SessionLocal
 from app.models.file_metadata import FileMetadata
 from app.config import settings
+from app.utils.metrics import S3_REQUEST_SECONDS
 
 logger = logging.getLogger(__name__)
 
@@ -15,6 +17,16 @@ class StorageConnectionError(Exception):
     pass
 
 
+def _start_s3_timer(context, **kwargs):
+    context['metrics_start'] = time.perf_counter()
+
+
+def _record_s3_timer(context, model, **kwargs):
+    start = context.get('metrics_start')
+    if start is not None:
+        S3_REQUEST_SECONDS.labels(model.name).observe(time.perf_counter() - start)
+
+
 class StorageService:
     """S3-compatible storage abstraction using MinIO"""
     
@@ -28,6 +40,9 @@ class StorageService:
             aws_secret_access_key=secret_key or settings.aws_secret_access_key,
             region_name='us-east-1'
         )
+        events = self.s3_client.meta.events
+        events.register('before-call.s3', _start_s3_timer)
+        events.register('after-call.s3', _record_s3_timer)
     
     def ensure_bucket_exists(self) -> None:
         """Create bucket if it doesn't exist"""
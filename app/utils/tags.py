@@ -0,0 +1,29 @@
+from typing import List, Optional
+from app.schemas.project import TagMatch
+
+
+def normalize_tags(values: Optional[List[str]]) -> List[str]:
+    """
+    Normalize tag query values the same way TAG_LIST_EXPRESSION normalizes
+    stored tags: split on commas, trim and lower-case, dropping empties.
+    """
+    if not values:
+        return []
+    tags = {
+        tag.strip().lower()
+        for value in values
+        for tag in value.split(",")
+        if tag.strip()
+    }
+    return sorted(tags)
+
+
+def tag_filter(tag_list_column, tags: List[str], match: TagMatch):
+    """
+    Build a GIN-indexable predicate on a tag_list column.
+
+    any -> tag_list && tags (at least one tag), all -> tag_list @> tags
+    """
+    if match == TagMatch.ALL:
+        return tag_list_column.contains(tags)
+    return tag_list_column.overlap(tags)
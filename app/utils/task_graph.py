@@ -0,0 +1,120 @@
+from typing import Iterable, Optional
+from sqlalchemy import select, exists, func, update
+from sqlalchemy.orm import aliased
+from sqlalchemy.ext.asyncio import AsyncSession
+from app.models.tasks import Task
+from app.models.task_dependencies import TaskDependency
+from app.schemas.task_dependencies import DependencyDirection, DependencyType
+from app.schemas.tasks import TaskStatus
+
+# First key of the two-key advisory locks taken on a project's dependency graph
+GRAPH_LOCK_NAMESPACE = 7301
+
+
+class TaskGraphService:
+    """
+    Queries over the task dependency graph.
+
+    An edge (task_id, depends_on_task_id) means task_id depends on
+    depends_on_task_id. Upstream walks towards what a task depends on,
+    downstream towards the tasks that depend on it.
+
+    tasks.unresolved_blocker_count counts the "blocks" edges of a task whose
+    blocker is still open (not completed and not deleted). Routes keep it
+    current by calling shift_blocker_counts whenever a blocker opens or
+    resolves, and adjust_blocker_count when a blocks edge to an open blocker
+    is added or removed.
+    """
+
+    @staticmethod
+    def is_open_blocker(task_status: Optional[str], is_deleted: bool) -> bool:
+        """Whether a task with this state holds up the tasks it blocks"""
+        return not is_deleted and task_status != TaskStatus.COMPLETED.value
+
+    @staticmethod
+    async def adjust_blocker_count(db: AsyncSession, task_id: int, delta: int):
+        """Add delta to a single task's unresolved blocker count"""
+        await db.execute(
+            update(Task)
+            .where(Task.id == task_id)
+            .values(unresolved_blocker_count=Task.unresolved_blocker_count + delta)
+            .execution_options(synchronize_session=False)
+        )
+
+    @staticmethod
+    async def shift_blocker_counts(db: AsyncSession, blocker_ids: Iterable[int], delta: int):
+        """
+        Add delta to the count of every task blocked by one of blocker_ids;
+        +1 when the blockers reopened, -1 when they resolved.
+
+        A task blocked by several of the blockers moves by delta for each of
+        them, all in one UPDATE ... FROM over the grouped edges. Callers must
+        flush the status change first so the blocker rows stay locked until
+        commit while edges are read.
+        """
+        blocker_ids = list(blocker_ids)
+        if not blocker_ids:
+            return
+
+        blocked = (
+            select(TaskDependency.task_id, func.count().label("edges"))
+            .where(
+                TaskDependency.depends_on_task_id.in_(blocker_ids),
+                TaskDependency.dependency_type == DependencyType.BLOCKS.value
+            )
+            .group_by(TaskDependency.task_id)
+            .subquery()
+        )
+        await db.execute(
+            update(Task)
+            .where(Task.id == blocked.c.task_id)
+            .values(unresolved_blocker_count=Task.unresolved_blocker_count + delta * blocked.c.edges)
+            .execution_options(synchronize_session=False)
+        )
+
+    @staticmethod
+    async def lock_project_graph(db: AsyncSession, project_id: int):
+        """
+        Serialize graph mutations for a project until the transaction ends,
+        so two concurrent inserts cannot close a cycle between them.
+        """
+        await db.execute(select(func.pg_advisory_xact_lock(GRAPH_LOCK_NAMESPACE, project_id)))
+
+    @staticmethod
+    def closure(task_id: int, direction: DependencyDirection, dependency_type: Optional[str] = None):
+        """
+        Build a recursive CTE yielding the ids of every task reachable from
+        task_id in the given direction.
+
+        UNION (not UNION ALL) discards ids already found, so each task is
+        expanded once however many paths lead to it.
+        """
+        if direction == DependencyDirection.UPSTREAM:
+            from_column, to_column = "task_id", "depends_on_task_id"
+        else:
+            from_column, to_column = "depends_on_task_id", "task_id"
+
+        def edges(edge):
+            query = select(getattr(edge, to_column).label("task_id"))
+            if dependency_type is not None:
+                query = query.where(edge.dependency_type == dependency_type)
+            return query
+
+        seed = edges(TaskDependency).where(getattr(TaskDependency, from_column) == task_id)
+        reachable = seed.cte("reachable", recursive=True)
+
+        edge = aliased(TaskDependency)
+        step = edges(edge).join(reachable, getattr(edge, from_column) == reachable.c.task_id)
+        return reachable.union(step)
+
+    @staticmethod
+    async def would_create_cycle(db: AsyncSession, task_id: int, depends_on_task_id: int) -> bool:
+        """
+        Check whether adding task_id -> depends_on_task_id closes a cycle,
+        i.e. whether depends_on_task_id already depends on task_id.
+        """
+        upstream = TaskGraphService.closure(depends_on_task_id, DependencyDirection.UPSTREAM)
+        result = await db.execute(
+            select(exists().where(upstream.c.task_id == task_id))
+        )
+        return result.scalar()
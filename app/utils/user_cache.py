@@ -0,0 +1,86 @@
+import json
+import logging
+from typing import Optional
+from sqlalchemy.ext.asyncio import AsyncSession
+from app.config import settings
+from app.models.user import User
+from app.utils.cache import invalidations
+from app.utils.database import after_commit, replica_pool
+from app.utils.lru import LRUCache, MISSING
+from app.utils.redis_client import get_redis
+from app.utils.replicas import mark_recent_write
+from app.utils.role_cache import invalidate_scope, store_if_current
+
+logger = logging.getLogger(__name__)
+
+# Redis key caching the fields authentication and authorization read
+AUTH_USER_KEY = "auth_user:{user_id}"
+AUTH_FIELDS = ("id", "username", "is_admin", "is_deleted")
+
+# Keyed by scope, so the invalidation listener drops changed users on every worker
+local_users = LRUCache(settings.user_cache_size, settings.user_cache_local_ttl)
+invalidations.track(local_users)
+
+
+def user_scope(user_id: int) -> str:
+    return AUTH_USER_KEY.format(user_id=user_id)
+
+
+def auth_user(fields: dict) -> User:
+    """
+    A transient User carrying only the cached auth fields.
+
+    It is not attached to any session: other columns are None and
+    relationships are empty, so routes needing the full row load it.
+    """
+    return User(**fields)
+
+
+async def cached_user(user_id: int) -> Optional[dict]:
+    """The cached auth fields of a user, or None"""
+    scope = user_scope(user_id)
+    fields = local_users.get(scope)
+    if fields is not MISSING:
+        return fields
+
+    generation = invalidations.generation
+    try:
+        cached = await get_redis().get(scope)
+    except Exception as e:
+        logger.error(f"User cache read failed: {e}")
+        return None
+    if cached is None:
+        return None
+
+    fields = json.loads(cached)
+    if invalidations.generation == generation:
+        local_users.set(scope, fields)
+    return fields
+
+
+async def store_user(user: User, version: Optional[str]):
+    """
+    Cache the auth fields of a user loaded from the database in both tiers,
+    unless the user changed since version (see scope_version) was read.
+    """
+    fields = {name: getattr(user, name) for name in AUTH_FIELDS}
+    scope = user_scope(user.id)
+    generation = invalidations.generation
+    stored = await store_if_current(scope, version, json.dumps(fields), settings.user_cache_ttl)
+    if stored and invalidations.generation == generation:
+        local_users.set(scope, fields)
+
+
+async def invalidate_user(user_id: int):
+    """Forget a user's cached auth fields"""
+    scope = user_scope(user_id)
+    local_users.delete(scope)
+    await invalidate_scope(scope, settings.user_cache_ttl)
+    # The next lookup must not refill the cache from a lagging replica
+    if replica_pool:
+        await mark_recent_write(scope)
+
+
+def invalidate_user_after_commit(db: AsyncSession, user_id: int):
+    """Forget a user's cached auth fields once the change has committed"""
+    after_commit(db, lambda: invalidate_user(user_id))
@@ -1,10 +1,26 @@
+import asyncio
+import datetime
+from types import SimpleNamespace
 import pytest
+import pytest_asyncio
+import fakeredis
+from fastapi import FastAPI
 from fastapi.testclient import TestClient
 from sqlalchemy import create_engine
+from sqlalchemy.ext.asyncio import AsyncSession, async_sessionmaker, create_async_engine
 from sqlalchemy.orm import sessionmaker
+from sqlalchemy.pool import NullPool
 from app.main import app
-from app.utils.database import Base, get_db
+from app.utils.database import Base, async_database_url
+from app.middleware import transaction
+from app.middleware.transaction import TransactionMiddleware
+from app.routes import tasks as task_routes
 from app.config import settings
+from app.utils import cache, redis_client, role_cache, user_cache
+# Every model, so relationships configure whichever test module runs alone
+from app.models import (  # noqa: F401
+    audit_log, file_metadata, project_members, projects, task_dependencies, tasks, user
+)
 import os
 
 # Test database URL
@@ -13,6 +29,12 @@ TEST_DATABASE_URL = os.getenv("TEST_DATABASE_URL", "postgresql://taskflow:taskfl
 engine = create_engine(TEST_DATABASE_URL)
 TestingSessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=engine)
 
+# NullPool: every test runs its own event loop and asyncpg connections cannot cross loops
+async_engine = create_async_engine(async_database_url(TEST_DATABASE_URL), poolclass=NullPool)
+TestingAsyncSessionLocal = async_sessionmaker(
+    bind=async_engine, class_=AsyncSession, autoflush=False, expire_on_commit=False
+)
+
 
 @pytest.fixture(scope="function")
 def db_session():
@@ -26,19 +48,127 @@ def db_session():
         Base.metadata.drop_all(bind=engine)
 
 
+def clear_local_caches():
+    role_cache.local_roles.clear()
+    user_cache.local_users.clear()
+    cache.local_versions.clear()
+    cache.local_values.clear()
+
+
+@pytest.fixture
+def fake_redis(monkeypatch):
+    """fakeredis in place of the Redis client, with every in-process cache tier empty"""
+    client = fakeredis.FakeAsyncRedis(decode_responses=True)
+    monkeypatch.setattr(redis_client, "redis_client", client)
+    clear_local_caches()
+    yield client
+    clear_local_caches()
+
+
+@pytest_asyncio.fixture
+async def listening(fake_redis):
+    """Run the invalidation listener, enabling the local tiers it keeps coherent"""
+    cache.invalidations.start()
+    for _ in range(100):
+        if cache.invalidations.listening:
+            break
+        await asyncio.sleep(0.01)
+    assert cache.invalidations.listening
+    yield
+    await cache.invalidations.stop()
+
+
+@pytest.fixture
+def sqlite_app(monkeypatch, tmp_path):
+    """
+    A bare app behind TransactionMiddleware whose request sessions use a
+    SQLite file. Returns the app, its engine and every session opened.
+    """
+    engine = create_async_engine(f"sqlite+aiosqlite:///{tmp_path / 'app.db'}")
+    factory = async_sessionmaker(bind=engine, class_=AsyncSession, expire_on_commit=False)
+    sessions = []
+
+    def open_session():
+        session = factory()
+        sessions.append(session)
+        return session
+
+    monkeypatch.setattr(transaction, "AsyncSessionLocal", open_session)
+    app = FastAPI()
+    app.add_middleware(TransactionMiddleware)
+    return SimpleNamespace(app=app, engine=engine, sessions=sessions)
+
+
+def assert_max_queries(response, limit: int):
+    """Fail when the request behind response ran more than limit SQL queries"""
+    count = int(response.headers["X-DB-Query-Count"])
+    request = response.request
+    assert count <= limit, f"{request.method} {request.url.path} ran {count} queries, budget is {limit}"
+
+
 @pytest.fixture(scope="function")
-def client(db_session):
-    """Create a test client with database override"""
-    def override_get_db():
-        try:
-            yield db_session
-        finally:
-            pass
-    
-    app.dependency_overrides[get_db] = override_get_db
+def client(db_session, monkeypatch):
+    """Create a test client whose request sessions use the test database"""
+    # TransactionMiddleware opens the session shared by get_db and
+    # get_current_user, so it is pointed at the test database directly
+    monkeypatch.setattr(transaction, "AsyncSessionLocal", TestingAsyncSessionLocal)
+    monkeypatch.setattr(task_routes, "AsyncSessionLocal", TestingAsyncSessionLocal)
+    # Every response reports its query count for assert_max_queries
+    monkeypatch.setattr(settings, "query_stats_headers", True)
     with TestClient(app) as test_client:
         yield test_client
-    app.dependency_overrides.clear()
+
+
+@pytest_asyncio.fixture
+async def async_session(db_session):
+    """AsyncSession on the test database, for calling async helpers directly"""
+    async with TestingAsyncSessionLocal() as session:
+        yield session
+
+
+def seed_project(db_session, name: str, task_count: int, role: str = "member") -> dict:
+    """
+    A project whose one member, with role, is assigned task_count pending
+    tasks. Returns the project id, the task ids in creation order, the
+    membership id and the member's auth headers.
+    """
+    from app.models.user import User
+    from app.models.projects import Project
+    from app.models.project_members import ProjectMembers
+    from app.models.tasks import Task
+    from app.utils.auth import create_access_token
+
+    member = User(username=f"{name}_member", email=f"{name}@test.local", hashed_password="x")
+    db_session.add(member)
+    db_session.flush()
+    project = Project(name=name, description=name, created_by=member.id)
+    db_session.add(project)
+    db_session.flush()
+    membership = ProjectMembers(project_id=project.id, user_id=member.id, role=role)
+    db_session.add(membership)
+    db_session.flush()
+
+    task_rows = [
+        Task(
+            name=f"Task {n}",
+            description=f"Task {n} of {name}",
+            status="pending",
+            priority="medium",
+            due_date=datetime.datetime(2026, 1, 1),
+            project_id=project.id,
+            assigned_to_user=membership.id,
+        )
+        for n in range(task_count)
+    ]
+    db_session.add_all(task_rows)
+    db_session.commit()
+
+    return {
+        "id": project.id,
+        "task_ids": [task.id for task in task_rows],
+        "membership_id": membership.id,
+        "headers": {"Authorization": f"Bearer {create_access_token(data={'sub': str(member.id)})}"},
+    }
 
 
 @pytest.fixture
@@ -66,14 +196,14 @@ def regular_user_token(client, db_session):
     from app.models.user import User
     from app.utils.auth import hash_password, create_access_token
     
-    user = User(
+    regular = User(
         username="user_test",
         email="user@test.local",
         hashed_password=hash_password("user123"),
         is_admin=False
     )
-    db_session.add(user)
+    db_session.add(regular)
     db_session.commit()
-    db_session.refresh(user)
+    db_session.refresh(regular)
     
-    return create_access_token(data={"sub": str(user.id)})
+    return create_access_token(data={"sub": str(regular.id)})
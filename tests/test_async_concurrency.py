@@ -0,0 +1,95 @@
+"""
+Async Database Concurrency Benchmark
+Sends the same slow query through the request path at high concurrency,
+as it ran before the move to AsyncSession (a sync Session queried inside
+an async route, blocking the event loop) and as it runs now (the request
+AsyncSession from TransactionMiddleware), and checks the throughput gain
+"""
+import asyncio
+import time
+import httpx
+import pytest
+from fastapi import Depends, FastAPI
+from sqlalchemy import create_engine, text
+from sqlalchemy.ext.asyncio import AsyncSession, async_sessionmaker, create_async_engine
+from sqlalchemy.orm import sessionmaker
+from app.middleware import transaction
+from app.middleware.transaction import TransactionMiddleware
+from app.utils.database import async_database_url
+from app.utils.dependencies import get_db
+from tests.conftest import TEST_DATABASE_URL
+
+CONCURRENCY = 100
+QUERY_SECONDS = 0.05
+# Matches the production pool settings in app.utils.database
+POOL_SIZE = 5
+MAX_OVERFLOW = 10
+# Minimum throughput gain; the pool allows up to 15 queries in flight, so
+# the ideal is 15x over the serialized sync path
+MIN_SPEEDUP = 5
+
+pytestmark = [pytest.mark.integration, pytest.mark.benchmark]
+
+SLOW_QUERY = text("SELECT pg_sleep(:seconds)")
+
+
+def build_app(sync_sessions: sessionmaker) -> FastAPI:
+    app = FastAPI()
+    app.add_middleware(TransactionMiddleware)
+
+    @app.get("/sync")
+    async def sync_read():
+        # The request path before the change: the async route ran its
+        # queries on a sync Session, holding the event loop for each one
+        db = sync_sessions()
+        try:
+            db.execute(SLOW_QUERY, {"seconds": QUERY_SECONDS})
+        finally:
+            db.close()
+        return {"ok": True}
+
+    @app.get("/async")
+    async def async_read(db: AsyncSession = Depends(get_db)):
+        await db.execute(SLOW_QUERY, {"seconds": QUERY_SECONDS})
+        return {"ok": True}
+
+    return app
+
+
+async def requests_per_second(client: httpx.AsyncClient, path: str) -> float:
+    start = time.perf_counter()
+    responses = await asyncio.gather(*(client.get(path) for _ in range(CONCURRENCY)))
+    elapsed = time.perf_counter() - start
+    assert all(response.status_code == 200 for response in responses)
+    return CONCURRENCY / elapsed
+
+
+class TestAsyncConcurrency:
+    """Throughput of concurrent requests waiting on the database"""
+
+    @pytest.mark.asyncio
+    async def test_async_session_serves_concurrent_requests(self, monkeypatch):
+        sync_engine = create_engine(TEST_DATABASE_URL, pool_size=POOL_SIZE, max_overflow=MAX_OVERFLOW)
+        async_engine = create_async_engine(
+            async_database_url(TEST_DATABASE_URL), pool_size=POOL_SIZE, max_overflow=MAX_OVERFLOW
+        )
+        monkeypatch.setattr(
+            transaction, "AsyncSessionLocal",
+            async_sessionmaker(bind=async_engine, class_=AsyncSession, expire_on_commit=False)
+        )
+        app = build_app(sessionmaker(bind=sync_engine))
+
+        try:
+            transport = httpx.ASGITransport(app=app)
+            async with httpx.AsyncClient(transport=transport, base_url="http://test") as client:
+                sync_rps = await requests_per_second(client, "/sync")
+                async_rps = await requests_per_second(client, "/async")
+        finally:
+            await async_engine.dispose()
+            sync_engine.dispose()
+
+        assert async_rps >= sync_rps * MIN_SPEEDUP, (
+            f"{CONCURRENCY} concurrent {QUERY_SECONDS * 1000:.0f} ms queries: "
+            f"sync session {sync_rps:.0f} req/s, AsyncSession {async_rps:.0f} req/s, "
+            f"expected at least {MIN_SPEEDUP}x"
+        )
@@ -0,0 +1,227 @@
+"""
+Tagged Cache Tests
+Checks that cached values are grouped by tag and invalidated in O(1) by
+bumping a tag version once the transaction commits, and load tests the
+single-flight and stale-while-revalidate paths across expiry boundaries
+"""
+import asyncio
+from types import SimpleNamespace
+import pytest
+import pytest_asyncio
+from sqlalchemy import text
+from sqlalchemy.ext.asyncio import create_async_engine
+from app.config import settings
+from app.utils import cache, metrics, redis_client
+from app.utils.cache import cached, invalidate_after_commit, invalidations, tag_version_key, versioned_key
+from app.utils.etag import TASKS_COLLECTION, bump_collection_version
+from app.utils.query_stats import start_query_stats
+
+pytestmark = pytest.mark.unit
+
+
+# Concurrent requests per round of the load tests
+CONCURRENCY = 50
+
+
+@pytest_asyncio.fixture
+async def engine(tmp_path):
+    engine = create_async_engine(f"sqlite+aiosqlite:///{tmp_path / 'cache.db'}")
+    yield engine
+    await engine.dispose()
+
+
+class Loader:
+    """Loader returning its call count, to tell fresh values from cached ones"""
+
+    def __init__(self):
+        self.calls = 0
+
+    async def __call__(self):
+        self.calls += 1
+        return {"calls": self.calls}
+
+
+async def commit(db):
+    """Run the after_commit callbacks as TransactionMiddleware does"""
+    for callback in db.info.pop("after_commit", []):
+        await callback()
+
+
+class TestTaggedCache:
+    """Reads, tag invalidation and failure handling"""
+
+    @pytest.mark.asyncio
+    async def test_value_is_loaded_once(self, fake_redis):
+        load = Loader()
+        assert await cached("project:1", ["project:1"], 60, load) == {"calls": 1}
+        assert await cached("project:1", ["project:1"], 60, load) == {"calls": 1}
+        assert 0 < await fake_redis.ttl(await versioned_key("project:1", ["project:1"])) <= 60
+
+    @pytest.mark.asyncio
+    async def test_invalidation_waits_for_commit(self, fake_redis):
+        load = Loader()
+        db = SimpleNamespace(info={})
+        await cached("projects:all", ["projects"], 60, load)
+
+        invalidate_after_commit(db, "projects")
+        assert await cached("projects:all", ["projects"], 60, load) == {"calls": 1}
+        await commit(db)
+        assert await cached("projects:all", ["projects"], 60, load) == {"calls": 2}
+
+    @pytest.mark.asyncio
+    async def test_any_tag_invalidates_a_value(self, fake_redis):
+        load = Loader()
+        db = SimpleNamespace(info={})
+        tags = ["user:7:projects", "projects"]
+        await cached("user:7:projects:mine", tags, 60, load)
+        await cached("project:1", ["project:1"], 60, load)
+
+        invalidate_after_commit(db, "projects")
+        await commit(db)
+        assert await cached("user:7:projects:mine", tags, 60, load) == {"calls": 3}
+        # Values not carrying the tag keep their key
+        assert await cached("project:1", ["project:1"], 60, load) == {"calls": 2}
+
+    @pytest.mark.asyncio
+    async def test_tags_share_collection_versions(self, fake_redis):
+        load = Loader()
+        tags = ["project:3:tasks"]
+        assert tag_version_key(tags[0]) == TASKS_COLLECTION.format(project_id=3)
+        await cached("project:3:tasks:stats", tags, 60, load)
+        await bump_collection_version(TASKS_COLLECTION.format(project_id=3))
+        assert await cached("project:3:tasks:stats", tags, 60, load) == {"calls": 2}
+
+    @pytest.mark.asyncio
+    async def test_redis_errors_fall_back_to_loading(self, monkeypatch):
+        class Unavailable:
+            def pipeline(self, transaction=True):
+                raise ConnectionError("redis down")
+
+        monkeypatch.setattr(redis_client, "redis_client", Unavailable())
+        load = Loader()
+        assert await cached("project:1", ["project:1"], 60, load) == {"calls": 1}
+        assert await cached("project:1", ["project:1"], 60, load) == {"calls": 2}
+
+
+class SlowQuery:
+    """Loader running one real query that takes a while, as a listing does"""
+
+    def __init__(self, engine, seconds: float = 0.05):
+        self.engine = engine
+        self.seconds = seconds
+
+    async def __call__(self):
+        async with self.engine.connect() as connection:
+            value = (await connection.execute(text("SELECT 1"))).scalar()
+        await asyncio.sleep(self.seconds)
+        return {"value": value}
+
+
+async def burst(load, **options):
+    """CONCURRENCY simultaneous reads of one cached listing"""
+    return await asyncio.gather(*(
+        cached("projects:all", ["projects"], options.get("ttl", 60), load, options.get("soft_ttl"))
+        for _ in range(CONCURRENCY)
+    ))
+
+
+@pytest.mark.benchmark
+class TestStampedeProtection:
+    """Database queries stay flat when a hot key expires under load"""
+
+    @pytest.mark.asyncio
+    async def test_cold_key_is_computed_once(self, fake_redis, engine):
+        stats = start_query_stats()
+        results = await burst(SlowQuery(engine))
+        assert results == [{"value": 1}] * CONCURRENCY
+        assert stats.count == 1
+
+    @pytest.mark.asyncio
+    async def test_hard_expiry_costs_one_query(self, fake_redis, engine):
+        load = SlowQuery(engine)
+        stats = start_query_stats()
+        counts = []
+        for _ in range(3):
+            await burst(load, ttl=1)
+            counts.append(stats.count)
+            await asyncio.sleep(0.6)
+        # Rounds at 0 s, 0.65 s (cached) and 1.3 s (expired, recomputed once)
+        assert counts == [1, 1, 2]
+
+    @pytest.mark.asyncio
+    async def test_stale_value_is_served_during_refresh(self, fake_redis, engine):
+        load = SlowQuery(engine, seconds=0.5)
+        await burst(load, soft_ttl=0.1)
+        await asyncio.sleep(0.2)
+
+        stats = start_query_stats()
+        loop = asyncio.get_running_loop()
+        start = loop.time()
+        finished = []
+
+        async def read():
+            value = await cached("projects:all", ["projects"], 60, load, 0.1)
+            finished.append(loop.time() - start)
+            return value
+
+        await asyncio.gather(*(read() for _ in range(CONCURRENCY)))
+        assert stats.count == 1
+        # Only the refreshing caller waited for the slow query
+        assert sum(1 for elapsed in finished if elapsed >= 0.5) == 1
+
+    @pytest.mark.asyncio
+    async def test_waiters_recover_when_the_lock_holder_fails(self, fake_redis, monkeypatch):
+        monkeypatch.setattr(settings, "cache_poll_interval", 0.01)
+        calls = []
+
+        async def flaky():
+            calls.append(1)
+            await asyncio.sleep(0.02)
+            if len(calls) == 1:
+                raise RuntimeError("database went away")
+            return {"ok": True}
+
+        results = await asyncio.gather(
+            *(cached("projects:all", ["projects"], 60, flaky) for _ in range(5)), return_exceptions=True
+        )
+        assert sum(isinstance(result, RuntimeError) for result in results) == 1
+        assert results.count({"ok": True}) == 4
+        assert len(calls) == 2
+
+
+class TestLocalTier:
+    """In-process tier kept coherent by pub/sub"""
+
+    @pytest.mark.asyncio
+    async def test_hot_key_needs_no_redis(self, listening, monkeypatch):
+        load = Loader()
+        await cached("project:1", ["project:1"], 60, load)
+        hits = metrics.CACHE_LOOKUPS.labels("local", "hit").value
+
+        class Unreachable:
+            def __getattr__(self, name):
+                raise AssertionError(f"Redis used for {name}")
+
+        monkeypatch.setattr(redis_client, "redis_client", Unreachable())
+        assert await cached("project:1", ["project:1"], 60, load) == {"calls": 1}
+        assert metrics.CACHE_LOOKUPS.labels("local", "hit").value == hits + 1
+        assert 'cache_hit_ratio{tier="local"}' in metrics.render()
+
+    @pytest.mark.asyncio
+    async def test_bump_reaches_local_tier_by_pubsub(self, listening):
+        load = Loader()
+        await cached("projects:all", ["projects"], 60, load)
+        await bump_collection_version(tag_version_key("projects"))
+        for _ in range(100):
+            if cache.local_versions.get(tag_version_key("projects")) is cache.MISSING:
+                break
+            await asyncio.sleep(0.01)
+        assert await cached("projects:all", ["projects"], 60, load) == {"calls": 2}
+
+    @pytest.mark.asyncio
+    async def test_local_tier_is_dropped_when_unsubscribed(self, listening):
+        await cached("project:1", ["project:1"], 60, Loader())
+        assert cache.local_values._entries
+        await invalidations.stop()
+        assert not invalidations.listening
+        assert not cache.local_values._entries and not cache.local_versions._entries
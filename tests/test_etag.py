@@ -0,0 +1,52 @@
+"""
+ETag Tests
+Checks ETag construction, If-None-Match parsing and collection versions
+"""
+import pytest
+from starlette.requests import Request
+from app.utils.etag import make_etag, etag_matches, collection_version, bump_collection_version
+
+pytestmark = pytest.mark.unit
+
+
+def request_with(if_none_match=None) -> Request:
+    headers = [(b"if-none-match", if_none_match.encode())] if if_none_match is not None else []
+    return Request({"type": "http", "method": "GET", "path": "/", "headers": headers})
+
+
+class TestETags:
+    """Strong ETags and If-None-Match matching"""
+
+    def test_etag_is_quoted_and_stable(self):
+        etag = make_etag("task", 1, "2026-01-01")
+        assert etag.startswith('"') and etag.endswith('"')
+        assert etag == make_etag("task", 1, "2026-01-01")
+        assert etag != make_etag("task", 1, "2026-01-02")
+
+    def test_matches_any_listed_etag(self):
+        etag = make_etag("task", 1)
+        assert etag_matches(request_with(f'"other", {etag}'), etag)
+        assert etag_matches(request_with(f"W/{etag}"), etag)
+        assert etag_matches(request_with("*"), etag)
+
+    def test_missing_or_different_header_does_not_match(self):
+        etag = make_etag("task", 1)
+        assert not etag_matches(request_with(), etag)
+        assert not etag_matches(request_with('"other"'), etag)
+
+
+class TestCollectionVersions:
+    """Per-project collection versions in Redis"""
+
+    @pytest.mark.asyncio
+    async def test_version_is_stable_until_bumped(self, fake_redis):
+        first = await collection_version("project:1:tasks:version")
+        assert await collection_version("project:1:tasks:version") == first
+
+        await bump_collection_version("project:1:tasks:version")
+        assert await collection_version("project:1:tasks:version") != first
+
+    @pytest.mark.asyncio
+    async def test_lost_version_does_not_restart_from_zero(self, fake_redis):
+        await bump_collection_version("project:1:tasks:version")
+        assert int(await collection_version("project:1:tasks:version")) > 1
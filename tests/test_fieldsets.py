@@ -0,0 +1,35 @@
+"""
+Sparse Fieldset Tests
+Checks parsing of the fields= parameter and trimming of rows
+"""
+import datetime
+import pytest
+from fastapi import HTTPException
+from app.schemas.tasks import TaskOut
+from app.schemas.project import ProjectOut
+from app.utils.fieldsets import parse_fields, pick_fields
+
+pytestmark = pytest.mark.unit
+
+
+class TestSparseFieldsets:
+    """fields= parsing and serialization"""
+
+    def test_no_fields_means_everything(self):
+        assert parse_fields(None, TaskOut) is None
+
+    def test_fields_follow_model_order_and_include_id(self):
+        assert parse_fields("due_date, name,status", TaskOut) == ["id", "name", "status", "due_date"]
+
+    def test_unknown_field_is_rejected(self):
+        with pytest.raises(HTTPException) as exc:
+            parse_fields("name,search_vector", TaskOut)
+        assert exc.value.status_code == 400
+        assert "search_vector" in exc.value.detail
+
+    def test_project_fields(self):
+        assert parse_fields("name", ProjectOut) == ["name", "id"]
+
+    def test_pick_fields_encodes_values(self):
+        row = {"id": 1, "name": "Ship", "due_date": datetime.datetime(2026, 1, 1), "description": "x" * 10000}
+        assert pick_fields(row, ["id", "due_date"]) == {"id": 1, "due_date": "2026-01-01T00:00:00"}
@@ -0,0 +1,99 @@
+"""
+Login Rate Limit Tests
+Checks the Redis token buckets guarding /users/login and that throttled
+attempts are refused before any password hashing
+"""
+import asyncio
+import pytest
+from fastapi.testclient import TestClient
+from app.config import settings
+from app.routes import user as user_routes
+from app.utils import redis_client
+from app.utils.rate_limit import take_tokens
+
+pytestmark = pytest.mark.unit
+
+
+@pytest.fixture
+def password_checks(monkeypatch):
+    """Count authentication attempts that reach password verification"""
+    checks = []
+
+    async def authenticate_user(db, username, password):
+        checks.append(username)
+        return None
+
+    monkeypatch.setattr(user_routes, "authenticate_user", authenticate_user)
+    return checks
+
+
+@pytest.fixture
+def client(monkeypatch, sqlite_app, fake_redis, password_checks):
+    monkeypatch.setattr(settings, "login_ip_burst", 4)
+    monkeypatch.setattr(settings, "login_username_burst", 2)
+
+    sqlite_app.app.include_router(user_routes.router)
+    with TestClient(sqlite_app.app) as test_client:
+        yield test_client
+
+
+def login(client, username: str):
+    return client.post("/users/login", data={"username": username, "password": "guess"})
+
+
+class TestTokenBucket:
+    """The Lua script behind the limits"""
+
+    @pytest.mark.asyncio
+    async def test_burst_then_refusal(self, fake_redis):
+        bucket = [("bucket:a", 2, 0.01)]
+        assert await take_tokens(bucket) == (None, 0)
+        assert await take_tokens(bucket) == (None, 0)
+        empty, retry_after = await take_tokens(bucket)
+        assert empty == 0
+        assert 0 < retry_after <= 100
+
+    @pytest.mark.asyncio
+    async def test_refused_attempt_drains_no_other_bucket(self, fake_redis):
+        await take_tokens([("bucket:user", 1, 0.01)])
+        empty, _ = await take_tokens([("bucket:ip", 2, 0.01), ("bucket:user", 1, 0.01)])
+        assert empty == 1
+        assert await take_tokens([("bucket:ip", 2, 0.01)]) == (None, 0)
+        assert await take_tokens([("bucket:ip", 2, 0.01)]) == (None, 0)
+
+    @pytest.mark.asyncio
+    async def test_tokens_refill_and_buckets_expire(self, fake_redis):
+        bucket = [("bucket:fast", 1, 20)]
+        await take_tokens(bucket)
+        assert (await take_tokens(bucket))[0] == 0
+        await asyncio.sleep(0.06)
+        assert await take_tokens(bucket) == (None, 0)
+        assert 0 < await fake_redis.pttl("bucket:fast") <= 1050
+
+
+class TestLoginThrottling:
+    """429 with Retry-After before any password is checked"""
+
+    def test_username_limit_applies_before_hashing(self, client, password_checks):
+        assert [login(client, "alice").status_code for _ in range(2)] == [401, 401]
+        response = login(client, "Alice")
+        assert response.status_code == 429
+        assert int(response.headers["Retry-After"]) >= 1
+        assert password_checks == ["alice", "alice"]
+
+    def test_ip_limit_spans_usernames(self, client, password_checks):
+        statuses = [login(client, f"user{i}").status_code for i in range(5)]
+        assert statuses == [401, 401, 401, 401, 429]
+        assert len(password_checks) == 4
+
+    def test_limit_fails_open_without_redis(self, client, monkeypatch, password_checks):
+        class Unavailable:
+            def register_script(self, script):
+                raise ConnectionError("redis down")
+
+        monkeypatch.setattr(redis_client, "redis_client", Unavailable())
+        assert [login(client, "alice").status_code for _ in range(3)] == [401, 401, 401]
+
+    def test_limit_can_be_disabled(self, client, monkeypatch):
+        monkeypatch.setattr(settings, "login_rate_limit_enabled", False)
+        assert {login(client, "alice").status_code for _ in range(3)} == {401}
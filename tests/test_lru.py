@@ -0,0 +1,30 @@
+"""
+LRU Cache Tests
+Checks eviction order and expiry of the bounded in-process cache tier
+"""
+import time
+import pytest
+from app.utils.lru import LRUCache, MISSING
+
+pytestmark = pytest.mark.unit
+
+
+class TestLRUCache:
+    """Bounded, expiring in-process tier"""
+
+    def test_least_recently_used_entry_is_evicted(self):
+        cache = LRUCache(maxsize=2, ttl=60)
+        cache.set("a", 1)
+        cache.set("b", 2)
+        cache.get("a")
+        cache.set("c", 3)
+        assert cache.get("b") is MISSING
+        assert cache.get("a") == 1 and cache.get("c") == 3
+
+    def test_entries_expire(self, monkeypatch):
+        cache = LRUCache(maxsize=2, ttl=5)
+        cache.set("a", None)
+        assert cache.get("a") is None
+        now = time.monotonic()
+        monkeypatch.setattr(time, "monotonic", lambda: now + 6)
+        assert cache.get("a") is MISSING
@@ -0,0 +1,115 @@
+"""
+Metrics Tests
+Checks the Prometheus text output and that requests, pool checkouts and
+Redis commands are recorded under the expected labels
+"""
+import pytest
+import fakeredis
+from fastapi import FastAPI
+from fastapi.testclient import TestClient
+from sqlalchemy import create_engine, text
+from app.middleware.metrics import MetricsMiddleware
+from app.utils.database import TimedQueuePool
+from app.utils.metrics import Counter, Histogram, REGISTRY, _Metric, render, track_pool
+from app.utils.redis_client import InstrumentedRedis
+
+pytestmark = pytest.mark.unit
+
+
+@pytest.fixture
+def registry():
+    """Drop metrics registered by a test once it is done"""
+    registered = list(REGISTRY)
+    yield
+    REGISTRY[:] = registered
+
+
+def sample(name: str, **labels) -> float:
+    """Value of one sample in the rendered output"""
+    label_text = ",".join(f'{key}="{value}"' for key, value in labels.items())
+    prefix = f"{name}{{{label_text}}} " if labels else f"{name} "
+    for line in render().splitlines():
+        if line.startswith(prefix):
+            return float(line[len(prefix):])
+    raise AssertionError(f"{prefix!r} not in output")
+
+
+class TestExposition:
+    """Prometheus text format"""
+
+    def test_histogram_buckets_are_cumulative(self, registry):
+        latency = Histogram("test_latency_seconds", "Test latency", ("op",), buckets=(0.1, 1.0))
+        for value in (0.05, 0.1, 0.5, 3.0):
+            latency.labels("read").observe(value)
+
+        assert sample("test_latency_seconds_bucket", op="read", le="0.1") == 2
+        assert sample("test_latency_seconds_bucket", op="read", le="1.0") == 3
+        assert sample("test_latency_seconds_bucket", op="read", le="+Inf") == 4
+        assert sample("test_latency_seconds_count", op="read") == 4
+        assert sample("test_latency_seconds_sum", op="read") == pytest.approx(3.65)
+
+    def test_label_values_are_escaped(self, registry):
+        Counter("test_events_total", "Test events", ("path",)).labels('a"b\\c').inc()
+        assert 'test_events_total{path="a\\"b\\\\c"} 1' in render()
+
+    def test_children_are_reused(self, registry):
+        events = Counter("test_reuse_total", "Test events", ("kind",))
+        assert events.labels("x") is events.labels("x")
+
+    def test_incomplete_metric_type_fails_on_creation(self, registry):
+        class Unrenderable(_Metric):
+            kind = "gauge"
+
+            def _new_child(self):
+                return None
+
+        with pytest.raises(TypeError):
+            Unrenderable("test_unrenderable", "Missing samples()")
+        assert all(metric.name != "test_unrenderable" for metric in REGISTRY)
+
+
+class TestInstrumentation:
+    """What the middleware and clients record"""
+
+    def test_requests_are_labelled_by_route_template(self):
+        app = FastAPI()
+        app.add_middleware(MetricsMiddleware)
+
+        @app.get("/metrics-test/{item_id}")
+        async def get_item(item_id: int):
+            return {"id": item_id}
+
+        with TestClient(app) as client:
+            client.get("/metrics-test/1")
+            client.get("/metrics-test/2")
+            client.get("/nowhere")
+
+        route = "/metrics-test/{item_id}"
+        assert sample("http_requests_total", method="GET", route=route, status=200) == 2
+        assert sample("http_request_duration_seconds_count", method="GET", route=route, status=200) == 2
+        assert sample("http_requests_total", method="GET", route="unmatched", status=404) >= 1
+
+    def test_pool_checkouts_are_timed(self, tmp_path):
+        engine = create_engine(
+            f"sqlite:///{tmp_path / 'pool.db'}", poolclass=TimedQueuePool, pool_logging_name="test_pool"
+        )
+        track_pool("test_pool", engine)
+        with engine.connect() as connection:
+            connection.execute(text("SELECT 1"))
+            assert sample("db_pool_checked_out", pool="test_pool") == 1
+
+        assert sample("db_pool_wait_seconds_count", pool="test_pool") == 1
+        assert sample("db_pool_checked_out", pool="test_pool") == 0
+        engine.dispose()
+
+    @pytest.mark.asyncio
+    async def test_redis_commands_are_timed(self):
+        fake = fakeredis.FakeAsyncRedis()
+        client = InstrumentedRedis(connection_pool=fake.connection_pool, decode_responses=True)
+        await client.set("metrics:test", 1)
+        async with client.pipeline() as pipe:
+            pipe.incr("metrics:test")
+            await pipe.execute()
+
+        assert sample("redis_command_duration_seconds_count", command="SET") >= 1
+        assert sample("redis_command_duration_seconds_count", command="PIPELINE") >= 1
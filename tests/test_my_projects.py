@@ -0,0 +1,92 @@
+"""
+Caller-Scoped Project Listing Tests
+Checks GET /projects/mine: membership scoping, roles, admin visibility,
+pagination, the status filter and invalidation on membership changes
+"""
+import pytest
+from app.models.user import User
+from app.models.projects import Project
+from app.models.project_members import ProjectMembers
+from app.routes import projects as project_routes
+from app.utils.auth import create_access_token
+from tests.conftest import assert_max_queries
+
+pytestmark = pytest.mark.integration
+
+
+def bearer(user) -> dict:
+    return {"Authorization": f"Bearer {create_access_token(data={'sub': str(user.id)})}"}
+
+
+@pytest.fixture
+def memberships(client, db_session):
+    """Five projects; the member leads one, belongs to two more and is outside the rest"""
+    admin = User(username="mine_admin", email="mine_admin@test.local", hashed_password="x", is_admin=True)
+    member = User(username="mine_member", email="mine_member@test.local", hashed_password="x")
+    db_session.add_all([admin, member])
+    db_session.flush()
+
+    projects = [
+        Project(name=f"Mine {n}", description="Mine", created_by=admin.id, status="archived" if n == 2 else "active")
+        for n in range(5)
+    ]
+    db_session.add_all(projects)
+    db_session.flush()
+
+    db_session.add_all([
+        ProjectMembers(project_id=projects[0].id, user_id=member.id, role="member"),
+        ProjectMembers(project_id=projects[0].id, user_id=member.id, role="leader"),
+        ProjectMembers(project_id=projects[1].id, user_id=member.id, role="member"),
+        ProjectMembers(project_id=projects[2].id, user_id=member.id, role="member"),
+    ])
+    db_session.commit()
+    return {"admin": admin, "member": member, "projects": [project.id for project in projects]}
+
+
+class TestMyProjects:
+    """GET /projects/mine"""
+
+    def test_member_sees_only_their_projects(self, client, memberships):
+        response = client.get("/projects/mine", headers=bearer(memberships["member"]))
+        assert response.status_code == 200
+        projects = response.json()["projects"]
+        ids = memberships["projects"]
+        assert [(p["id"], p["role"]) for p in projects] == [(ids[0], "leader"), (ids[1], "member"), (ids[2], "member")]
+        # user and the join
+        assert_max_queries(response, 2)
+
+    def test_admin_sees_everything(self, client, memberships):
+        response = client.get("/projects/mine", headers=bearer(memberships["admin"]))
+        assert [p["id"] for p in response.json()["projects"]] == memberships["projects"]
+
+    def test_status_filter_and_pagination(self, client, memberships):
+        headers = bearer(memberships["member"])
+        first = client.get("/projects/mine", params={"status": "active", "limit": 1}, headers=headers).json()
+        second = client.get(
+            "/projects/mine", params={"status": "active", "limit": 1, "cursor": first["next_cursor"]}, headers=headers
+        ).json()
+        ids = memberships["projects"]
+        assert [p["id"] for p in first["projects"]] == [ids[0]]
+        assert [p["id"] for p in second["projects"]] == [ids[1]]
+        assert second["next_cursor"] is None
+
+    def test_invalid_query_is_rejected_before_caching(self, client, memberships, monkeypatch):
+        async def uncached(*args, **kwargs):
+            raise AssertionError("invalid query reached the cache")
+
+        monkeypatch.setattr(project_routes, "cached", uncached)
+        headers = bearer(memberships["member"])
+        assert client.get("/projects/mine", params={"status": "anything"}, headers=headers).status_code == 422
+        assert client.get("/projects/mine", params={"cursor": "junk"}, headers=headers).status_code == 400
+
+    def test_new_membership_shows_up(self, client, memberships):
+        member_headers = bearer(memberships["member"])
+        assert len(client.get("/projects/mine", headers=member_headers).json()["projects"]) == 3
+
+        response = client.post(
+            f"/projects/{memberships['projects'][4]}/members",
+            json={"user_id": memberships["member"].id, "role": "member"},
+            headers=bearer(memberships["admin"])
+        )
+        assert response.status_code == 201
+        assert len(client.get("/projects/mine", headers=member_headers).json()["projects"]) == 4
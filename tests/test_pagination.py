@@ -0,0 +1,53 @@
+"""
+Pagination Cursor Tests
+Checks that cursors round-trip their sort keys and that tampered cursors
+are rejected with 400 before reaching the database
+"""
+import base64
+import datetime
+import json
+import pytest
+from fastapi import HTTPException
+from app.utils.pagination import decode_cursor, encode_cursor
+
+pytestmark = pytest.mark.unit
+
+TASK_KEY = (datetime.datetime, int)
+
+
+def forged(payload) -> str:
+    return base64.urlsafe_b64encode(json.dumps(payload).encode()).decode().rstrip("=")
+
+
+class TestCursors:
+    """encode_cursor / decode_cursor"""
+
+    def test_round_trip(self):
+        created_at = datetime.datetime(2026, 1, 1, 12, 30, 15, 123456)
+        assert decode_cursor(encode_cursor(created_at, 42), TASK_KEY) == [created_at, 42]
+        assert decode_cursor(encode_cursor(0.0607927, 7), (float, int)) == [0.0607927, 7]
+
+    @pytest.mark.parametrize("cursor", [
+        "not base64!",
+        forged({"dt": "2026-01-01"}),
+        forged([{"dt": "2026-01-01T00:00:00"}]),
+        forged([1, "x"]),
+        forged([{"dt": "2026-01-01T00:00:00"}, "x"]),
+        forged([{"dt": "yesterday"}, 1]),
+        forged([{"at": "2026-01-01T00:00:00"}, 1]),
+        forged([{"dt": 5}, 1]),
+        forged([{"dt": "2026-01-01T00:00:00+00:00"}, 1]),
+        forged([{"dt": "2026-01-01T00:00:00+02:00"}, 1]),
+        forged([{"dt": "2026-01-01T00:00:00"}, True]),
+        forged([{"dt": "2026-01-01T00:00:00"}, 2 ** 64]),
+    ])
+    def test_tampered_cursor_is_rejected(self, cursor):
+        with pytest.raises(HTTPException) as exc:
+            decode_cursor(cursor, TASK_KEY)
+        assert exc.value.status_code == 400
+        assert exc.value.detail == "Invalid pagination cursor"
+
+    def test_search_rank_must_be_a_number(self):
+        with pytest.raises(HTTPException):
+            decode_cursor(forged(["0.5", 1]), (float, int))
+        assert decode_cursor(forged([1, 1]), (float, int)) == [1, 1]
@@ -0,0 +1,100 @@
+"""
+Query Budget Tests
+Pins the number of SQL queries the main endpoints run, so a new N+1 or an
+extra permission lookup shows up as a test failure
+"""
+import datetime
+import pytest
+from app.models.user import User
+from app.models.projects import Project
+from app.models.project_members import ProjectMembers
+from app.models.tasks import Task
+from app.schemas.project_members import ProjectMemberRole
+from app.utils.auth import create_access_token
+from tests.conftest import assert_max_queries
+
+TASKS = 20
+
+pytestmark = pytest.mark.integration
+
+
+@pytest.fixture
+def project(client, db_session):
+    """A project with a member holding TASKS tasks"""
+    user = User(username="budget_member", email="budget@test.local", hashed_password="x")
+    db_session.add(user)
+    db_session.flush()
+
+    project = Project(name="Budget", description="Budget", created_by=user.id)
+    db_session.add(project)
+    db_session.flush()
+
+    member = ProjectMembers(project_id=project.id, user_id=user.id, role=ProjectMemberRole.MEMBER.value)
+    db_session.add(member)
+    db_session.flush()
+
+    tasks = [
+        Task(
+            name=f"Task {n}",
+            description="Budget",
+            status="pending",
+            priority="medium",
+            due_date=datetime.datetime(2026, 1, 1),
+            project_id=project.id,
+            assigned_to_user=member.id,
+        )
+        for n in range(TASKS)
+    ]
+    db_session.add_all(tasks)
+    db_session.commit()
+
+    return {
+        "id": project.id,
+        "task_id": tasks[0].id,
+        "headers": {"Authorization": f"Bearer {create_access_token(data={'sub': str(user.id)})}"},
+    }
+
+
+class TestQueryBudgets:
+    """Upper bounds on queries per request; the count must not grow with the page size"""
+
+    def test_list_tasks(self, client, project):
+        response = client.get(f"/projects/{project['id']}/tasks", headers=project["headers"])
+        assert response.status_code == 200
+        # user, role, page
+        assert_max_queries(response, 3)
+
+    def test_get_project(self, client, project):
+        response = client.get(f"/projects/{project['id']}", headers=project["headers"])
+        assert response.status_code == 200
+        # user, role, row (uncached)
+        assert_max_queries(response, 3)
+
+        # The ETag comes from the cache tag version, so a revalidation and a
+        # cached 200 run no project queries at all
+        revalidated = client.get(
+            f"/projects/{project['id']}",
+            headers={**project["headers"], "If-None-Match": response.headers["ETag"]}
+        )
+        assert revalidated.status_code == 304
+        # user, role
+        assert_max_queries(revalidated, 2)
+        repeated = client.get(f"/projects/{project['id']}", headers=project["headers"])
+        assert repeated.status_code == 200
+        assert_max_queries(repeated, 2)
+
+    def test_list_project_members(self, client, project):
+        response = client.get(f"/projects/{project['id']}/members", headers=project["headers"])
+        assert response.status_code == 200
+        # user, role, members, their project
+        assert_max_queries(response, 4)
+
+    def test_update_task_status(self, client, project):
+        response = client.patch(
+            f"/projects/{project['id']}/tasks/{project['task_id']}/status",
+            headers=project["headers"],
+            json={"status": "in-progress"}
+        )
+        assert response.status_code == 200
+        # user, role, task, assignee, update, audit log, refresh
+        assert_max_queries(response, 8)
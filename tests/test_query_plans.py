@@ -0,0 +1,145 @@
+"""
+Query Plan Regression Tests
+Seeds a large synthetic dataset and checks via EXPLAIN that every filter
+combination supported by list_tasks is answered from an index
+"""
+import datetime
+import pytest
+from sqlalchemy import insert, select, text, tuple_
+from sqlalchemy.dialects import postgresql
+from app.models.user import User
+from app.models.projects import Project
+from app.models.project_members import ProjectMembers
+from app.models.tasks import Task
+from app.routes.tasks import _filter_tasks
+from app.schemas.tasks import TaskStatus, TaskPriority
+from app.utils.database import Base
+from app.utils.pagination import decode_cursor, encode_cursor
+from tests.conftest import engine, TestingSessionLocal
+
+PROJECTS = 40
+TASKS_PER_PROJECT = 2000
+MEMBERS_PER_PROJECT = 10
+BASE_DATE = datetime.datetime(2026, 1, 1)
+
+pytestmark = pytest.mark.integration
+
+
+@pytest.fixture(scope="module")
+def seeded_project():
+    """Seed PROJECTS * TASKS_PER_PROJECT tasks and return one project's ids"""
+    Base.metadata.create_all(bind=engine)
+    session = TestingSessionLocal()
+    try:
+        users = [
+            User(username=f"seed{i}", email=f"seed{i}@test.local", hashed_password="x")
+            for i in range(MEMBERS_PER_PROJECT)
+        ]
+        session.add_all(users)
+        session.flush()
+
+        projects = [Project(name=f"Seed {i}", description="Seed", created_by=users[0].id) for i in range(PROJECTS)]
+        session.add_all(projects)
+        session.flush()
+
+        members = [
+            ProjectMembers(project_id=project.id, user_id=user.id, role="member")
+            for project in projects
+            for user in users
+        ]
+        session.add_all(members)
+        session.flush()
+
+        statuses = [s.value for s in TaskStatus]
+        priorities = [p.value for p in TaskPriority]
+        for project_index, project in enumerate(projects):
+            project_members = members[project_index * MEMBERS_PER_PROJECT:(project_index + 1) * MEMBERS_PER_PROJECT]
+            rows = [
+                {
+                    "project_id": project.id,
+                    "name": f"Task {n}",
+                    "description": "Synthetic task",
+                    "status": statuses[n % len(statuses)],
+                    "priority": priorities[n % len(priorities)],
+                    "due_date": BASE_DATE + datetime.timedelta(hours=n),
+                    "assigned_to_user": project_members[n % MEMBERS_PER_PROJECT].id,
+                    "created_at": BASE_DATE + datetime.timedelta(minutes=n),
+                    "is_deleted": n % 50 == 0,
+                    "unresolved_blocker_count": 1 if n % 7 == 0 else 0,
+                }
+                for n in range(TASKS_PER_PROJECT)
+            ]
+            session.execute(insert(Task), rows)
+        session.commit()
+        session.execute(text("ANALYZE tasks"))
+        session.commit()
+
+        yield {"project_id": projects[0].id, "assignee_id": members[0].id}
+    finally:
+        session.close()
+        Base.metadata.drop_all(bind=engine)
+
+
+def explain(session, query) -> str:
+    """Return the text of the Postgres plan chosen for a query"""
+    compiled = query.compile(dialect=postgresql.dialect())
+    rows = session.connection().exec_driver_sql(f"EXPLAIN {compiled}", compiled.params).all()
+    return "\n".join(row[0] for row in rows)
+
+
+FILTER_COMBINATIONS = {
+    "no_filters": {},
+    "status": {"status_filter": TaskStatus.IN_PROGRESS},
+    "priority": {"priority": TaskPriority.HIGH},
+    "assigned_to": {"assigned_to": "assignee"},
+    "due_before": {"due_before": "2026-01-02"},
+    "due_after": {"due_after": "2026-03-20"},
+    "due_range": {"due_after": "2026-01-10", "due_before": "2026-01-12"},
+    "status_priority": {"status_filter": TaskStatus.PENDING, "priority": TaskPriority.LOW},
+    "status_assigned_to": {"status_filter": TaskStatus.COMPLETED, "assigned_to": "assignee"},
+    "blocked": {"blocked": True},
+    "not_blocked_status": {"blocked": False, "status_filter": TaskStatus.PENDING},
+    "all_filters": {
+        "status_filter": TaskStatus.PENDING,
+        "priority": TaskPriority.MEDIUM,
+        "assigned_to": "assignee",
+        "due_after": "2026-01-05",
+        "due_before": "2026-02-05",
+    },
+}
+
+
+class TestTaskListingPlans:
+    """Every list_tasks filter combination must avoid a sequential scan"""
+
+    @pytest.mark.parametrize("filters", FILTER_COMBINATIONS.values(), ids=FILTER_COMBINATIONS.keys())
+    def test_filter_combination_uses_index(self, seeded_project, filters):
+        filters = {
+            key: seeded_project["assignee_id"] if value == "assignee" else value
+            for key, value in filters.items()
+        }
+        session = TestingSessionLocal()
+        try:
+            query = _filter_tasks(select(Task), seeded_project["project_id"], **filters)
+            query = query.order_by(Task.created_at, Task.id).limit(51)
+            plan = explain(session, query)
+        finally:
+            session.close()
+
+        assert "Seq Scan on tasks" not in plan, plan
+        assert "Index" in plan, plan
+
+    def test_cursor_page_uses_index(self, seeded_project):
+        cursor = encode_cursor(BASE_DATE + datetime.timedelta(minutes=1500), 0)
+        last_created_at, last_id = decode_cursor(cursor, (datetime.datetime, int))
+        session = TestingSessionLocal()
+        try:
+            query = _filter_tasks(select(Task), seeded_project["project_id"])
+            query = query.filter(tuple_(Task.created_at, Task.id) > tuple_(last_created_at, last_id))
+            query = query.order_by(Task.created_at, Task.id).limit(51)
+            plan = explain(session, query)
+        finally:
+            session.close()
+
+        assert "Seq Scan on tasks" not in plan, plan
+        assert "ix_tasks_project_active" in plan, plan
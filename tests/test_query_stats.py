@@ -0,0 +1,60 @@
+"""
+Query Stats Tests
+Checks the per-request query counter, its response headers and the
+repeated-statement (N+1) warning against a SQLite database
+"""
+import logging
+import pytest
+from fastapi import FastAPI
+from fastapi.testclient import TestClient
+from sqlalchemy import text
+from sqlalchemy.ext.asyncio import create_async_engine
+from app.config import settings
+from app.middleware.query_stats import QueryStatsMiddleware
+
+pytestmark = pytest.mark.unit
+
+
+@pytest.fixture
+def client(tmp_path, monkeypatch):
+    monkeypatch.setattr(settings, "query_stats_headers", True)
+    monkeypatch.setattr(settings, "n_plus_one_threshold", 3)
+    engine = create_async_engine(f"sqlite+aiosqlite:///{tmp_path / 'stats.db'}")
+
+    app = FastAPI()
+    app.add_middleware(QueryStatsMiddleware)
+
+    @app.get("/queries/{count}")
+    async def run_queries(count: int):
+        async with engine.connect() as connection:
+            for n in range(count):
+                await connection.execute(text("SELECT :n"), {"n": n})
+        return {"ran": count}
+
+    with TestClient(app) as test_client:
+        yield test_client
+
+
+class TestQueryStats:
+    """Per-request query counting"""
+
+    def test_headers_report_query_count(self, client):
+        response = client.get("/queries/2")
+        assert response.headers["X-DB-Query-Count"] == "2"
+        assert response.headers["Server-Timing"].startswith("db;dur=")
+        assert 'desc="2 queries"' in response.headers["Server-Timing"]
+
+    def test_counts_are_per_request(self, client):
+        client.get("/queries/3")
+        assert client.get("/queries/1").headers["X-DB-Query-Count"] == "1"
+
+    def test_headers_are_off_by_default(self, client, monkeypatch):
+        monkeypatch.setattr(settings, "query_stats_headers", False)
+        assert "X-DB-Query-Count" not in client.get("/queries/1").headers
+
+    def test_repeated_statement_is_logged(self, client, caplog):
+        with caplog.at_level(logging.WARNING, logger="app.utils.query_stats"):
+            client.get("/queries/3")
+            assert not caplog.records
+            client.get("/queries/4")
+        assert "ran the same query 4 times" in caplog.text
@@ -0,0 +1,123 @@
+"""
+Read Replica Routing Tests
+Uses two SQLite files as primary and replica to check that safe reads go
+to a replica, writes and the reads after them go to the primary, and that
+a user's read-your-writes window keeps their reads on the primary
+"""
+import pytest
+from fastapi import Depends
+from fastapi.testclient import TestClient
+from sqlalchemy import column, create_engine, select, table, text
+from sqlalchemy.ext.asyncio import AsyncSession, async_sessionmaker, create_async_engine
+from app.middleware import transaction
+from app.utils.auth import create_access_token
+from app.utils.dependencies import get_db
+from app.utils.replicas import ReplicaPool, RoutingSession, has_recent_write, mark_recent_write, use_replica
+
+pytestmark = pytest.mark.unit
+
+
+def seed(path, label):
+    """Create a notes table holding one row naming the database"""
+    engine = create_engine(f"sqlite:///{path}")
+    with engine.begin() as connection:
+        connection.execute(text("CREATE TABLE notes (body TEXT)"))
+        connection.execute(text("INSERT INTO notes VALUES (:label)"), {"label": label})
+    engine.dispose()
+
+
+@pytest.fixture
+def databases(tmp_path):
+    """A primary and two replicas, each answering with its own name"""
+    names = ["primary", "replica-a", "replica-b"]
+    engines = {}
+    for name in names:
+        path = tmp_path / f"{name}.db"
+        seed(path, name)
+        engines[name] = create_async_engine(f"sqlite+aiosqlite:///{path}")
+    factory = async_sessionmaker(
+        bind=engines["primary"], class_=AsyncSession, sync_session_class=RoutingSession, expire_on_commit=False
+    )
+    return {
+        "factory": factory,
+        "engines": engines,
+        "replicas": ReplicaPool([engines["replica-a"], engines["replica-b"]]),
+    }
+
+
+async def source(db) -> str:
+    result = await db.execute(select(column("body")).select_from(table("notes")).limit(1))
+    return result.scalar()
+
+
+class TestRoutingSession:
+    """Statement routing inside one session"""
+
+    def test_replicas_are_used_round_robin(self, databases):
+        replicas = databases["replicas"]
+        engines = databases["engines"]
+        assert [replicas.next() for _ in range(3)] == [engines["replica-a"], engines["replica-b"], engines["replica-a"]]
+        assert ReplicaPool([]).next() is None
+        assert not ReplicaPool([])
+
+    @pytest.mark.asyncio
+    async def test_reads_use_replica_until_first_write(self, databases):
+        async with databases["factory"]() as db:
+            use_replica(db, databases["replicas"])
+            assert await source(db) == "replica-a"
+
+            await db.execute(text("INSERT INTO notes VALUES ('written')"))
+            assert db.info["wrote"]
+            assert await source(db) == "primary"
+            await db.commit()
+
+    @pytest.mark.asyncio
+    async def test_without_replica_everything_uses_primary(self, databases):
+        async with databases["factory"]() as db:
+            assert await source(db) == "primary"
+
+    @pytest.mark.asyncio
+    async def test_recent_write_window(self, fake_redis):
+        assert not await has_recent_write("user:1")
+        await mark_recent_write("user:1")
+        assert await has_recent_write("user:1", "user:2")
+        assert 0 < await fake_redis.ttl("recent_write:user:1") <= 5
+
+
+@pytest.fixture
+def client(sqlite_app, databases, fake_redis, monkeypatch):
+    monkeypatch.setattr(transaction, "AsyncSessionLocal", databases["factory"])
+    monkeypatch.setattr(transaction, "replica_pool", databases["replicas"])
+    app = sqlite_app.app
+
+    @app.get("/source")
+    async def read(db: AsyncSession = Depends(get_db)):
+        return {"source": await source(db)}
+
+    @app.post("/notes")
+    async def write(db: AsyncSession = Depends(get_db)):
+        await db.execute(text("INSERT INTO notes VALUES ('written')"))
+        return {"source": await source(db)}
+
+    with TestClient(app) as test_client:
+        yield test_client
+
+
+def auth(user_id: int) -> dict:
+    return {"Authorization": f"Bearer {create_access_token(data={'sub': str(user_id)})}"}
+
+
+class TestReplicaRequests:
+    """Per-request routing through TransactionMiddleware"""
+
+    def test_get_alternates_between_replicas(self, client):
+        sources = [client.get("/source").json()["source"] for _ in range(2)]
+        assert sources == ["replica-a", "replica-b"]
+
+    def test_writes_use_primary(self, client):
+        assert client.post("/notes", headers=auth(1)).json()["source"] == "primary"
+
+    def test_writer_reads_own_writes_others_use_replica(self, client):
+        client.post("/notes", headers=auth(1))
+        assert client.get("/source", headers=auth(1)).json()["source"] == "primary"
+        assert client.get("/source", headers=auth(2)).json()["source"].startswith("replica")
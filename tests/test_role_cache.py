@@ -0,0 +1,120 @@
+"""
+Role Cache Tests
+Checks the in-process and Redis tiers, their invalidation on every worker,
+and that PolicyEngine answers every policy of a request from one project
+role lookup
+"""
+import asyncio
+import pytest
+import pytest_asyncio
+from sqlalchemy import insert
+from sqlalchemy.ext.asyncio import AsyncSession, async_sessionmaker, create_async_engine
+from app.models.user import User
+from app.models.project_members import ProjectMembers
+from app.utils import role_cache
+from app.utils.permissions import PolicyEngine
+from app.utils.query_stats import start_query_stats
+from app.utils.lru import MISSING
+from app.utils.role_cache import (
+    cached_role, invalidate_role, invalidate_scope, role_scope, scope_version, store_role
+)
+
+pytestmark = pytest.mark.unit
+
+
+@pytest_asyncio.fixture
+async def session_factory(tmp_path):
+    engine = create_async_engine(f"sqlite+aiosqlite:///{tmp_path / 'roles.db'}")
+    async with engine.begin() as connection:
+        await connection.run_sync(ProjectMembers.__table__.create)
+        await connection.execute(insert(ProjectMembers), [
+            {"project_id": 1, "user_id": 1, "role": "member", "is_deleted": False},
+            {"project_id": 1, "user_id": 1, "role": "leader", "is_deleted": False},
+            {"project_id": 2, "user_id": 1, "role": "member", "is_deleted": False},
+        ])
+    yield async_sessionmaker(bind=engine, class_=AsyncSession, expire_on_commit=False)
+    await engine.dispose()
+
+
+class TestRoleCache:
+    """Redis tier and invalidation"""
+
+    @pytest.mark.asyncio
+    async def test_non_membership_is_cached(self, fake_redis):
+        assert await cached_role(1, 9) is MISSING
+        await store_role(1, 9, None, "")
+        role_cache.local_roles.clear()
+        assert await cached_role(1, 9) is None
+        assert await fake_redis.ttl("project_role:1:9") > 0
+
+    @pytest.mark.asyncio
+    async def test_invalidation_clears_both_tiers(self, fake_redis):
+        await store_role(1, 1, "leader", "")
+        await invalidate_role(1, 1)
+        assert await cached_role(1, 1) is MISSING
+
+    @pytest.mark.asyncio
+    async def test_role_read_before_invalidation_is_not_stored(self, fake_redis):
+        version = await scope_version("project_role:1:1")
+        await invalidate_role(1, 1)
+        await store_role(1, 1, "leader", version)
+        assert await cached_role(1, 1) is MISSING
+        # A lookup starting after the invalidation is cached again
+        await store_role(1, 1, None, await scope_version("project_role:1:1"))
+        assert await cached_role(1, 1) is None
+
+    @pytest.mark.asyncio
+    async def test_invalidation_reaches_other_workers(self, listening):
+        await store_role(1, 1, "leader", "")
+        assert role_cache.local_roles.get(role_scope(1, 1)) == "leader"
+        # Another worker removes the membership: only the message reaches this one
+        await invalidate_scope(role_scope(1, 1), 300)
+        for _ in range(100):
+            if role_cache.local_roles.get(role_scope(1, 1)) is MISSING:
+                break
+            await asyncio.sleep(0.01)
+        assert await cached_role(1, 1) is MISSING
+
+
+class TestPolicyRoleLookup:
+    """One role lookup per user and project"""
+
+    @pytest.mark.asyncio
+    async def test_leader_takes_precedence(self, fake_redis, session_factory):
+        user = User(id=1, is_admin=False)
+        async with session_factory() as db:
+            assert await PolicyEngine.project_role(user, 1, db) == "leader"
+            assert await PolicyEngine.project_role(user, 2, db) == "member"
+            assert await PolicyEngine.project_role(user, 3, db) is None
+
+    @pytest.mark.asyncio
+    async def test_policies_share_one_query(self, fake_redis, session_factory):
+        user = User(id=1, is_admin=False)
+        stats = start_query_stats()
+        async with session_factory() as db:
+            assert await PolicyEngine.can_update_task(user, 2, db)
+            assert await PolicyEngine.can_view_task(user, 2, db)
+            assert not await PolicyEngine.can_create_task(user, 2, db)
+        assert stats.count == 1
+
+        async with session_factory() as db:
+            assert await PolicyEngine.can_view_project(user, 2, db)
+        assert stats.count == 1
+
+    @pytest.mark.asyncio
+    async def test_removal_during_lookup_is_not_undone(self, fake_redis, session_factory):
+        user = User(id=1, is_admin=False)
+        async with session_factory() as db:
+            read = db.execute
+
+            async def read_then_remove(*args, **kwargs):
+                # remove_project_member commits and invalidates between the
+                # membership query and the cache store
+                result = await read(*args, **kwargs)
+                await invalidate_role(1, 1)
+                return result
+
+            db.execute = read_then_remove
+            assert await PolicyEngine.project_role(user, 1, db) == "leader"
+        assert await cached_role(1, 1) is MISSING
+        assert await fake_redis.get("project_role:1:1") is None
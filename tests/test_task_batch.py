@@ -0,0 +1,119 @@
+"""
+Task Batch Tests
+Checks POST and PATCH /projects/{project_id}/tasks:batch: per-item errors,
+partial updates keeping untouched columns, and one audit row per change
+"""
+import pytest
+from app.models.audit_log import AuditLog
+from app.models.tasks import Task
+from tests.conftest import seed_project
+
+pytestmark = pytest.mark.integration
+
+
+@pytest.fixture
+def project(client, db_session):
+    return seed_project(db_session, "batch", 3, role="leader")
+
+
+def new_task(project, assignee: int, name: str) -> dict:
+    return {
+        "name": name,
+        "description": "Created in a batch",
+        "priority": "low",
+        "due_date": "2026-02-01T00:00:00",
+        "project_id": project["id"],
+        "assigned_to_user": assignee,
+    }
+
+
+def audit_rows(db_session, task_ids, action: str):
+    db_session.expire_all()
+    rows = db_session.query(AuditLog).filter(
+        AuditLog.table_name == "tasks",
+        AuditLog.action == action,
+        AuditLog.record_id.in_(task_ids)
+    ).all()
+    return {(row.record_id, row.field_name, row.old_value, row.new_value) for row in rows}
+
+
+class TestBatchCreate:
+    """POST /projects/{project_id}/tasks:batch"""
+
+    def test_valid_items_are_created_and_bad_ones_reported(self, client, db_session, project):
+        response = client.post(
+            f"/projects/{project['id']}/tasks:batch",
+            json={"tasks": [
+                new_task(project, project["membership_id"], "First"),
+                new_task(project, 999999, "Orphan"),
+                new_task(project, project["membership_id"], "Second"),
+            ]},
+            headers=project["headers"]
+        )
+        assert response.status_code == 201
+        body = response.json()
+        assert [task["name"] for task in body["tasks"]] == ["First", "Second"]
+        assert all(task["status"] == "pending" for task in body["tasks"])
+        assert [error["index"] for error in body["errors"]] == [1]
+
+        created = [task["id"] for task in body["tasks"]]
+        assert {row[0] for row in audit_rows(db_session, created, "INSERT")} == set(created)
+
+
+class TestBatchUpdate:
+    """PATCH /projects/{project_id}/tasks:batch"""
+
+    def test_partial_fields_keep_untouched_columns(self, client, db_session, project):
+        first, second, third = project["task_ids"]
+        response = client.patch(
+            f"/projects/{project['id']}/tasks:batch",
+            json={"tasks": [
+                {"id": first, "status": "in-progress"},
+                {"id": second, "priority": "high", "name": "Renamed"},
+                {"id": third, "priority": "medium"},
+                {"id": 999999, "name": "Missing"},
+            ]},
+            headers=project["headers"]
+        )
+        assert response.status_code == 200
+        body = response.json()
+        assert [error["index"] for error in body["errors"]] == [3]
+        assert {task["id"] for task in body["tasks"]} == {first, second, third}
+
+        db_session.expire_all()
+        tasks = {task.id: task for task in db_session.query(Task).filter(Task.id.in_(project["task_ids"]))}
+        # coalesce() keeps every column an item left out
+        assert (tasks[first].status, tasks[first].priority, tasks[first].name) == ("in-progress", "medium", "Task 0")
+        assert (tasks[second].status, tasks[second].priority, tasks[second].name) == ("pending", "high", "Renamed")
+        assert tasks[second].description == "Task 1 of batch"
+        assert tasks[second].assigned_to_user == project["membership_id"]
+        assert (tasks[third].priority, tasks[third].name) == ("medium", "Task 2")
+
+    def test_one_audit_row_per_changed_field(self, client, db_session, project):
+        first, second, third = project["task_ids"]
+        client.patch(
+            f"/projects/{project['id']}/tasks:batch",
+            json={"tasks": [
+                {"id": first, "status": "in-progress"},
+                {"id": second, "priority": "high", "name": "Renamed"},
+                # Same value as stored: nothing changes, nothing is audited
+                {"id": third, "priority": "medium"},
+            ]},
+            headers=project["headers"]
+        )
+        assert audit_rows(db_session, project["task_ids"], "UPDATE") == {
+            (first, "status", "pending", "in-progress"),
+            (second, "priority", "medium", "high"),
+            (second, "name", "Task 1", "Renamed"),
+        }
+
+    def test_duplicate_ids_are_reported(self, client, project):
+        first = project["task_ids"][0]
+        response = client.patch(
+            f"/projects/{project['id']}/tasks:batch",
+            json={"tasks": [{"id": first, "name": "Once"}, {"id": first, "name": "Twice"}]},
+            headers=project["headers"]
+        )
+        body = response.json()
+        assert [task["name"] for task in body["tasks"]] == ["Once"]
+        assert body["errors"] == [{"index": 1, "detail": "Task appears more than once in the batch"}]
@@ -0,0 +1,80 @@
+"""
+Task Export Tests
+Streams a project spanning several export batches as NDJSON and CSV and
+checks every task arrives once, in order, with one CSV header
+"""
+import csv
+import io
+import json
+import pytest
+from app.routes import tasks as task_routes
+from app.schemas.tasks import TaskOut
+from tests.conftest import seed_project
+
+TASKS = 7
+BATCH_SIZE = 3
+
+pytestmark = pytest.mark.integration
+
+
+@pytest.fixture
+def project(client, db_session):
+    return seed_project(db_session, "export", TASKS)
+
+
+@pytest.fixture
+def chunks(monkeypatch):
+    """Shrink export batches and record the body chunks as they are streamed"""
+    monkeypatch.setattr(task_routes, "EXPORT_BATCH_SIZE", BATCH_SIZE)
+    recorded = []
+    stream = task_routes._stream_task_export
+
+    async def recording_stream(*args, **kwargs):
+        async for chunk in stream(*args, **kwargs):
+            recorded.append(chunk)
+            yield chunk
+
+    monkeypatch.setattr(task_routes, "_stream_task_export", recording_stream)
+    return recorded
+
+
+def export(client, project, export_format: str):
+    response = client.get(
+        f"/projects/{project['id']}/tasks/export", params={"format": export_format}, headers=project["headers"]
+    )
+    assert response.status_code == 200
+    return response
+
+
+class TestTaskExport:
+    """GET /projects/{project_id}/tasks/export"""
+
+    def test_ndjson_spans_several_batches(self, client, project, chunks):
+        response = export(client, project, "ndjson")
+        assert response.headers["content-type"].startswith("application/x-ndjson")
+        assert f'project-{project["id"]}-tasks.ndjson' in response.headers["content-disposition"]
+
+        rows = [json.loads(line) for line in response.text.splitlines()]
+        assert [row["id"] for row in rows] == project["task_ids"]
+        assert list(rows[0]) == list(TaskOut.model_fields)
+        assert rows[0]["due_date"] == "2026-01-01T00:00:00"
+        # ceil(7 / 3) batches of rows
+        assert len([chunk for chunk in chunks if chunk]) == 3
+
+    def test_csv_has_one_header_across_batches(self, client, project, chunks):
+        response = export(client, project, "csv")
+        assert response.headers["content-type"].startswith("text/csv")
+
+        rows = list(csv.reader(io.StringIO(response.text)))
+        assert rows[0] == list(TaskOut.model_fields)
+        assert [int(row[0]) for row in rows[1:]] == project["task_ids"]
+        assert len([chunk for chunk in chunks if chunk]) == 3
+
+    def test_filters_apply_to_the_export(self, client, project):
+        response = client.get(
+            f"/projects/{project['id']}/tasks/export",
+            params={"format": "ndjson", "status": "completed"},
+            headers=project["headers"]
+        )
+        assert response.status_code == 200
+        assert response.text == ""
@@ -0,0 +1,131 @@
+"""
+Task Dependency Graph Tests
+Checks closure queries, cycle detection and the incrementally maintained
+unresolved blocker counts against a small hand-built graph
+"""
+import datetime
+import pytest
+from sqlalchemy import select
+from app.models.user import User
+from app.models.projects import Project
+from app.models.project_members import ProjectMembers
+from app.models.tasks import Task
+from app.models.task_dependencies import TaskDependency
+from app.schemas.task_dependencies import DependencyDirection
+from app.utils.task_graph import TaskGraphService
+
+pytestmark = pytest.mark.integration
+
+
+@pytest.fixture
+def chain(db_session):
+    """Build design <- build <- release, with docs related to release"""
+    owner = User(username="graph_owner", email="graph@test.local", hashed_password="x")
+    db_session.add(owner)
+    db_session.flush()
+
+    project = Project(name="Graph", description="Graph", created_by=owner.id)
+    db_session.add(project)
+    db_session.flush()
+
+    member = ProjectMembers(project_id=project.id, user_id=owner.id, role="member")
+    db_session.add(member)
+    db_session.flush()
+
+    tasks = {
+        name: Task(
+            name=name,
+            description=name,
+            status="pending",
+            priority="medium",
+            due_date=datetime.datetime(2026, 1, 1),
+            project_id=project.id,
+            assigned_to_user=member.id,
+        )
+        for name in ("design", "build", "release", "docs")
+    }
+    db_session.add_all(tasks.values())
+    db_session.flush()
+
+    edges = [("build", "design", "blocks"), ("release", "build", "blocks"), ("docs", "release", "related_to")]
+    for task, depends_on, dependency_type in edges:
+        db_session.add(TaskDependency(
+            task_id=tasks[task].id, depends_on_task_id=tasks[depends_on].id, dependency_type=dependency_type
+        ))
+        if dependency_type == "blocks":
+            tasks[task].unresolved_blocker_count = 1
+    db_session.commit()
+
+    return {name: task.id for name, task in tasks.items()}
+
+
+async def closure_ids(session, task_id, direction, dependency_type=None):
+    reachable = TaskGraphService.closure(task_id, direction, dependency_type)
+    result = await session.execute(reachable.select())
+    return {row.task_id for row in result}
+
+
+async def blocker_counts(session, ids):
+    result = await session.execute(
+        select(Task.id, Task.unresolved_blocker_count, Task.is_blocked).where(Task.id.in_(ids.values()))
+    )
+    return {row.id: (row.unresolved_blocker_count, row.is_blocked) for row in result}
+
+
+class TestTaskGraph:
+    """Transitive closure and cycle detection"""
+
+    @pytest.mark.asyncio
+    async def test_upstream_closure(self, async_session, chain):
+        assert await closure_ids(async_session, chain["release"], DependencyDirection.UPSTREAM) == {
+            chain["build"], chain["design"]
+        }
+
+    @pytest.mark.asyncio
+    async def test_downstream_closure_by_type(self, async_session, chain):
+        downstream = await closure_ids(async_session, chain["design"], DependencyDirection.DOWNSTREAM)
+        blocks_only = await closure_ids(async_session, chain["design"], DependencyDirection.DOWNSTREAM, "blocks")
+        assert downstream == {chain["build"], chain["release"], chain["docs"]}
+        assert blocks_only == {chain["build"], chain["release"]}
+
+    @pytest.mark.asyncio
+    async def test_cycle_is_detected(self, async_session, chain):
+        assert await TaskGraphService.would_create_cycle(async_session, chain["design"], chain["release"])
+        assert not await TaskGraphService.would_create_cycle(async_session, chain["release"], chain["design"])
+
+
+class TestBlockerCounts:
+    """unresolved_blocker_count follows blocker status changes"""
+
+    @pytest.mark.asyncio
+    async def test_initial_counts(self, async_session, chain):
+        counts = await blocker_counts(async_session, chain)
+        assert counts[chain["design"]] == (0, False)
+        assert counts[chain["build"]] == (1, True)
+        assert counts[chain["release"]] == (1, True)
+        assert counts[chain["docs"]] == (0, False)
+
+    @pytest.mark.asyncio
+    async def test_completing_blocker_unblocks_dependents(self, async_session, chain):
+        await TaskGraphService.shift_blocker_counts(async_session, [chain["design"]], -1)
+        await async_session.commit()
+
+        counts = await blocker_counts(async_session, chain)
+        assert counts[chain["build"]] == (0, False)
+        assert counts[chain["release"]] == (1, True)
+
+    @pytest.mark.asyncio
+    async def test_reopening_blocker_blocks_dependents_again(self, async_session, chain):
+        await TaskGraphService.shift_blocker_counts(async_session, [chain["design"], chain["build"]], -1)
+        await TaskGraphService.shift_blocker_counts(async_session, [chain["build"]], 1)
+        await async_session.commit()
+
+        counts = await blocker_counts(async_session, chain)
+        assert counts[chain["build"]] == (0, False)
+        assert counts[chain["release"]] == (1, True)
+
+    def test_open_blocker_states(self):
+        assert TaskGraphService.is_open_blocker("pending", False)
+        assert TaskGraphService.is_open_blocker("in-progress", False)
+        assert not TaskGraphService.is_open_blocker("completed", False)
+        assert not TaskGraphService.is_open_blocker("pending", True)
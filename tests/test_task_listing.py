@@ -0,0 +1,70 @@
+"""
+Task Listing Pagination Tests
+Walks GET /projects/{project_id}/tasks page by page with next_cursor and
+checks that malformed cursors are rejected with 400
+"""
+import base64
+import json
+import pytest
+from tests.conftest import seed_project
+
+TASKS = 5
+
+pytestmark = pytest.mark.integration
+
+
+@pytest.fixture
+def project(client, db_session):
+    # One transaction, so every task shares created_at and pages rely on the id tie-break
+    return seed_project(db_session, "listing", TASKS)
+
+
+class TestCursorPagination:
+    """Keyset pagination over (created_at, id)"""
+
+    def test_cursor_walks_every_task_once(self, client, project):
+        url = f"/projects/{project['id']}/tasks"
+        pages = []
+        params = {"limit": 2}
+        while True:
+            response = client.get(url, params=params, headers=project["headers"])
+            assert response.status_code == 200
+            body = response.json()
+            pages.append([task["id"] for task in body["tasks"]])
+            if body["next_cursor"] is None:
+                break
+            params = {"limit": 2, "cursor": body["next_cursor"]}
+
+        ids = project["task_ids"]
+        assert pages == [ids[0:2], ids[2:4], ids[4:5]]
+
+    def test_cursor_keeps_filters_and_fields(self, client, project):
+        url = f"/projects/{project['id']}/tasks"
+        params = {"limit": 3, "fields": "name", "status": "pending"}
+        first = client.get(url, params=params, headers=project["headers"]).json()
+        second = client.get(url, params={**params, "cursor": first["next_cursor"]}, headers=project["headers"]).json()
+        assert [task["id"] for task in first["tasks"] + second["tasks"]] == project["task_ids"]
+        assert set(second["tasks"][0]) == {"id", "name"}
+
+    @pytest.mark.parametrize("cursor", [
+        "not-a-cursor",
+        base64.urlsafe_b64encode(json.dumps([1, "x"]).encode()).decode(),
+        base64.urlsafe_b64encode(json.dumps([{"dt": "2026-01-01T00:00:00"}, "x"]).encode()).decode(),
+    ])
+    def test_malformed_cursor_is_rejected(self, client, project, cursor):
+        response = client.get(
+            f"/projects/{project['id']}/tasks", params={"cursor": cursor}, headers=project["headers"]
+        )
+        assert response.status_code == 400
+        assert response.json()["detail"] == "Invalid pagination cursor"
+
+    def test_cursor_and_offset_are_exclusive(self, client, project):
+        first = client.get(
+            f"/projects/{project['id']}/tasks", params={"limit": 1}, headers=project["headers"]
+        ).json()
+        response = client.get(
+            f"/projects/{project['id']}/tasks",
+            params={"cursor": first["next_cursor"], "offset": 1},
+            headers=project["headers"]
+        )
+        assert response.status_code == 400
@@ -0,0 +1,133 @@
+"""
+Task Search Benchmark
+Seeds a large synthetic dataset and checks that full-text search is served
+by the GIN index, ranks name matches first and stays fast on every page
+"""
+import datetime
+import statistics
+import time
+import pytest
+from sqlalchemy import insert, text
+from sqlalchemy.dialects import postgresql
+from sqlalchemy.orm import Query
+from app.models.user import User
+from app.models.projects import Project
+from app.models.tasks import Task
+from app.routes.tasks import _search_tasks
+from app.utils.database import Base
+from tests.conftest import engine, TestingSessionLocal, TestingAsyncSessionLocal
+
+PROJECTS = 20
+TASKS_PER_PROJECT = 5000
+WORDS = [
+    "invoice", "deploy", "migration", "customer", "onboarding", "refactor", "billing", "dashboard",
+    "latency", "report", "security", "audit", "release", "backup", "kubernetes", "postgres",
+]
+SEARCH_BUDGET_SECONDS = 0.2
+
+pytestmark = [pytest.mark.integration, pytest.mark.benchmark]
+
+
+@pytest.fixture(scope="module")
+def search_dataset():
+    """Seed PROJECTS * TASKS_PER_PROJECT tasks with a small shared vocabulary"""
+    Base.metadata.create_all(bind=engine)
+    session = TestingSessionLocal()
+    try:
+        owner = User(username="search_owner", email="search@test.local", hashed_password="x")
+        session.add(owner)
+        session.flush()
+
+        projects = [Project(name=f"Search {i}", description="Seed", created_by=owner.id) for i in range(PROJECTS)]
+        session.add_all(projects)
+        session.flush()
+
+        for project in projects:
+            rows = [
+                {
+                    "project_id": project.id,
+                    "name": f"{WORDS[n % len(WORDS)]} task {n}",
+                    "description": " ".join(WORDS[(n + k) % len(WORDS)] for k in range(1, 6)) * 4,
+                    "status": "pending",
+                    "priority": "medium",
+                    "due_date": datetime.datetime(2026, 1, 1),
+                    "is_deleted": False,
+                }
+                for n in range(TASKS_PER_PROJECT)
+            ]
+            # A single needle per project so selective queries have one exact hit
+            rows[0]["name"] = "quarterly zeppelin retrospective"
+            session.execute(insert(Task), rows)
+        session.commit()
+        session.execute(text("ANALYZE tasks"))
+        session.commit()
+
+        yield {"project_id": projects[0].id}
+    finally:
+        session.close()
+        Base.metadata.drop_all(bind=engine)
+
+
+class TestTaskSearch:
+    """Full-text search over task names and descriptions"""
+
+    def test_search_uses_gin_index(self, search_dataset):
+        session = TestingSessionLocal()
+        try:
+            tsquery = text("websearch_to_tsquery('english', 'zeppelin')")
+            query = Query(Task.id).filter(
+                Task.project_id == search_dataset["project_id"],
+                Task.search_vector.op("@@")(tsquery)
+            )
+            compiled = query.statement.compile(dialect=postgresql.dialect())
+            plan = "\n".join(
+                row[0] for row in session.connection().exec_driver_sql(f"EXPLAIN {compiled}", compiled.params)
+            )
+        finally:
+            session.close()
+
+        assert "ix_tasks_search_vector" in plan, plan
+
+    @pytest.mark.asyncio
+    async def test_name_matches_rank_above_description_matches(self, search_dataset):
+        async with TestingAsyncSessionLocal() as session:
+            result = await _search_tasks(
+                session, "invoice", Task.project_id == search_dataset["project_id"], 200, None
+            )
+
+        hits = result["tasks"]
+        name_hits = [hit for hit in hits if "invoice" in hit.name]
+        assert name_hits
+        assert hits[:len(name_hits)] == name_hits
+
+    @pytest.mark.asyncio
+    async def test_pages_do_not_overlap(self, search_dataset):
+        async with TestingAsyncSessionLocal() as session:
+            scope = Task.project_id == search_dataset["project_id"]
+            first = await _search_tasks(session, "deploy billing", scope, 50, None)
+            second = await _search_tasks(session, "deploy billing", scope, 50, first["next_cursor"])
+
+        first_ids = {hit.id for hit in first["tasks"]}
+        second_ids = {hit.id for hit in second["tasks"]}
+        assert first["next_cursor"] is not None
+        assert second_ids and not first_ids & second_ids
+
+    @pytest.mark.asyncio
+    async def test_search_latency(self, search_dataset):
+        timings = []
+        async with TestingAsyncSessionLocal() as session:
+            scope = Task.project_id == search_dataset["project_id"]
+            cursor = None
+            for _ in range(10):
+                start = time.perf_counter()
+                result = await _search_tasks(session, "zeppelin OR audit", scope, 50, cursor)
+                timings.append(time.perf_counter() - start)
+                cursor = result["next_cursor"]
+                if cursor is None:
+                    break
+
+        median = statistics.median(timings)
+        assert median < SEARCH_BUDGET_SECONDS, (
+            f"search over {PROJECTS * TASKS_PER_PROJECT} tasks: median {median * 1000:.1f} ms "
+            f"across {len(timings)} pages, budget {SEARCH_BUDGET_SECONDS * 1000:.0f} ms"
+        )
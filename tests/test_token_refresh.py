@@ -0,0 +1,144 @@
+"""
+Token Refresh Tests
+Checks the refresh token exchange, rotation and replay detection, and
+benchmarks the CPU saved by refreshing instead of logging in again
+"""
+import time
+import pytest
+from fastapi.testclient import TestClient
+from sqlalchemy import insert
+from app.config import settings
+from app.models.user import User
+from app.routes.user import router as user_router
+from app.utils.auth import create_access_token, create_refresh_token, hash_password
+
+pytestmark = pytest.mark.unit
+
+PASSWORD = "correct horse"
+# Session churn: clients renewing their access token this many times
+RENEWALS = 20
+
+
+@pytest.fixture
+def client(sqlite_app, fake_redis):
+    async def setup():
+        async with sqlite_app.engine.begin() as connection:
+            await connection.run_sync(User.__table__.create)
+            await connection.execute(insert(User), [
+                {"id": 1, "username": "alice", "email": "alice@example.com",
+                 "hashed_password": hash_password(PASSWORD), "is_admin": False, "is_deleted": False},
+                {"id": 2, "username": "bob", "email": "bob@example.com",
+                 "hashed_password": "", "is_admin": False, "is_deleted": True},
+                {"id": 3, "username": "carol", "email": "carol@example.com",
+                 "hashed_password": "", "is_admin": True, "is_deleted": False},
+            ])
+
+    sqlite_app.app.include_router(user_router)
+    with TestClient(sqlite_app.app) as test_client:
+        test_client.portal.call(setup)
+        yield test_client
+
+
+def refresh(client, token: str):
+    return client.post("/users/token/refresh", json={"refresh_token": token})
+
+
+def login(client) -> str:
+    response = client.post("/users/login", data={"username": "alice", "password": PASSWORD})
+    assert response.status_code == 200
+    return response.json()["refresh_token"]
+
+
+def update_alice(client, **fields):
+    admin = {"Authorization": f"Bearer {create_access_token({'sub': '3'})}"}
+    response = client.put("/users/1", json=fields, headers=admin)
+    assert response.status_code == 200
+
+
+class TestTokenRefresh:
+    """Exchange, rotation and replay detection"""
+
+    def test_refresh_issues_new_tokens(self, client):
+        token = create_refresh_token({"sub": "1"})
+        response = refresh(client, token)
+        assert response.status_code == 200
+        body = response.json()
+        assert body["token_type"] == "bearer"
+        assert body["refresh_token"] != token
+
+    def test_access_token_is_not_a_refresh_token(self, client):
+        response = refresh(client, create_access_token({"sub": "1"}))
+        assert response.status_code == 401
+        assert response.json()["detail"] == "Invalid refresh token"
+
+    def test_deleted_user_cannot_refresh(self, client):
+        assert refresh(client, create_refresh_token({"sub": "2"})).status_code == 401
+
+    def test_replay_revokes_the_token_family(self, client):
+        stolen = create_refresh_token({"sub": "1"})
+        rotated = refresh(client, stolen).json()["refresh_token"]
+
+        replay = refresh(client, stolen)
+        assert replay.status_code == 401
+        assert replay.json()["detail"] == "Refresh token has been revoked"
+        # The legitimate client's rotated token belongs to the revoked family
+        assert refresh(client, rotated).status_code == 401
+
+    def test_other_logins_are_unaffected_by_a_replay(self, client):
+        stolen = create_refresh_token({"sub": "1"})
+        refresh(client, stolen)
+        refresh(client, stolen)
+        assert refresh(client, create_refresh_token({"sub": "1"})).status_code == 200
+
+    def test_password_change_revokes_every_login(self, client):
+        first = login(client)
+        rotated = refresh(client, login(client)).json()["refresh_token"]
+        update_alice(client, bio="Unrelated change")
+        assert refresh(client, first).status_code == 200
+
+        update_alice(client, password="battery staple")
+        for token in (first, rotated):
+            response = refresh(client, token)
+            assert response.status_code == 401
+            assert response.json()["detail"] == "Refresh token has been revoked"
+        # A login with the new password is not affected
+        response = client.post("/users/login", data={"username": "alice", "password": "battery staple"})
+        assert refresh(client, response.json()["refresh_token"]).status_code == 200
+
+    def test_password_change_revokes_without_rotation(self, client, monkeypatch):
+        monkeypatch.setattr(settings, "refresh_token_rotation", False)
+        token = login(client)
+        update_alice(client, password="battery staple")
+        assert refresh(client, token).status_code == 401
+
+    def test_without_rotation_the_token_is_kept(self, client, monkeypatch):
+        monkeypatch.setattr(settings, "refresh_token_rotation", False)
+        token = create_refresh_token({"sub": "1"})
+        assert refresh(client, token).json()["refresh_token"] == token
+        assert refresh(client, token).status_code == 200
+
+
+@pytest.mark.benchmark
+class TestSessionChurnCost:
+    """CPU spent renewing access tokens by login versus by refresh"""
+
+    def test_refresh_costs_a_fraction_of_a_login(self, client, monkeypatch):
+        # Measures hashing cost, not the login throttle
+        monkeypatch.setattr(settings, "login_rate_limit_enabled", False)
+        start = time.process_time()
+        for _ in range(RENEWALS):
+            response = client.post("/users/login", data={"username": "alice", "password": PASSWORD})
+            assert response.status_code == 200
+        login_cpu = time.process_time() - start
+
+        token = create_refresh_token({"sub": "1"})
+        start = time.process_time()
+        for _ in range(RENEWALS):
+            response = refresh(client, token)
+            assert response.status_code == 200
+            token = response.json()["refresh_token"]
+        refresh_cpu = time.process_time() - start
+
+        assert refresh_cpu < login_cpu / 5, (
+            f"{RENEWALS} renewals: login {login_cpu * 1000:.0f} ms CPU, refresh {refresh_cpu * 1000:.0f} ms CPU"
+        )
@@ -0,0 +1,72 @@
+"""
+Transaction Middleware Tests
+Checks that sessions are only opened by requests that use them and that
+those are committed or rolled back according to the response status
+"""
+import pytest
+from fastapi import Depends, HTTPException
+from fastapi.testclient import TestClient
+from sqlalchemy import text
+from sqlalchemy.ext.asyncio import AsyncSession
+from app.utils.database import after_commit
+from app.utils.dependencies import get_db
+
+pytestmark = pytest.mark.unit
+
+
+@pytest.fixture
+def client(sqlite_app):
+    app = sqlite_app.app
+
+    @app.get("/ping")
+    async def ping():
+        return {"ok": True}
+
+    @app.post("/write")
+    async def write(db: AsyncSession = Depends(get_db)):
+        await db.execute(text("CREATE TABLE IF NOT EXISTS notes (body TEXT)"))
+        await db.execute(text("INSERT INTO notes VALUES ('kept')"))
+
+        async def mark():
+            db.info["callback_ran"] = True
+        after_commit(db, mark)
+        return {"ok": True}
+
+    @app.post("/fail")
+    async def fail(db: AsyncSession = Depends(get_db)):
+        await db.execute(text("CREATE TABLE IF NOT EXISTS notes (body TEXT)"))
+        await db.execute(text("INSERT INTO notes VALUES ('dropped')"))
+        raise HTTPException(status_code=409, detail="conflict")
+
+    @app.get("/notes")
+    async def notes(db: AsyncSession = Depends(get_db)):
+        result = await db.execute(text("SELECT body FROM notes"))
+        return [row.body for row in result]
+
+    with TestClient(app) as test_client:
+        yield test_client
+
+
+class TestTransactionMiddleware:
+    """Lazily opened per-request sessions"""
+
+    def test_route_without_db_opens_no_session(self, client, sqlite_app):
+        assert client.get("/ping").status_code == 200
+        assert sqlite_app.sessions == []
+
+    def test_success_commits_and_runs_callbacks(self, client, sqlite_app):
+        assert client.post("/write").status_code == 200
+        assert sqlite_app.sessions[0].info.get("callback_ran")
+        assert client.get("/notes").json() == ["kept"]
+
+    def test_error_status_rolls_back(self, client, sqlite_app):
+        client.post("/write")
+        assert client.post("/fail").status_code == 409
+        assert client.get("/notes").json() == ["kept"]
+
+    def test_audit_context_is_set_on_open(self, client, sqlite_app):
+        client.post("/write", headers={"User-Agent": "pytest"})
+        info = sqlite_app.sessions[0].info
+        assert info["endpoint"] == "POST /write"
+        assert info["user_agent"] == "pytest"
+        assert info["user_id"] is None
@@ -0,0 +1,155 @@
+"""
+Authenticated-User Cache Tests
+Checks that a request decodes its token once and that the common
+authenticated path learns who the caller is without touching the database
+"""
+import asyncio
+import jwt
+import pytest
+from fastapi import Depends
+from fastapi.testclient import TestClient
+from sqlalchemy import insert
+from sqlalchemy.ext.asyncio import AsyncSession
+from app.middleware import transaction
+from app.models.user import User
+from app.utils import user_cache
+from app.utils.auth import create_access_token, create_refresh_token, get_current_user, get_current_user_record
+from app.utils.dependencies import get_db
+from app.utils.lru import MISSING
+from app.utils.role_cache import invalidate_scope
+from app.utils.user_cache import (
+    cached_user, invalidate_user, invalidate_user_after_commit, store_user, user_scope
+)
+
+pytestmark = pytest.mark.unit
+
+
+async def seed(engine):
+    async with engine.begin() as connection:
+        await connection.run_sync(User.__table__.create)
+        await connection.execute(insert(User), [
+            {"id": 1, "username": "alice", "email": "alice@example.com", "is_admin": False, "is_deleted": False},
+            {"id": 2, "username": "bob", "email": "bob@example.com", "is_admin": True, "is_deleted": True},
+        ])
+
+
+@pytest.fixture
+def client(sqlite_app, fake_redis):
+    app = sqlite_app.app
+
+    @app.get("/whoami")
+    async def whoami(current_user: User = Depends(get_current_user)):
+        return {"id": current_user.id, "username": current_user.username, "is_admin": current_user.is_admin}
+
+    @app.get("/me")
+    async def me(current_user: User = Depends(get_current_user_record)):
+        return {"email": current_user.email}
+
+    @app.post("/rename")
+    async def rename(current_user: User = Depends(get_current_user_record), db: AsyncSession = Depends(get_db)):
+        current_user.username = "alicia"
+        await db.flush()
+        invalidate_user_after_commit(db, current_user.id)
+        return {"ok": True}
+
+    with TestClient(app) as test_client:
+        test_client.portal.call(seed, sqlite_app.engine)
+        yield test_client
+
+
+def bearer(user_id: int) -> dict:
+    return {"Authorization": f"Bearer {create_access_token({'sub': str(user_id)})}"}
+
+
+class TestSingleDecode:
+    """Claims are decoded once and shared through the request state"""
+
+    def test_token_is_decoded_once_per_request(self, client, sqlite_app, monkeypatch):
+        decodes = []
+        real_decode = jwt.decode
+
+        def counting_decode(*args, **kwargs):
+            decodes.append(args[0])
+            return real_decode(*args, **kwargs)
+
+        monkeypatch.setattr(jwt, "decode", counting_decode)
+        response = client.get("/whoami", headers=bearer(1))
+        assert response.status_code == 200
+        # The session opened on the cache miss read its user id from the same claims
+        assert len(decodes) == 1
+        assert sqlite_app.sessions[0].info["user_id"] == 1
+
+    def test_invalid_token_is_rejected(self, client):
+        response = client.get("/whoami", headers={"Authorization": "Bearer not-a-token"})
+        assert response.status_code == 401
+        assert response.json()["detail"] == "Invalid token"
+
+    def test_refresh_token_is_not_an_access_token(self, client):
+        token = create_refresh_token({"sub": "1"})
+        response = client.get("/whoami", headers={"Authorization": f"Bearer {token}"})
+        assert response.status_code == 401
+        assert response.json()["detail"] == "Invalid token type"
+
+
+class TestUserCache:
+    """Cache hits skip the database; changes invalidate after commit"""
+
+    def test_second_request_opens_no_session(self, client, sqlite_app):
+        first = client.get("/whoami", headers=bearer(1))
+        second = client.get("/whoami", headers=bearer(1))
+        assert first.json() == second.json() == {"id": 1, "username": "alice", "is_admin": False}
+        assert len(sqlite_app.sessions) == 1
+
+    def test_redis_tier_serves_other_workers(self, client, sqlite_app, fake_redis):
+        client.get("/whoami", headers=bearer(1))
+        user_cache.local_users.clear()
+        assert client.get("/whoami", headers=bearer(1)).status_code == 200
+        assert len(sqlite_app.sessions) == 1
+
+    @pytest.mark.asyncio
+    async def test_invalidation_reaches_other_workers(self, listening):
+        await store_user(User(id=1, username="alice", is_admin=False, is_deleted=False), "")
+        assert await cached_user(1) is not None
+        # Another worker deletes the user: only the message reaches this one
+        await invalidate_scope(user_scope(1), 60)
+        for _ in range(100):
+            if user_cache.local_users.get(user_scope(1)) is MISSING:
+                break
+            await asyncio.sleep(0.01)
+        assert await cached_user(1) is None
+
+    def test_deleted_user_is_rejected(self, client):
+        assert client.get("/whoami", headers=bearer(2)).status_code == 401
+        assert client.get("/whoami", headers=bearer(2)).status_code == 401
+
+    def test_full_record_is_loaded_on_demand(self, client):
+        client.get("/whoami", headers=bearer(1))
+        assert client.get("/me", headers=bearer(1)).json() == {"email": "alice@example.com"}
+
+    def test_update_invalidates_after_commit(self, client, fake_redis):
+        client.get("/whoami", headers=bearer(1))
+        assert client.post("/rename", headers=bearer(1)).status_code == 200
+        assert client.portal.call(fake_redis.exists, "auth_user:1") == 0
+        assert client.get("/whoami", headers=bearer(1)).json()["username"] == "alicia"
+
+    def test_deletion_during_lookup_is_not_cached(self, client, monkeypatch, fake_redis):
+        open_session = transaction.AsyncSessionLocal
+
+        def session_deleting_during_read():
+            session = open_session()
+            read = session.get
+
+            async def read_then_delete(*args, **kwargs):
+                # delete_user commits and invalidates between the user read
+                # and the cache store
+                user = await read(*args, **kwargs)
+                await invalidate_user(1)
+                return user
+
+            session.get = read_then_delete
+            return session
+
+        monkeypatch.setattr(transaction, "AsyncSessionLocal", session_deleting_during_read)
+        assert client.get("/whoami", headers=bearer(1)).status_code == 200
+        assert client.portal.call(fake_redis.exists, "auth_user:1") == 0
+        assert user_cache.local_users.get("auth_user:1") is MISSING